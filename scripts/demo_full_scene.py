@@ -4,27 +4,23 @@ Demo: Full player experience of a scene.
 Shows exactly what a player would see.
 """
 
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from kings_paradox.prototype.llm import complete
 
 load_dotenv()
 
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-)
 MODEL = "anthropic/claude-sonnet-4"
 
 
 def generate(prompt: str, temp: float = 0.8) -> str:
-    response = client.chat.completions.create(
+    response = complete(
+        [{"role": "user", "content": prompt}],
         model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
         temperature=temp,
         max_tokens=300,
     )
-    return response.choices[0].message.content or ""
+    return response.text
 
 
 def print_slow(text: str):
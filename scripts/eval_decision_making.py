@@ -11,14 +11,15 @@ Usage:
 
 import argparse
 import json
-import os
 import subprocess
 from datetime import datetime
 from pathlib import Path
 
 import yaml
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from kings_paradox.prototype.cache import ResponseCache
+from kings_paradox.prototype.llm import complete, get_cache, get_usage, set_cache
 
 load_dotenv()
 
@@ -89,20 +90,18 @@ def build_prompt(template: str, scenario: dict, data: dict) -> str:
     return prompt
 
 
-def call_openrouter(client: OpenAI, model: str, prompt: str) -> str:
+def call_openrouter(model: str, prompt: str) -> str:
     """Call OpenRouter API."""
-    response = client.chat.completions.create(
+    response = complete(
+        [{"role": "user", "content": prompt}],
         model=model,
-        messages=[{"role": "user", "content": prompt}],
         temperature=0.7,
         max_tokens=1000,  # Enough for reasoning + response
     )
-    content = response.choices[0].message.content or ""
+    content = response.text
     # If content is empty but reasoning exists, model is still "thinking"
-    if not content.strip() and hasattr(response.choices[0].message, 'reasoning'):
-        reasoning = response.choices[0].message.reasoning or ""
-        if reasoning.strip():
-            return f"[MODEL THINKING ONLY]: {reasoning[:500]}"
+    if not content.strip() and response.reasoning.strip():
+        return f"[MODEL THINKING ONLY]: {response.reasoning[:500]}"
     return content
 
 
@@ -111,11 +110,6 @@ def run_scenarios(provider: str, scenario_filter: str = None) -> list[dict]:
     data = load_scenarios()
     template = load_base_template()
 
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
-
     scenarios = data["scenarios"]
     if scenario_filter:
         scenarios = [s for s in scenarios if scenario_filter in s["id"]]
@@ -127,7 +121,7 @@ def run_scenarios(provider: str, scenario_filter: str = None) -> list[dict]:
         prompt = build_prompt(template, scenario, data)
 
         try:
-            output = call_openrouter(client, provider, prompt)
+            output = call_openrouter(provider, prompt)
         except Exception as e:
             output = f"ERROR: {e}"
 
@@ -294,11 +288,24 @@ def main():
     parser.add_argument("--scenario", help="Filter to specific scenario ID (substring match)")
     parser.add_argument("--output", help="Output file path")
     parser.add_argument("--skip-judgment", action="store_true", help="Skip Claude judgment")
+    parser.add_argument("--cache", help="Reuse LLM responses from this SQLite cache file")
     args = parser.parse_args()
 
+    if args.cache:
+        set_cache(ResponseCache(args.cache))
+
     print(f"\n🔬 Running T1b Decision-Making tests with {args.provider}\n")
     results = run_scenarios(args.provider, args.scenario)
 
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"\n🗄️  LLM cache: {stats.hits} hits, {stats.misses} misses ({stats.hit_rate:.0%})")
+    usage = get_usage()
+    if usage.calls:
+        print(f"🧩 Prompt cache: {usage.cached_tokens}/{usage.prompt_tokens} prompt tokens "
+              f"cached ({usage.cached_rate:.0%})")
+
     if not args.skip_judgment:
         prompt = format_for_claude_judgment(results, args.provider)
         judgment = call_claude_judge(prompt)
@@ -9,14 +9,15 @@ Usage:
 
 import argparse
 import json
-import os
 import subprocess
 from datetime import datetime
 from pathlib import Path
 
 import yaml
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from kings_paradox.prototype.cache import ResponseCache
+from kings_paradox.prototype.llm import complete, get_cache, get_usage, set_cache
 
 load_dotenv()
 
@@ -37,15 +38,15 @@ def load_prompt_template(test_name: str, prompt_file: str) -> str:
         return f.read()
 
 
-def call_openrouter(client: OpenAI, model: str, prompt: str) -> str:
+def call_openrouter(model: str, prompt: str) -> str:
     """Call OpenRouter API."""
-    response = client.chat.completions.create(
+    response = complete(
+        [{"role": "user", "content": prompt}],
         model=model,
-        messages=[{"role": "user", "content": prompt}],
         temperature=0.7,
-        extra_body={"include_reasoning": False}
+        extra_body={"include_reasoning": False},
     )
-    return response.choices[0].message.content
+    return response.text
 
 
 def run_evaluation(test_name: str, provider: str) -> list[dict]:
@@ -54,11 +55,6 @@ def run_evaluation(test_name: str, provider: str) -> list[dict]:
     prompt_file = config["prompts"][0]
     template = load_prompt_template(test_name, prompt_file)
 
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
-
     results = []
     for i, test in enumerate(config.get("tests", [])):
         description = test.get("description", f"Test {i+1}")
@@ -71,7 +67,7 @@ def run_evaluation(test_name: str, provider: str) -> list[dict]:
         print(f"  [{i+1}/{len(config.get('tests', []))}] {description}...")
 
         try:
-            output = call_openrouter(client, provider, prompt)
+            output = call_openrouter(provider, prompt)
         except Exception as e:
             output = f"ERROR: {e}"
 
@@ -232,12 +228,25 @@ def main():
     parser.add_argument("--test", default="t01_knowledge", help="Test name")
     parser.add_argument("--output", help="Output file path")
     parser.add_argument("--skip-judgment", action="store_true", help="Skip Claude judgment")
+    parser.add_argument("--cache", help="Reuse LLM responses from this SQLite cache file")
     args = parser.parse_args()
 
+    if args.cache:
+        set_cache(ResponseCache(args.cache))
+
     # Run evaluation
     print(f"\n🔬 Running {args.test} with {args.provider}\n")
     results = run_evaluation(args.test, args.provider)
 
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"\n🗄️  LLM cache: {stats.hits} hits, {stats.misses} misses ({stats.hit_rate:.0%})")
+    usage = get_usage()
+    if usage.calls:
+        print(f"🧩 Prompt cache: {usage.cached_tokens}/{usage.prompt_tokens} prompt tokens "
+              f"cached ({usage.cached_rate:.0%})")
+
     # Get Claude's judgment
     if not args.skip_judgment:
         prompt = format_for_claude_judgment(results, args.provider, args.test)
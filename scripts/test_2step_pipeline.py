@@ -6,14 +6,14 @@ Tests whether NPCs only reference facts in their context packet,
 and correctly admit ignorance about things they don't know.
 """
 
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from kings_paradox.prototype.llm import complete
 
 load_dotenv()
 
 
-def step1_retrieve(client: OpenAI, model: str, npc_context: dict, player_input: str) -> dict:
+def step1_retrieve(model: str, npc_context: dict, player_input: str) -> dict:
     """Step 1: Determine what facts the NPC needs to recall."""
 
     prompt = f"""You are simulating the MEMORY of {npc_context['name']}.
@@ -39,16 +39,16 @@ IGNORANCE:
 INFERENCES:
 - [anything the NPC might infer from HOW the player spoke]"""
 
-    response = client.chat.completions.create(
+    response = complete(
+        [{"role": "user", "content": prompt}],
         model=model,
-        messages=[{"role": "user", "content": prompt}],
         temperature=0.3,
         max_tokens=300,
     )
-    return {"raw": response.choices[0].message.content or ""}
+    return {"raw": response.text}
 
 
-def step2_generate(client: OpenAI, model: str, npc_context: dict, player_input: str, retrieved: dict) -> str:
+def step2_generate(model: str, npc_context: dict, player_input: str, retrieved: dict) -> str:
     """Step 2: Generate in-character response using only retrieved facts."""
 
     prompt = f"""You are {npc_context['name']} in a medieval political intrigue game.
@@ -74,16 +74,16 @@ def step2_generate(client: OpenAI, model: str, npc_context: dict, player_input:
 
 Respond as {npc_context['name']}. Output ONLY your spoken dialogue, nothing else."""
 
-    response = client.chat.completions.create(
+    response = complete(
+        [{"role": "user", "content": prompt}],
         model=model,
-        messages=[{"role": "user", "content": prompt}],
         temperature=0.8,
         max_tokens=200,
     )
-    return response.choices[0].message.content or ""
+    return response.text
 
 
-def run_test(client: OpenAI, model: str, npc_context: dict, player_input: str, test_name: str):
+def run_test(model: str, npc_context: dict, player_input: str, test_name: str):
     """Run a single test case."""
     print(f"\n{'=' * 70}")
     print(f"TEST: {test_name}")
@@ -91,20 +91,15 @@ def run_test(client: OpenAI, model: str, npc_context: dict, player_input: str, t
     print(f"\nKing says: \"{player_input}\"")
 
     print(f"\n--- Step 1: Memory Retrieval ---")
-    retrieved = step1_retrieve(client, model, npc_context, player_input)
+    retrieved = step1_retrieve(model, npc_context, player_input)
     print(retrieved['raw'])
 
     print(f"\n--- Step 2: Response Generation ---")
-    response = step2_generate(client, model, npc_context, player_input, retrieved)
+    response = step2_generate(model, npc_context, player_input, retrieved)
     print(f"\n{npc_context['name']}: \"{response}\"")
 
 
 def main():
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
-
     model = "anthropic/claude-sonnet-4"
 
     # Duke's knowledge state
@@ -131,28 +126,28 @@ def main():
 
     # TEST 1: Question about something Duke knows
     run_test(
-        client, model, duke_context,
+        model, duke_context,
         "The execution went smoothly, don't you think? Baron Aldric died well.",
         "Known fact - execution"
     )
 
     # TEST 2: Question about something Duke doesn't know
     run_test(
-        client, model, duke_context,
+        model, duke_context,
         "My Chancellor gave me interesting advice yesterday. Do you know what he said?",
         "Unknown fact - should admit ignorance"
     )
 
     # TEST 3: Question that might tempt hallucination
     run_test(
-        client, model, duke_context,
+        model, duke_context,
         "I hear your wife has been seen with Lord Blackwood. What do you make of that?",
         "Hallucination trap - wife/Blackwood not in context"
     )
 
     # TEST 4: Probing for the secret
     run_test(
-        client, model, duke_context,
+        model, duke_context,
         "You've served my family for years. Tell me, Duke - do you believe I am fit to rule?",
         "Secret pressure - knows King is illegitimate"
     )
@@ -4,90 +4,76 @@ KP-4au: Test multi-NPC coordination in scene.
 
 Tests whether multiple NPCs interact coherently, showing appropriate
 coordination (conspirators) or tension (rivals).
+
+Usage:
+    python scripts/test_multi_npc.py            # One call per NPC
+    python scripts/test_multi_npc.py --batched  # Whole cast in one call
 """
 
-import os
+import argparse
+import asyncio
+import time
+
 from dotenv import load_dotenv
-from openai import OpenAI
 
-load_dotenv()
+from kings_paradox.prototype.scene import ResponseMode, _packet, generate_cast_responses_async
+from kings_paradox.prototype.state import NPC
 
+load_dotenv()
 
-def generate_npc_response(client: OpenAI, model: str, npc: dict, scene: dict,
-                          player_input: str, previous_responses: list) -> str:
-    """Generate a single NPC's response."""
 
-    prev_text = ""
-    if previous_responses:
-        prev_text = "\n".join(
-            f"{r['name']}: \"{r['response']}\"" for r in previous_responses
+def build_cast(scene: dict, characters: list[dict]) -> tuple[list[NPC], dict[str, dict]]:
+    """Turn character sheets into NPCs and the context packets the game would build."""
+    cast = []
+    packets = {}
+    for character in characters:
+        npc = NPC(
+            id=character["id"],
+            name=character["name"],
+            status="free",
+            loyalty=character["loyalty"],
+            location="throne_room",
+            knows=[character["manner"], *character["relationships"]],
+            agenda=character["agenda"],
+            personality=character["personality"],
         )
-        prev_text = f"\n=== WHAT OTHERS JUST SAID ===\n{prev_text}\n"
-
-    prompt = f"""You are {npc['name']} in a medieval political intrigue game.
-
-=== YOUR PERSONALITY ===
-{npc['personality']}
-
-=== YOUR HIDDEN AGENDA ===
-{npc['agenda']}
-
-=== YOUR RELATIONSHIPS ===
-{chr(10).join(f"- {rel}" for rel in npc['relationships'])}
+        cast.append(npc)
+        packets[npc.id] = _packet(npc, [scene["recent_events"]], (False, False))
+    return cast, packets
 
-=== SCENE CONTEXT ===
-Location: {scene['location']}
-Recent events: {scene['recent_events']}
-{prev_text}
-=== THE KING SAYS ===
-"{player_input}"
 
-=== INSTRUCTIONS ===
-1. Respond in character (2-3 sentences)
-2. Your relationships should subtly affect your response
-3. If an ally just spoke, consider supporting them
-4. If a rival just spoke, consider subtle undermining
-5. Show don't tell - use body language and tone
-6. Do NOT explicitly state your hidden agenda
-
-Output ONLY your spoken dialogue and brief action/body language, nothing else."""
-
-    response = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.8,
-        max_tokens=200,
-    )
-    return response.choices[0].message.content or ""
-
-
-def run_scene(client: OpenAI, model: str, scene: dict, npcs: list, player_input: str):
+def run_scene(scene: dict, characters: list, player_input: str, mode: ResponseMode):
     """Run a multi-NPC scene."""
 
     print(f"\n{'=' * 70}")
     print(f"SCENE: {scene['name']}")
     print(f"{'=' * 70}")
     print(f"\nLocation: {scene['location']}")
-    print(f"Present: {', '.join(npc['name'] for npc in npcs)}")
+    print(f"Present: {', '.join(character['name'] for character in characters)}")
     print(f"\nKing says: \"{player_input}\"")
 
-    responses = []
-    for npc in npcs:
-        response = generate_npc_response(client, model, npc, scene, player_input, responses)
-        responses.append({"name": npc["name"], "response": response})
-        print(f"\n{npc['name']}:")
-        print(response)
+    cast, packets = build_cast(scene, characters)
+    start = time.perf_counter()
+    responses = asyncio.run(
+        generate_cast_responses_async(cast, player_input, packets, [], mode=mode)
+    )
+    elapsed = time.perf_counter() - start
+
+    for npc in cast:
+        print(f"\n{npc.name}:")
+        print(responses[npc.id])
+    print(f"\n[{mode}: {elapsed:.1f}s]")
 
     return responses
 
 
 def main():
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
+    parser = argparse.ArgumentParser(description="Test multi-NPC coordination in scene")
+    parser.add_argument("--batched", action="store_true",
+                        help="Generate the whole cast's responses in one structured call")
+    args = parser.parse_args()
 
-    model = "anthropic/claude-sonnet-4"
+    mode: ResponseMode = "batched" if args.batched else "sequential"
 
     # === SCENE 1: Co-conspirators ===
     scene_1 = {
@@ -97,8 +83,11 @@ def main():
     }
 
     duke = {
+        "id": "duke_valerius",
         "name": "Duke Valerius",
-        "personality": "Calculating, formal, cautious. Never shows emotion openly.",
+        "personality": "schemer",
+        "loyalty": 35,
+        "manner": "Calculating, formal, cautious. Never shows emotion openly.",
         "agenda": "Protect the conspiracy. Deflect suspicion from himself and the Bishop.",
         "relationships": [
             "Bishop Erasmus: SECRET ALLY - co-conspirator, must protect him",
@@ -107,8 +96,11 @@ def main():
     }
 
     bishop = {
+        "id": "bishop_erasmus",
         "name": "Bishop Erasmus",
-        "personality": "Pious facade, soft-spoken, uses religious language. Shrewd underneath.",
+        "personality": "schemer",
+        "loyalty": 30,
+        "manner": "Pious facade, soft-spoken, uses religious language. Shrewd underneath.",
         "agenda": "Protect the conspiracy. Support the Duke's deflections.",
         "relationships": [
             "Duke Valerius: SECRET ALLY - co-conspirator, must support his plays",
@@ -124,8 +116,11 @@ def main():
     }
 
     duke_rival = {
+        "id": "duke_valerius",
         "name": "Duke Valerius",
-        "personality": "Calculating, formal, hides bitterness behind courtesy.",
+        "personality": "calculator",
+        "loyalty": 50,
+        "manner": "Calculating, formal, hides bitterness behind courtesy.",
         "agenda": "Undermine the General's credibility without appearing petty.",
         "relationships": [
             "General Maren: RIVAL - despises her, blames her for his humiliation",
@@ -134,8 +129,11 @@ def main():
     }
 
     general = {
+        "id": "general_maren",
         "name": "General Maren",
-        "personality": "Blunt, military bearing, disdains courtly games. Scarred face, direct gaze.",
+        "personality": "loyalist",
+        "loyalty": 80,
+        "manner": "Blunt, military bearing, disdains courtly games. Scarred face, direct gaze.",
         "agenda": "Cement her victory. Make the Duke look like a sore loser.",
         "relationships": [
             "Duke Valerius: RIVAL - views him as a scheming courtier, enjoys his defeat",
@@ -145,20 +143,23 @@ def main():
 
     # Run conspiracy scene
     run_scene(
-        client, model, scene_1, [duke, bishop],
-        "I've been thinking about who I can truly trust in this court. Duke, Bishop - you've both been at my side for years. But can I trust you with my life?"
+        scene_1, [duke, bishop],
+        "I've been thinking about who I can truly trust in this court. Duke, Bishop - you've both been at my side for years. But can I trust you with my life?",
+        mode,
     )
 
     # Run rivalry scene
     run_scene(
-        client, model, scene_2, [duke_rival, general],
-        "General, I trust you'll bring glory to the realm in the north. Duke, your nephew will have other opportunities to prove himself."
+        scene_2, [duke_rival, general],
+        "General, I trust you'll bring glory to the realm in the north. Duke, your nephew will have other opportunities to prove himself.",
+        mode,
     )
 
     # Run conspiracy scene with accusation
     run_scene(
-        client, model, scene_1, [duke, bishop],
-        "Strange rumors reach my ears. They say the Duke and the Bishop meet in private, late at night. What business could require such secrecy?"
+        scene_1, [duke, bishop],
+        "Strange rumors reach my ears. They say the Duke and the Bishop meet in private, late at night. What business could require such secrecy?",
+        mode,
     )
 
     print(f"\n{'=' * 70}")
@@ -3,10 +3,10 @@
 Test multi-turn conversation with proper system/user message structure.
 """
 
-import os
 import yaml
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from kings_paradox.prototype.llm import complete
 
 load_dotenv()
 
@@ -50,14 +50,14 @@ def build_user_prompt(situation_text: str, king_says: str) -> str:
     return user_prompt
 
 
-def call_llm(client: OpenAI, model: str, messages: list) -> str:
-    response = client.chat.completions.create(
+def call_llm(model: str, messages: list) -> str:
+    response = complete(
+        messages,
         model=model,
-        messages=messages,
         temperature=0.7,
         max_tokens=500,
     )
-    return response.choices[0].message.content or ""
+    return response.text
 
 
 def main():
@@ -78,10 +78,6 @@ def main():
     # Initial user message
     user_prompt_1 = build_user_prompt(situation["text"], scenario["king_says"])
 
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
 
     model = "qwen/qwen3-8b"
 
@@ -99,7 +95,7 @@ def main():
         {"role": "user", "content": user_prompt_1},
     ]
 
-    response_1 = call_llm(client, model, messages)
+    response_1 = call_llm(model, messages)
     print("\n[DUKE'S RESPONSE - Turn 1]")
     print(response_1)
 
@@ -117,7 +113,7 @@ def main():
     messages.append({"role": "assistant", "content": response_1})
     messages.append({"role": "user", "content": king_followup_2})
 
-    response_2 = call_llm(client, model, messages)
+    response_2 = call_llm(model, messages)
     print("\n[DUKE'S RESPONSE - Turn 2]")
     print(response_2)
 
@@ -135,7 +131,7 @@ def main():
     messages.append({"role": "assistant", "content": response_2})
     messages.append({"role": "user", "content": king_followup_3})
 
-    response_3 = call_llm(client, model, messages)
+    response_3 = call_llm(model, messages)
     print("\n[DUKE'S RESPONSE - Turn 3]")
     print(response_3)
 
@@ -5,14 +5,14 @@ KP-wzd: Test scene opening generation from context packet.
 Tests whether we can generate high-quality scene openings from structured context.
 """
 
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from kings_paradox.prototype.llm import complete
 
 load_dotenv()
 
 
-def generate_opening(client: OpenAI, model: str, context: dict) -> str:
+def generate_opening(model: str, context: dict) -> str:
     """Generate scene opening from structured context."""
 
     prompt = f"""Generate a scene opening for a text-based political intrigue game.
@@ -41,21 +41,16 @@ INSTRUCTIONS:
 
 OUTPUT ONLY THE SCENE OPENING TEXT, NOTHING ELSE."""
 
-    response = client.chat.completions.create(
+    response = complete(
+        [{"role": "user", "content": prompt}],
         model=model,
-        messages=[{"role": "user", "content": prompt}],
         temperature=0.8,
         max_tokens=300,
     )
-    return response.choices[0].message.content or ""
+    return response.text
 
 
 def main():
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
-
     model = "anthropic/claude-sonnet-4"
 
     # === SCENARIO 1: Tense summons after execution ===
@@ -130,19 +125,19 @@ def main():
     print("=" * 70)
     print("SCENARIO 1: Tense summons after execution")
     print("=" * 70)
-    opening_1 = generate_opening(client, model, context_1)
+    opening_1 = generate_opening(model, context_1)
     print(opening_1)
 
     print("\n" + "=" * 70)
     print("SCENARIO 2: Casual encounter, hidden conspiracy")
     print("=" * 70)
-    opening_2 = generate_opening(client, model, context_2)
+    opening_2 = generate_opening(model, context_2)
     print(opening_2)
 
     print("\n" + "=" * 70)
     print("SCENARIO 3: Multiple NPCs, rival factions")
     print("=" * 70)
-    opening_3 = generate_opening(client, model, context_3)
+    opening_3 = generate_opening(model, context_3)
     print(opening_3)
 
     print("\n" + "=" * 70)
@@ -0,0 +1,172 @@
+"""
+LLM Response Cache.
+
+Content-addressed on-disk cache for LLM completions. Entries are keyed on a
+hash of the request (model, messages, temperature, max_tokens, seed) and stored
+in SQLite, with LRU eviction by entry count, total size and age.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+def cache_key(
+    model: str,
+    messages: list[dict],
+    temperature: float | None,
+    max_tokens: int | None,
+    seed: int | None = None,
+    extra: dict | None = None,
+) -> str:
+    """Hash a request into a stable cache key."""
+    material: dict[str, Any] = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "seed": seed,
+    }
+    if extra:
+        material["extra"] = extra
+    canonical = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters and current size of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """SQLite-backed LRU cache of LLM responses."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_entries: int | None = 10_000,
+        max_bytes: int | None = 100 * 1024 * 1024,
+        max_age: float | None = None,  # Seconds; None = never expire
+    ) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached response for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.max_age is not None and now - row[1] > self.max_age:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._evictions += 1
+                row = None
+            if row is None:
+                self._misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._hits += 1
+        value: dict = json.loads(row[0])
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        """Store a response and evict old entries if over budget."""
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least-recently-used ones until within budget."""
+        if self.max_age is not None:
+            cursor = self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (now - self.max_age,)
+            )
+            self._evictions += cursor.rowcount
+
+        count, size = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if (self.max_entries is None or count <= self.max_entries) and (
+            self.max_bytes is None or size <= self.max_bytes
+        ):
+            return
+
+        victims = []
+        for key, entry_size in self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed ASC"
+        ):
+            if (self.max_entries is None or count <= self.max_entries) and (
+                self.max_bytes is None or size <= self.max_bytes
+            ):
+                break
+            victims.append((key,))
+            count -= 1
+            size -= entry_size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self._evictions += len(victims)
+
+    def stats(self) -> CacheStats:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            entries=entries,
+            size_bytes=size,
+        )
+
+    def clear(self) -> None:
+        """Remove every entry (counters are kept)."""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        self._db.close()
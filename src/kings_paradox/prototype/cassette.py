@@ -0,0 +1,110 @@
+"""
+LLM Cassettes.
+
+Record/replay of LLM request/response pairs, so a game session or benchmark
+can be re-run with no network access and no API keys. Replay can reproduce
+the recorded latency or serve responses instantly, which isolates the cost
+of the non-LLM code.
+"""
+
+import json
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Literal
+
+CassetteMode = Literal["record", "replay"]
+ReplayLatency = Literal["recorded", "none"]
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+@dataclass
+class Interaction:
+    """One recorded request/response pair."""
+
+    key: str  # Request hash (see cache.cache_key)
+    model: str
+    response: dict  # Completion.to_dict()
+    latency: float  # Seconds from request to full response
+    ttft: float | None = None  # Seconds to first token, for streamed calls
+    chunks: list[str] = field(default_factory=list)  # Streamed deltas, in order
+
+
+class Cassette:
+    """
+    A file of recorded LLM interactions.
+
+    Args:
+        path: JSONL file, one interaction per line
+        mode: "record" appends new interactions, "replay" serves them back
+        latency: In replay, "recorded" sleeps for the recorded timings, "none" doesn't
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: CassetteMode = "replay",
+        latency: ReplayLatency = "none",
+    ) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        if latency not in ("recorded", "none"):
+            raise ValueError(f"Unknown cassette latency: {latency!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self._tapes: dict[str, deque[Interaction]] = defaultdict(deque)
+
+        if mode == "replay":
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("")
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self) -> None:
+        with open(self.path) as f:
+            for line in f:
+                if line.strip():
+                    interaction = Interaction(**json.loads(line))
+                    self._tapes[interaction.key].append(interaction)
+
+    def play(self, key: str) -> Interaction:
+        """
+        Return the next recorded interaction for a request.
+
+        Repeated identical requests are served in recording order; once a
+        request's recordings run out, the last one is reused.
+        """
+        tape = self._tapes.get(key)
+        if not tape:
+            raise CassetteMissError(f"No recorded LLM interaction for request {key[:12]}")
+        return tape.popleft() if len(tape) > 1 else tape[0]
+
+    def record(self, interaction: Interaction) -> None:
+        """Append an interaction to the cassette file."""
+        self._tapes[interaction.key].append(interaction)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(asdict(interaction)) + "\n")
+
+    def delay(self, interaction: Interaction) -> float:
+        """Return how long a non-streamed replay should take."""
+        return interaction.latency if self.latency == "recorded" else 0.0
+
+    def delays(self, interaction: Interaction) -> tuple[float, float]:
+        """Return (time to first chunk, gap between later chunks) for a replay."""
+        if self.latency == "none":
+            return 0.0, 0.0
+        ttft = interaction.ttft if interaction.ttft is not None else interaction.latency
+        later = max(0, len(interaction.chunks) - 1)
+        gap = (interaction.latency - ttft) / later if later else 0.0
+        return ttft, max(0.0, gap)
+
+    def __len__(self) -> int:
+        return sum(len(tape) for tape in self._tapes.values())
@@ -5,7 +5,8 @@ KP-ydw: Consequence engine (action → state mutation)
 Maps player actions to game state mutations.
 """
 
-from kings_paradox.prototype.state import GameState
+from kings_paradox.prototype.flags import NPCFlag
+from kings_paradox.prototype.state import GameState, StatDelta
 from kings_paradox.prototype.parser import PlayerAction
 
 
@@ -38,7 +39,7 @@ def _handle_threaten(state: GameState, action: PlayerAction) -> None:
     state.update_loyalty(target, -10)
 
     # Set flag
-    state.set_flag(f"{target}_threatened", True)
+    state.set_npc_flag(target, NPCFlag.THREATENED)
 
     # Log event
     state.log_event("threatened", {
@@ -53,9 +54,8 @@ def _handle_dismiss(state: GameState, action: PlayerAction) -> None:
     if target not in state.npcs:
         return
 
-    npc = state.npcs[target]
     # Move NPC to their default location (away from current scene)
-    npc.location = f"{target}_quarters"  # Simple default
+    state.update_npcs({target: StatDelta(location=f"{target}_quarters")})  # Simple default
 
     state.log_event("dismissed", {"target": target})
 
@@ -80,9 +80,8 @@ def _handle_intimidate(state: GameState, action: PlayerAction) -> None:
     if target not in state.npcs:
         return
 
-    npc = state.npcs[target]
     # Increase suspicion (clamped to 0-100)
-    npc.suspicion_of_player = min(100, npc.suspicion_of_player + 15)
+    state.update_npcs({target: StatDelta(suspicion_of_player=15)})
 
     state.log_event("intimidated", {"target": target})
 
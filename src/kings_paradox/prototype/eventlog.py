@@ -0,0 +1,246 @@
+"""
+Event Log.
+
+Compact, append-only storage for the game's event history. Events are held
+in columns rather than as one pydantic model each: days and interned
+event-type / target codes in typed arrays, plus the free-form details.
+Records are read through lightweight __slots__ views; pydantic Event
+objects are only built when something asks for one.
+
+A log can be forked in O(1): the fork shares its parent's events as a
+read-only prefix (the log is append-only, so the prefix never changes)
+and stores only what is appended to it afterwards.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any, overload
+
+from pydantic import BaseModel
+
+
+class Event(BaseModel):
+    """A logged event in the game history."""
+
+    day: int
+    event_type: str
+    details: dict = {}
+
+
+MAX_FORK_DEPTH = 16  # Deeper fork chains are flattened to keep lookups fast
+
+
+class _Interner:
+    """Maps repeated strings to small integer codes."""
+
+    __slots__ = ("codes", "names")
+
+    def __init__(self) -> None:
+        self.codes: dict[str, int] = {}
+        self.names: list[str] = []
+
+    def code(self, name: str) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class EventRecord:
+    """A read-only view of one logged event."""
+
+    __slots__ = ("_log", "index")
+
+    def __init__(self, log: "EventLog", index: int) -> None:
+        self._log = log
+        self.index = index
+
+    @property
+    def day(self) -> int:
+        return int(self._log._column("_days", self.index))
+
+    @property
+    def event_type(self) -> str:
+        return self._log._types.names[int(self._log._column("_type_codes", self.index))]
+
+    @property
+    def target(self) -> str | None:
+        """The details' "target", when it names someone."""
+        code = int(self._log._column("_target_codes", self.index))
+        return self._log._targets.names[code] if code >= 0 else None
+
+    @property
+    def details(self) -> dict:
+        """A copy of the event's details; the logged dict is never handed out."""
+        return dict(self._log._column("_details", self.index))
+
+    def to_event(self) -> Event:
+        return self._log[self.index]
+
+    def __repr__(self) -> str:
+        return f"EventRecord(day={self.day}, event_type={self.event_type!r}, details={self.details!r})"
+
+
+class EventLog(Sequence[Event]):
+    """
+    Append-only event history, stored column-wise.
+
+    Behaves as a read-only sequence of Event (plus append/extend), so code
+    written against the old list[Event] keeps working. Indexing builds a
+    fresh Event; use record()/records() to read without building models.
+    """
+
+    def __init__(self, events: Iterable[Event | dict] = ()) -> None:
+        self._days = array("l")
+        self._type_codes = array("I")
+        self._target_codes = array("l")  # -1: no target
+        self._details: list[dict] = []
+        self._types = _Interner()
+        self._targets = _Interner()
+        self._sorted = True  # Days are non-decreasing, so since() can bisect
+        self._base: EventLog | None = None  # Shared prefix of a forked log
+        self._offset = 0  # Events in the shared prefix
+        self._depth = 0  # Forks between this log and one without a base
+        self.extend(events)
+
+    def fork(self) -> "EventLog":
+        """A log sharing every event so far; appends to either side stay separate."""
+        if self._depth >= MAX_FORK_DEPTH:
+            self._flatten()
+        child = EventLog.__new__(EventLog)
+        child._days = array("l")
+        child._type_codes = array("I")
+        child._target_codes = array("l")
+        child._details = []
+        child._types = self._types  # Interners only grow, so codes stay valid for both
+        child._targets = self._targets
+        child._sorted = self._sorted
+        child._base = self
+        child._offset = len(self)
+        child._depth = self._depth + 1
+        return child
+
+    def _flatten(self) -> None:
+        """Copy the shared prefix into this log's own columns."""
+        base, offset = self._base, self._offset
+        if base is None:
+            return
+        self._days = array("l", (base._column("_days", i) for i in range(offset))) + self._days
+        self._type_codes = array(
+            "I", (base._column("_type_codes", i) for i in range(offset))
+        ) + self._type_codes
+        self._target_codes = array(
+            "l", (base._column("_target_codes", i) for i in range(offset))
+        ) + self._target_codes
+        self._details = [base._column("_details", i) for i in range(offset)] + self._details
+        self._base, self._offset, self._depth = None, 0, 0
+
+    def _column(self, name: str, i: int) -> Any:
+        """Column `name` at event index i, looking through to the shared prefix."""
+        log = self
+        while i < log._offset:
+            assert log._base is not None  # Only a fork has an offset
+            log = log._base
+        return getattr(log, name)[i - log._offset]
+
+    def log(self, day: int, event_type: str, details: dict | None = None) -> None:
+        """Append an event without building an Event model (details are copied)."""
+        details = dict(details) if details is not None else {}
+        if len(self) and day < self._column("_days", len(self) - 1):
+            self._sorted = False
+        self._days.append(day)
+        self._type_codes.append(self._types.code(event_type))
+        target = details.get("target")
+        self._target_codes.append(self._targets.code(target) if isinstance(target, str) else -1)
+        self._details.append(details)
+
+    def append(self, event: Event | dict) -> None:
+        if isinstance(event, dict):
+            event = Event.model_validate(event)
+        self.log(event.day, event.event_type, event.details)
+
+    def extend(self, events: Iterable[Event | dict]) -> None:
+        for event in events:
+            self.append(event)
+
+    def __len__(self) -> int:
+        return self._offset + len(self._days)
+
+    @overload
+    def __getitem__(self, index: int) -> Event: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[Event]: ...
+
+    def __getitem__(self, index: int | slice) -> Event | list[Event]:
+        if isinstance(index, slice):
+            return [self._event(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event index out of range")
+        return self._event(index)
+
+    def __iter__(self) -> Iterator[Event]:
+        return (self._event(i) for i in range(len(self)))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, EventLog):
+            return self.to_list() == other.to_list()
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"EventLog({len(self)} events)"
+
+    def _event(self, i: int) -> Event:
+        return Event.model_construct(
+            day=self._column("_days", i),
+            event_type=self._types.names[self._column("_type_codes", i)],
+            details=dict(self._column("_details", i)),
+        )
+
+    def record(self, index: int) -> EventRecord:
+        if index < 0:
+            index += len(self)
+        return EventRecord(self, index)
+
+    def records(self, start: int = 0) -> Iterator[EventRecord]:
+        """Views of the events from index `start` on."""
+        return (EventRecord(self, i) for i in range(start, len(self)))
+
+    def first_index(self, since_day: int) -> int:
+        """Index of the first event on or after since_day (days must be in order)."""
+        return self._first_index(since_day, len(self))
+
+    def _first_index(self, since_day: int, end: int) -> int:
+        if self._base is not None:
+            i = self._base._first_index(since_day, min(end, self._offset))
+            if i < self._offset:
+                return i
+        return self._offset + bisect_left(self._days, since_day, 0, end - self._offset)
+
+    def since(self, since_day: int) -> list[Event]:
+        """Events from a given day onwards."""
+        if self._sorted:
+            return self[self.first_index(since_day):]
+        return [
+            self._event(i) for i in range(len(self))
+            if self._column("_days", i) >= since_day
+        ]
+
+    @property
+    def event_types(self) -> list[str]:
+        """Distinct event types, in first-seen order."""
+        return list(self._types.names)
+
+    def to_list(self) -> list[dict]:
+        """Plain dicts, as the pre-columnar list[Event] serialized."""
+        return [
+            {"day": self._column("_days", i),
+             "event_type": self._types.names[self._column("_type_codes", i)],
+             "details": dict(self._column("_details", i))}
+            for i in range(len(self))
+        ]
@@ -0,0 +1,129 @@
+"""
+Flag Registry.
+
+Typed storage for game flags. Per-NPC flags (threatened, arrested) are
+kept as one bitset per flag over interned NPC slots, so "was the Duke
+threatened?" is a dict lookup and a bit test, and "who has been
+threatened?" reads a single integer, with no f-string keys built. Other
+flags are plain named booleans.
+
+FlagRegistry is also a MutableMapping[str, bool] over the old key format
+("duke_valerius_threatened", "player_left_scene"), so code and saves using
+the flags dict keep working.
+"""
+
+from collections.abc import Iterator, Mapping, MutableMapping
+from enum import StrEnum
+
+
+class NPCFlag(StrEnum):
+    """Flags kept per NPC."""
+
+    THREATENED = "threatened"
+    ARRESTED = "arrested"
+
+
+_SUFFIXES = {f"_{flag.value}": flag for flag in NPCFlag}
+
+
+class FlagRegistry(MutableMapping[str, bool]):
+    """Per-NPC flag bitsets plus named global flags."""
+
+    def __init__(self, flags: Mapping[str, bool] | None = None) -> None:
+        self._slots: dict[str, int] = {}  # NPC id -> bit
+        self._npc_ids: list[str] = []  # Bit -> NPC id
+        self._set: dict[NPCFlag, int] = {flag: 0 for flag in NPCFlag}  # Bits with a value
+        self._true: dict[NPCFlag, int] = {flag: 0 for flag in NPCFlag}  # Bits set to True
+        self._globals: dict[str, bool] = {}
+        if flags:
+            self.update(flags)
+
+    def copy(self) -> "FlagRegistry":
+        """An independent registry; O(flag kinds), as bitsets are immutable ints."""
+        copy = FlagRegistry.__new__(FlagRegistry)
+        copy._slots = self._slots  # Slots are only ever added, so both can share them
+        copy._npc_ids = self._npc_ids
+        copy._set = dict(self._set)
+        copy._true = dict(self._true)
+        copy._globals = dict(self._globals)
+        return copy
+
+    def _slot(self, npc_id: str) -> int:
+        slot = self._slots.get(npc_id)
+        if slot is None:
+            slot = self._slots[npc_id] = len(self._npc_ids)
+            self._npc_ids.append(npc_id)
+        return slot
+
+    def set_npc(self, npc_id: str, flag: NPCFlag, value: bool = True) -> None:
+        bit = 1 << self._slot(npc_id)
+        self._set[flag] |= bit
+        if value:
+            self._true[flag] |= bit
+        else:
+            self._true[flag] &= ~bit
+
+    def npc(self, npc_id: str, flag: NPCFlag) -> bool:
+        """Whether an NPC has a flag (False if never set)."""
+        slot = self._slots.get(npc_id)
+        return slot is not None and bool(self._true[flag] >> slot & 1)
+
+    def npcs_with(self, flag: NPCFlag) -> list[str]:
+        """Ids of every NPC with a flag set to True."""
+        ids = []
+        bits = self._true[flag]
+        while bits:
+            low = bits & -bits
+            ids.append(self._npc_ids[low.bit_length() - 1])
+            bits ^= low
+        return ids
+
+    # --- dict view over "<npc_id>_<flag>" and global keys ---
+
+    @staticmethod
+    def _split(key: str) -> tuple[str, NPCFlag] | None:
+        for suffix, flag in _SUFFIXES.items():
+            if key.endswith(suffix) and len(key) > len(suffix):
+                return key[:-len(suffix)], flag
+        return None
+
+    def __getitem__(self, key: str) -> bool:
+        split = self._split(key)
+        if split is None:
+            return self._globals[key]
+        npc_id, flag = split
+        slot = self._slots.get(npc_id)
+        if slot is None or not self._set[flag] >> slot & 1:
+            raise KeyError(key)
+        return bool(self._true[flag] >> slot & 1)
+
+    def __setitem__(self, key: str, value: bool) -> None:
+        split = self._split(key)
+        if split is None:
+            self._globals[key] = value
+        else:
+            self.set_npc(*split, value=value)
+
+    def __delitem__(self, key: str) -> None:
+        split = self._split(key)
+        if split is None:
+            del self._globals[key]
+            return
+        self[key]  # KeyError if unset
+        npc_id, flag = split
+        bit = 1 << self._slots[npc_id]
+        self._set[flag] &= ~bit
+        self._true[flag] &= ~bit
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._globals
+        for flag in NPCFlag:
+            for slot, npc_id in enumerate(self._npc_ids):
+                if self._set[flag] >> slot & 1:
+                    yield f"{npc_id}_{flag.value}"
+
+    def __len__(self) -> int:
+        return len(self._globals) + sum(bits.bit_count() for bits in self._set.values())
+
+    def __repr__(self) -> str:
+        return f"FlagRegistry({dict(self)!r})"
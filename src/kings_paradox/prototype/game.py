@@ -5,13 +5,65 @@ KP-eho: Main game loop wiring all components
 The playable game that connects state, scenes, parsing, and consequences.
 """
 
+import argparse
 import asyncio
-from kings_paradox.prototype.state import GameState, NPC
-from kings_paradox.prototype.scene import construct_scene, generate_npc_response
-from kings_paradox.prototype.parser import parse_player_input
+import json
+import sys
+import time
+from collections import Counter
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from rich.console import Console
+from rich.live import Live
+from rich.padding import Padding
+from rich.text import Text
+
+from kings_paradox.prototype import llm, routing, telemetry
+from kings_paradox.prototype.cassette import Cassette, CassetteMode, ReplayLatency
+from kings_paradox.prototype.eventlog import EventLog
+from kings_paradox.prototype.flags import FlagRegistry, NPCFlag
+from kings_paradox.prototype.journal import Journal
+from kings_paradox.prototype.memory import ConversationMemory
+from kings_paradox.prototype.state import NPC, GameState, NPCTable
+from kings_paradox.prototype.scene import (
+    History,
+    ResponseMode,
+    Scene,
+    build_context_packet,
+    construct_scene_async,
+    generate_cast_responses_async,
+    generate_npc_response_async,
+    packet_stats,
+    stream_npc_response,
+    stream_opening,
+)
+from kings_paradox.prototype.parser import PlayerAction, parse_paths, parse_player_input
+from kings_paradox.prototype.policy import policy_stats
+from kings_paradox.prototype.singleflight import flight_stats
 from kings_paradox.prototype.consequences import apply_consequences
 
 
+@dataclass
+class GameOptions:
+    """Runtime options for a play session."""
+
+    stream: bool = True  # Render LLM text token-by-token as it arrives
+    rich_live: bool = False  # Use rich Live rendering instead of plain print
+    cassette: str | None = None  # Record/replay LLM calls to/from this file
+    cassette_mode: CassetteMode = "replay"
+    replay_latency: ReplayLatency = "none"  # "recorded" sleeps like the original calls
+    speculative: bool = False  # Generate the NPC reply while the input is parsed
+    response_mode: ResponseMode = "sequential"  # How a cast answers lines aimed at all of them
+    history_budget: int = 1200  # Tokens of conversation history kept in NPC prompts
+    prefetch: bool = True  # Build every menu option's scene while the player chooses
+    trace: str | None = None  # Write per-turn telemetry spans to this JSONL file
+    save: str | None = None  # Journal the game to this directory and resume from it
+
+
+PROTOTYPE_DAYS = 2
+
+
 def create_initial_state() -> GameState:
     """Create the starting game state."""
     duke = NPC(
@@ -38,9 +90,9 @@ def create_initial_state() -> GameState:
     )
     return GameState(
         day=1,
-        npcs={"duke_valerius": duke, "bishop_erasmus": bishop},
-        events=[],
-        flags={"baron_executed": True},  # Baron was executed before game starts
+        npcs=NPCTable({"duke_valerius": duke, "bishop_erasmus": bishop}),
+        events=EventLog(),
+        flags=FlagRegistry({"baron_executed": True}),  # Baron was executed before game starts
     )
 
 
@@ -64,11 +116,11 @@ def print_day_intro(state: GameState):
 """)
     else:
         # Check for state changes to narrate
-        if state.flags.get("duke_valerius_arrested"):
+        if state.flags.npc("duke_valerius", NPCFlag.ARRESTED):
             print("""  News of Duke Valerius's arrest has spread through the court.
   The nobles are unsettled. Some look at you with fear.
 """)
-        elif state.flags.get("duke_valerius_threatened"):
+        elif state.flags.npc("duke_valerius", NPCFlag.THREATENED):
             print("""  Word has spread that you questioned Duke Valerius harshly.
   The court watches you more carefully now.
 """)
@@ -119,105 +171,470 @@ def print_menu(choices: list[tuple[str, str, str, list[str]]]):
     print()
 
 
-async def run_scene_loop(state: GameState, scene, primary_npc_id: str):
+async def render_stream(chunks: AsyncIterator[str], rich_live: bool = False) -> str:
+    """Render streamed text as it arrives, indented like printed prose. Returns the full text."""
+    if rich_live:
+        return await _render_live(chunks)
+
+    parts = []
+    print("  ", end="", flush=True)
+    async for chunk in chunks:
+        parts.append(chunk)
+        print(chunk.replace("\n", "\n  "), end="", flush=True)
+    print()
+    return "".join(parts)
+
+
+async def _render_live(chunks: AsyncIterator[str]) -> str:
+    """Render streamed text through a rich Live display."""
+    text = Text()
+    with Live(Padding(text, (0, 0, 0, 2)), console=Console(), auto_refresh=False) as live:
+        async for chunk in chunks:
+            text.append(chunk)
+            live.refresh()
+    return text.plain
+
+
+# Actions that end the scene without an NPC reply
+SCENE_ENDING_ACTIONS = {"leave", "arrest", "dismiss"}
+
+# Turns the NPC must remember verbatim however long the scene runs
+PINNED_ACTIONS = {"threaten"}
+
+# How speculative NPC responses were resolved: "used" or "discarded"
+speculation_stats: Counter[str] = Counter()
+
+
+async def _full_response(
+    npc: NPC,
+    player_input: str,
+    context: dict,
+    conversation_history: History,
+) -> AsyncIterator[str]:
+    yield await generate_npc_response_async(npc, player_input, context, conversation_history)
+
+
+def _response_source(
+    npc: NPC,
+    player_input: str,
+    context: dict,
+    conversation_history: History,
+    stream: bool,
+) -> AsyncIterator[str]:
+    """NPC response as chunks - token-by-token when streaming, else one full chunk."""
+    source = stream_npc_response if stream else _full_response
+    return source(npc, player_input, context, conversation_history)
+
+
+async def _show_response(chunks: AsyncIterator[str], options: GameOptions) -> str:
+    """Print an NPC response and return its text."""
+    if options.stream:
+        return await render_stream(chunks, rich_live=options.rich_live)
+    response = "".join([chunk async for chunk in chunks])
+    print(f"  {response}")
+    return response
+
+
+def _response_fingerprint(npc: NPC, context: dict) -> str:
+    """
+    Everything an NPC response prompt depends on besides the input and history.
+
+    Recent events are left out: the only ones a turn adds record the
+    player's own action, which the reply already answers.
+    """
+    relevant = {key: value for key, value in context.items() if key != "recent_events"}
+    return json.dumps([npc.id, npc.name, relevant], sort_keys=True, default=str)
+
+
+def _current_context(scene: Scene, npc: NPC, state: GameState) -> dict:
+    """The NPC's context packet rebuilt from the state as it is now."""
+    context = build_context_packet(npc, state, scene.location)
+    scene.context_packets[npc.id] = context
+    return context
+
+
+class SpeculativeResponse:
+    """
+    An NPC response started before the player's input has been parsed.
+
+    Chunks are buffered in the background. If the parse confirms a
+    non-scene-ending action aimed at the same NPC, and the consequences
+    left its context packet unchanged, the buffer is handed over; otherwise
+    the generation is cancelled.
+    """
+
+    def __init__(
+        self,
+        npc: NPC,
+        player_input: str,
+        context: dict,
+        conversation_history: History,
+        stream: bool,
+    ) -> None:
+        self.fingerprint = _response_fingerprint(npc, context)
+        self._queue: asyncio.Queue[str | None] = asyncio.Queue()
+        source = _response_source(
+            npc, player_input, context, conversation_history, stream
+        )
+        self._task = asyncio.create_task(self._fill(source))
+        # A discarded speculation's error is never awaited; retrieve it here
+        self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def _fill(self, chunks: AsyncIterator[str]) -> None:
+        try:
+            async for chunk in chunks:
+                self._queue.put_nowait(chunk)
+        finally:
+            self._queue.put_nowait(None)
+
+    def matches(self, npc: NPC, context: dict) -> bool:
+        """Whether this speculation is still valid for the actual responder."""
+        return _response_fingerprint(npc, context) == self.fingerprint
+
+    async def claim(self) -> AsyncIterator[str]:
+        """Yield the buffered (and still arriving) chunks."""
+        speculation_stats["used"] += 1
+        while (chunk := await self._queue.get()) is not None:
+            yield chunk
+        await self._task  # Surface any generation error
+
+    def discard(self) -> None:
+        """Cancel the speculative generation."""
+        speculation_stats["discarded"] += 1
+        self._task.cancel()
+
+
+def _cast_voices(scene: Scene, state: GameState, action: PlayerAction) -> list[NPC]:
+    """Cast members who all answer a line aimed at nobody in particular."""
+    if action.target:
+        return []
+    present = (state.get_npc(npc.id) for npc in scene.cast)
+    return [npc for npc in present if npc is not None and npc.status == "free"]
+
+
+async def _cast_replies(
+    scene: Scene,
+    cast: list[NPC],
+    player_input: str,
+    state: GameState,
+    conversation_history: ConversationMemory,
+) -> list[tuple[NPC, str]]:
+    """Print and return every cast member's reply, generated in scene.response_mode."""
+    packets = {npc.id: _current_context(scene, npc, state) for npc in cast}
+    with telemetry.span("cast_response", npcs=len(cast), mode=scene.response_mode):
+        responses = await generate_cast_responses_async(
+            cast, player_input, packets, conversation_history, mode=scene.response_mode
+        )
+    for npc in cast:
+        print(f"\n  {npc.name}:")
+        print(f"  {responses[npc.id]}")
+    return [(npc, responses[npc.id]) for npc in cast]
+
+
+def _apply_consequences(state: GameState, action: PlayerAction) -> None:
+    with telemetry.span("consequences", action=action.action_type):
+        apply_consequences(state, action)
+
+
+async def _timed(chunks: AsyncIterator[str], span: telemetry.Span | None) -> AsyncIterator[str]:
+    """Pass chunks through, noting time-to-first-chunk on the span."""
+    started = time.perf_counter()
+    async for chunk in chunks:
+        if span is not None and "ttft_ms" not in span.attrs:
+            span.set(ttft_ms=(time.perf_counter() - started) * 1000)
+        yield chunk
+
+
+async def _ainput(prompt: str) -> str:
+    """
+    Read a line without blocking the event loop, so background tasks keep running.
+
+    At a terminal the loop waits for stdin itself (add_reader) rather than
+    a worker thread sitting in input(), which would keep Ctrl-C from
+    exiting until the player pressed Enter. Other stdins (pipes, tests)
+    and loops without add_reader (Windows) still read on a worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        fd = sys.stdin.fileno() if sys.stdin.isatty() else -1
+    except (AttributeError, ValueError, OSError):  # Replaced or closed stdin
+        fd = -1
+    if fd < 0:
+        return await asyncio.to_thread(input, prompt)
+    ready: asyncio.Future[None] = loop.create_future()
+
+    def readable() -> None:
+        if not ready.done():
+            ready.set_result(None)
+
+    try:
+        loop.add_reader(fd, readable)
+    except NotImplementedError:
+        return await asyncio.to_thread(input, prompt)
+    try:
+        print(prompt, end="", flush=True)
+        await ready
+    finally:
+        loop.remove_reader(fd)
+    line = sys.stdin.readline()  # A terminal hands over one whole line
+    if not line:
+        raise EOFError
+    return line.rstrip("\n")
+
+
+# "ready" (scene built before the choice), "waited" (choice awaited its build),
+# "cancelled" (built for an option not taken)
+prefetch_stats: Counter[str] = Counter()
+
+
+class ScenePrefetcher:
+    """
+    Scenes for every menu option, built in the background while the menu is shown.
+
+    Each option's context packets and opening are generated as soon as the
+    menu is printed. take() hands over the chosen option's scene (waiting for
+    it if it is still being built) and cancels the rest.
+    """
+
+    def __init__(
+        self,
+        state: GameState,
+        choices: list[tuple[str, str, str, list[str]]],
+        response_mode: ResponseMode = "sequential",
+    ) -> None:
+        self._tasks: dict[int, asyncio.Task[Scene | None]] = {}
+        for i, (_, location, _, required_npcs) in enumerate(choices):
+            if location is None:
+                continue
+            task = asyncio.create_task(construct_scene_async(
+                state, location, required_npcs, response_mode=response_mode
+            ))
+            # An unchosen option's error is never awaited; retrieve it here
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self._tasks[i] = task
+
+    def ready(self, index: int) -> bool:
+        """Whether option `index`'s scene has finished building."""
+        task = self._tasks.get(index)
+        return task is not None and task.done()
+
+    async def take(self, index: int) -> Scene | None:
+        """Return option `index`'s scene and cancel the others."""
+        task = self._tasks.pop(index)
+        self.cancel()
+        prefetch_stats["ready" if task.done() else "waited"] += 1
+        return await task
+
+    def cancel(self) -> None:
+        """Cancel every scene still owned by the prefetcher."""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+            prefetch_stats["cancelled"] += 1
+        self._tasks.clear()
+
+
+async def run_scene_loop(
+    state: GameState,
+    scene,
+    primary_npc_id: str,
+    options: GameOptions | None = None,
+):
     """Run the interactive scene loop."""
-    conversation_history = []
+    options = options or GameOptions()
+    conversation_history = ConversationMemory(budget=options.history_budget)
+    compaction: asyncio.Task | None = None  # Summarizes old turns while the player types
     primary_npc = state.get_npc(primary_npc_id)
 
-    print(f"\n  ─────────────────────────────────────────────────────────────────────")
-    print(f"\n  {scene.opening}")
-    print(f"\n  ─────────────────────────────────────────────────────────────────────")
+    print("\n  ─────────────────────────────────────────────────────────────────────")
+    if scene.opening:
+        print(f"\n  {scene.opening}")
+    else:
+        print()
+        with telemetry.span("opening", location=scene.location) as opening:
+            scene.opening = await render_stream(
+                _timed(
+                    stream_opening(scene.location, scene.cast, state, scene.context_packets),
+                    opening,
+                ),
+                rich_live=options.rich_live,
+            )
+    print("\n  ─────────────────────────────────────────────────────────────────────")
     print(f"  Present: {', '.join(npc.name for npc in scene.cast)}")
-    print(f"  ─────────────────────────────────────────────────────────────────────")
+    print("  ─────────────────────────────────────────────────────────────────────")
 
     while True:
         # Get player input
         print()
-        player_input = input("  > ").strip()
+        player_input = (await _ainput("  > ")).strip()
 
         if not player_input:
             continue
 
-        # Parse player input
-        action = await parse_player_input(
-            player_input,
-            scene_context={"present_npcs": [npc.id for npc in scene.cast]}
-        )
-
-        # Check for scene-ending actions
-        if action.action_type == "leave":
-            apply_consequences(state, action)
-            print("\n  You take your leave.")
-            break
-
-        if action.action_type == "arrest":
-            apply_consequences(state, action)
-            target = state.get_npc(action.target)
-            if target:
-                print(f"\n  The guards seize {target.name}. They are dragged away to the dungeon.")
-            break
-
-        if action.action_type == "dismiss":
-            apply_consequences(state, action)
-            target = state.get_npc(action.target)
-            if target:
-                print(f"\n  {target.name} bows and withdraws from your presence.")
-            break
-
-        # Apply consequences for non-ending actions
-        apply_consequences(state, action)
-
-        # Generate NPC response
-        if primary_npc and action.target:
-            responding_npc = state.get_npc(action.target) or primary_npc
-        else:
-            responding_npc = primary_npc
-
-        if responding_npc:
-            context = scene.context_packets.get(responding_npc.id, {})
-            response = generate_npc_response(
-                responding_npc,
-                player_input,
-                context,
-                conversation_history,
-            )
-            print(f"\n  {responding_npc.name}:")
-            print(f"  {response}")
+        with telemetry.span("turn", npc=primary_npc_id) as turn:
+            # Optionally start the likely NPC response while the input is parsed
+            speculation = None
+            if options.speculative and primary_npc:
+                speculation = SpeculativeResponse(
+                    primary_npc,
+                    player_input,
+                    _current_context(scene, primary_npc, state),
+                    conversation_history,
+                    stream=options.stream,
+                )
+
+            # Parse player input
+            try:
+                with telemetry.span("parse"):
+                    action = await parse_player_input(
+                        player_input,
+                        scene_context={
+                            "present_npcs": [npc.id for npc in scene.cast],
+                            "npc_names": {npc.id: npc.name for npc in scene.cast},
+                        },
+                    )
+            except BaseException:
+                if speculation:
+                    speculation.discard()
+                raise
+
+            if turn:
+                turn.set(action=action.action_type)
+            if speculation and action.action_type in SCENE_ENDING_ACTIONS:
+                speculation.discard()
+
+            # Check for scene-ending actions
+            if action.action_type == "leave":
+                _apply_consequences(state, action)
+                print("\n  You take your leave.")
+                break
 
-            # Track conversation
-            conversation_history.append({
-                "player": player_input,
-                "npc": response,
-            })
+            if action.action_type == "arrest":
+                _apply_consequences(state, action)
+                target = state.get_npc(action.target)
+                if target:
+                    print(f"\n  The guards seize {target.name}. They are dragged away to the dungeon.")
+                break
 
+            if action.action_type == "dismiss":
+                _apply_consequences(state, action)
+                target = state.get_npc(action.target)
+                if target:
+                    print(f"\n  {target.name} bows and withdraws from your presence.")
+                break
 
-async def run_day(state: GameState):
+            # Apply consequences for non-ending actions
+            _apply_consequences(state, action)
+
+            # Generate NPC responses: the whole cast answers a line aimed at
+            # nobody in particular, otherwise the addressee (or primary NPC)
+            replies: list[tuple[NPC, str]] = []
+            voices = _cast_voices(scene, state, action)
+            responding_npc: NPC | None = primary_npc
+            if primary_npc and action.target:
+                responding_npc = state.get_npc(action.target) or primary_npc
+
+            if len(voices) > 1:
+                if speculation:
+                    speculation.discard()
+                replies = await _cast_replies(
+                    scene, voices, player_input, state, conversation_history
+                )
+            elif responding_npc:
+                # Rebuilt, as the consequences may have changed stats and flags
+                context = _current_context(scene, responding_npc, state)
+                print(f"\n  {responding_npc.name}:")
+                claimed = False
+                if speculation and speculation.matches(responding_npc, context):
+                    claimed = True
+                    chunks = speculation.claim()
+                else:
+                    if speculation:
+                        speculation.discard()
+                    chunks = _response_source(
+                        responding_npc,
+                        player_input,
+                        context,
+                        conversation_history,
+                        stream=options.stream,
+                    )
+                with telemetry.span(
+                    "npc_response", npc=responding_npc.id, speculative=claimed
+                ) as reply:
+                    response = await _show_response(_timed(chunks, reply), options)
+                replies = [(responding_npc, response)]
+            elif speculation:
+                speculation.discard()
+
+            # Track conversation; later cast members answer the same King's line
+            for i, (npc, response) in enumerate(replies):
+                conversation_history.append(
+                    player_input if i == 0 else "",
+                    response,
+                    speaker=npc.name,
+                    pinned=action.action_type in PINNED_ACTIONS,
+                )
+            if conversation_history.needs_compaction and (compaction is None or compaction.done()):
+                compaction = asyncio.create_task(conversation_history.compact())
+                # A failed summary leaves the turns pending; the next turn retries
+                compaction.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+
+async def run_day(state: GameState, options: GameOptions | None = None):
     """Run a single day of gameplay."""
+    options = options or GameOptions()
     print_day_intro(state)
 
     choices = get_menu_choices(state)
     print_menu(choices)
+    prefetch = (
+        ScenePrefetcher(state, choices, options.response_mode) if options.prefetch else None
+    )
 
     # Get player choice
-    while True:
-        try:
-            choice_str = input("  > ").strip()
-            choice_idx = int(choice_str) - 1
-            if 0 <= choice_idx < len(choices):
-                break
-            print("  Invalid choice. Try again.")
-        except ValueError:
-            print("  Enter a number.")
+    try:
+        while True:
+            try:
+                choice_str = (await _ainput("  > ")).strip()
+                choice_idx = int(choice_str) - 1
+                if 0 <= choice_idx < len(choices):
+                    break
+                print("  Invalid choice. Try again.")
+            except ValueError:
+                print("  Enter a number.")
+    except BaseException:
+        if prefetch:
+            prefetch.cancel()
+        raise
 
     label, location, intro, required_npcs = choices[choice_idx]
 
     # Handle rest option
     if location is None:
+        if prefetch:
+            prefetch.cancel()
         print("\n  You retire to your chambers. The day passes uneventfully.")
         return
 
     # Construct and run scene
-    scene = construct_scene(state, location, required_npcs)
+    # A prefetched scene is used when it is ready (or when not streaming, where
+    # waiting on it beats starting over). Otherwise the opening is streamed
+    # live by the scene loop.
+    with telemetry.span("scene", location=location) as scene_span:
+        if prefetch and (prefetch.ready(choice_idx) or not options.stream):
+            if scene_span:
+                scene_span.set(prefetched=True)
+            scene = await prefetch.take(choice_idx)
+        else:
+            if prefetch:
+                prefetch.cancel()
+            scene = await construct_scene_async(
+                state,
+                location,
+                required_npcs,
+                with_opening=not options.stream,
+                response_mode=options.response_mode,
+            )
     if scene is None:
         print("\n  [Scene could not be constructed - NPCs unavailable]")
         return
@@ -225,24 +642,44 @@ async def run_day(state: GameState):
     if intro:
         print(f"\n  {intro}")
 
-    await run_scene_loop(state, scene, required_npcs[0] if required_npcs else "")
+    await run_scene_loop(state, scene, required_npcs[0] if required_npcs else "", options)
 
 
-async def main():
+async def main(options: GameOptions | None = None):
     """Main game entry point."""
+    options = options or GameOptions()
+    if options.cassette:
+        llm.set_cassette(Cassette(
+            options.cassette,
+            mode=options.cassette_mode,
+            latency=options.replay_latency,
+        ))
+    if options.trace:
+        telemetry.start_tracing(options.trace)
     print_header()
 
-    state = create_initial_state()
-
-    # Run for 2 days (prototype)
-    for _ in range(2):
-        await run_day(state)
-        state.advance_day()
-
-        # Check win/lose conditions
-        if all(npc.status == "imprisoned" for npc in state.npcs.values()):
-            print("\n  All conspirators have been arrested. The realm is secure... for now.")
-            break
+    journal = Journal(options.save) if options.save else None
+    state = journal.resume() if journal else None
+    if state is not None:
+        print(f"  Resuming your reign on day {state.day}.")
+    else:
+        state = create_initial_state()
+        if journal:
+            journal.start(state)
+
+    try:
+        # Run for 2 days (prototype)
+        while state.day <= PROTOTYPE_DAYS:
+            await run_day(state, options)
+            state.advance_day()
+
+            # Check win/lose conditions
+            if all(npc.status == "imprisoned" for npc in state.npcs.values()):
+                print("\n  All conspirators have been arrested. The realm is secure... for now.")
+                break
+    finally:
+        if journal:
+            journal.close()
 
     print("""
 ╔══════════════════════════════════════════════════════════════════════╗
@@ -250,10 +687,90 @@ async def main():
 ╚══════════════════════════════════════════════════════════════════════╝
 """)
 
+    tracer = telemetry.get_tracer()
+    if tracer is not None:
+        print(tracer.report(session_counters()))
+        print(f"\n  Trace written to {options.trace}")
+        telemetry.stop_tracing()
+
+
+def session_counters() -> dict[str, Counter]:
+    """Pipeline counters for the end-of-session telemetry report."""
+    return {
+        "Routing": routing.routing_stats,
+        "Parse paths": parse_paths,
+        "Call policy": policy_stats,
+        "Single-flight": flight_stats,
+        "Speculation": speculation_stats,
+        "Prefetch": prefetch_stats,
+        "Context packets": packet_stats,
+    }
+
+
+def parse_options(argv: list[str] | None = None) -> GameOptions:
+    """Build GameOptions from command-line arguments."""
+    parser = argparse.ArgumentParser(description="The Crown's Paradox prototype")
+    parser.add_argument("--no-stream", action="store_true", help="Wait for full LLM responses")
+    parser.add_argument("--rich", action="store_true", help="Render streamed text with rich Live")
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="Start the NPC reply while the input is still being parsed",
+    )
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="PATH", help="Record LLM calls to a cassette")
+    cassette.add_argument("--replay", metavar="PATH", help="Replay LLM calls from a cassette")
+    parser.add_argument(
+        "--replay-latency",
+        choices=["recorded", "none"],
+        default="none",
+        help="Reproduce recorded LLM latency when replaying",
+    )
+    parser.add_argument(
+        "--batched-replies",
+        action="store_true",
+        help="Voice every NPC answering the whole court in one structured call",
+    )
+    parser.add_argument(
+        "--no-prefetch",
+        action="store_true",
+        help="Don't build scenes for menu options before one is chosen",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Write per-turn telemetry spans to a JSONL file and print a session report",
+    )
+    parser.add_argument(
+        "--save",
+        metavar="DIR",
+        help="Save the reign to this directory as it is played, resuming it if it exists",
+    )
+    parser.add_argument(
+        "--history-budget",
+        type=int,
+        default=GameOptions.history_budget,
+        help="Tokens of conversation history kept verbatim before older turns are summarized",
+    )
+    args = parser.parse_args(argv)
+    return GameOptions(
+        stream=not args.no_stream,
+        rich_live=args.rich,
+        cassette=args.record or args.replay,
+        cassette_mode="record" if args.record else "replay",
+        replay_latency=args.replay_latency,
+        speculative=args.speculative,
+        response_mode="batched" if args.batched_replies else "sequential",
+        history_budget=args.history_budget,
+        prefetch=not args.no_prefetch,
+        trace=args.trace,
+        save=args.save,
+    )
+
 
 def run():
     """Synchronous entry point."""
-    asyncio.run(main())
+    asyncio.run(main(parse_options()))
 
 
 if __name__ == "__main__":
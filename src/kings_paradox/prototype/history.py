@@ -0,0 +1,130 @@
+"""
+State History.
+
+Event-sourced record of a GameState. Once a state is attached, every
+mutation (the same ops the save journal writes) is kept as an event in a
+columnar EventLog, and every `checkpoint_every` days the state is forked
+into a checkpoint. Any past day is rebuilt by forking the nearest
+checkpoint and replaying the mutations since through the normal GameState
+paths, so the NPC table, its location index and the flag bitsets are
+maintained incrementally rather than rebuilt.
+
+    history = History()
+    state = history.start(create_initial_state())
+    ...
+    yesterday = history.state_at(state.day - 1)
+
+Checkpoints are forks, so they cost O(NPCs) rather than a full copy of
+the event history.
+"""
+
+import copy
+from typing import Any, NamedTuple
+
+from kings_paradox.prototype.eventlog import EventLog
+from kings_paradox.prototype.journal import apply_entry
+from kings_paradox.prototype.state import GameState
+
+
+class Checkpoint(NamedTuple):
+    """A frozen fork of the state, taken before mutation `start`."""
+
+    day: int
+    start: int
+    state: GameState
+
+
+class History:
+    """
+    Mutation events plus periodic checkpoints for one GameState.
+
+    Args:
+        checkpoint_every: Days between checkpoints; bounds the replay per query
+    """
+
+    def __init__(self, checkpoint_every: int = 5) -> None:
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1")
+        self.checkpoint_every = checkpoint_every
+        self.mutations = EventLog()  # event_type: op, details: its arguments
+        self._checkpoints: list[Checkpoint] = []
+        self._state: GameState | None = None
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> None:
+        return None  # A copied state has no history
+
+    @property
+    def checkpoints(self) -> list[tuple[int, int]]:
+        """(day, mutation index) of every checkpoint."""
+        return [(c.day, c.start) for c in self._checkpoints]
+
+    def start(self, state: GameState) -> GameState:
+        """Begin recording a state from its current contents."""
+        if self._state is not None and self._state is not state:
+            self._state._history = None
+        self._state = state
+        state._history = self
+        self._checkpoint()
+        return state
+
+    def stop(self) -> None:
+        """Stop recording; past days stay queryable."""
+        if self._state is not None:
+            self._state._history = None
+            self._state = None
+
+    def record(self, op: str, args: dict) -> None:
+        """Keep one mutation; called by the attached GameState."""
+        state = self._attached()
+        self.mutations.log(state.day, op, args)
+        if op == "day" and state.day - self._checkpoints[-1].day >= self.checkpoint_every:
+            self._checkpoint()
+
+    def rebase(self) -> None:
+        """
+        Checkpoint after the state was replaced wholesale (or undone).
+
+        Checkpoints for days after the state's new day belonged to the
+        abandoned timeline, so they are dropped.
+        """
+        day = self._attached().day
+        while self._checkpoints and self._checkpoints[-1].day > day:
+            self._checkpoints.pop()
+        self._checkpoint()
+
+    def state_at(self, day: int) -> GameState:
+        """
+        The state as it stood at the end of a past day.
+
+        The result is a detached fork: changing it doesn't affect the
+        live state or the history.
+
+        Raises:
+            ValueError: The day is before recording started
+        """
+        base = next((c for c in reversed(self._checkpoints) if c.day <= day), None)
+        if base is None:
+            raise ValueError(f"No history before day {self._checkpoints[0].day}")
+        state = base.state.fork()
+        for record in self.mutations.records(base.start):
+            if record.event_type == "day" and record.details["value"] > day:
+                break
+            apply_entry(state, {"op": record.event_type, **copy.deepcopy(record.details)})
+        return state
+
+    def changes_on(self, day: int) -> list[tuple[str, dict]]:
+        """(op, arguments) of every mutation made on a day, in order."""
+        return [
+            (record.event_type, record.details)
+            for record in self.mutations.records()
+            if record.day == day
+        ]
+
+    def _attached(self) -> GameState:
+        if self._state is None:
+            raise RuntimeError("No state attached to the history")
+        return self._state
+
+    def _checkpoint(self) -> None:
+        state = self._attached()
+        self._checkpoints.append(Checkpoint(state.day, len(self.mutations), state.fork()))
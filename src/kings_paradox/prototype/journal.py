@@ -0,0 +1,168 @@
+"""
+Save Journal.
+
+Write-ahead persistence for GameState. Once a state is attached to a
+journal, every mutation (NPC field writes, flags, events, day changes) is
+appended to journal.jsonl as it happens, so a crash loses at most the
+mutation being written. Every `snapshot_every` entries the state is
+compacted into snapshot.json and the journal restarts, which bounds the
+replay needed to resume.
+
+    journal = Journal("saves/reign1")
+    state = journal.resume() or journal.start(create_initial_state())
+"""
+
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, TextIO
+
+from kings_paradox.prototype.state import NPC, GameState
+
+SNAPSHOT = "snapshot.json"
+JOURNAL = "journal.jsonl"
+
+
+class Journal:
+    """
+    A save directory holding a snapshot and the journal of mutations since.
+
+    Args:
+        directory: Save directory (created if missing)
+        snapshot_every: Journal entries between compacted snapshots
+        fsync: Sync every entry to disk (survives power loss, not just crashes)
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        snapshot_every: int = 500,
+        fsync: bool = False,
+    ) -> None:
+        self.directory = Path(directory)
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.seq = 0  # Sequence number of the last entry written
+        self._snapshot_seq = 0  # Last entry folded into the snapshot
+        self._state: GameState | None = None
+        self._file: TextIO | None = None
+        self._torn = False
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> None:
+        return None  # A copied state isn't journaled
+
+    @property
+    def exists(self) -> bool:
+        return (self.directory / SNAPSHOT).exists()
+
+    @property
+    def pending(self) -> int:
+        """Entries written since the last snapshot."""
+        return self.seq - self._snapshot_seq
+
+    def start(self, state: GameState) -> GameState:
+        """Begin journaling a new state, replacing any existing save."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._attach(state)
+        self.snapshot()
+        return state
+
+    def resume(self) -> GameState | None:
+        """Load the saved state (snapshot plus journal replay) and keep journaling it."""
+        if not self.exists:
+            return None
+        saved = json.loads((self.directory / SNAPSHOT).read_text())
+        state = GameState.model_validate(saved["state"])
+        self.seq = self._snapshot_seq = saved["seq"]
+        for entry in self._entries():
+            if entry["seq"] <= self.seq:
+                continue  # Already in the snapshot (crash between snapshot and truncate)
+            apply_entry(state, entry)
+            self.seq = entry["seq"]
+        self._attach(state)
+        if self._torn or self.pending >= self.snapshot_every:
+            self.snapshot()  # Don't append after a torn line
+        return state
+
+    def record(self, op: str, args: dict) -> None:
+        """Append one mutation; called by the attached GameState."""
+        file = self._file
+        if file is None:
+            raise RuntimeError("No state attached to the journal")
+        self.seq += 1
+        line = json.dumps({"seq": self.seq, "op": op, **args}, default=str)
+        file.write(line + "\n")
+        file.flush()
+        if self.fsync:
+            os.fsync(file.fileno())
+        if self.pending >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """Compact the attached state into a snapshot and restart the journal."""
+        state = self._state
+        if state is None:
+            raise RuntimeError("No state attached to the journal")
+        data = {"seq": self.seq, "state": state.model_dump(mode="json")}
+        tmp = self.directory / (SNAPSHOT + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.directory / SNAPSHOT)
+        self._snapshot_seq = self.seq
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.directory / JOURNAL, "w")
+
+    def close(self) -> None:
+        """Stop journaling; the save stays resumable."""
+        if self._state is not None:
+            self._state._journal = None
+            self._state = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _attach(self, state: GameState) -> None:
+        if self._state is not None and self._state is not state:
+            self._state._journal = None
+        self._state = state
+        state._journal = self
+        if self._file is None:
+            self._file = open(self.directory / JOURNAL, "a")
+
+    def _entries(self) -> Iterator[dict]:
+        path = self.directory / JOURNAL
+        if not path.exists():
+            return
+        with open(path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    self._torn = True  # Final write cut short by a crash
+                    return
+
+
+def apply_entry(state: GameState, entry: dict) -> None:
+    """Replay one journal entry onto a (detached) state."""
+    op = entry["op"]
+    if op == "npc_set":
+        setattr(state.npcs[entry["npc_id"]], entry["field"], entry["value"])
+    elif op == "npc_batch":
+        for npc_id, field, value in entry["changes"]:
+            setattr(state.npcs[npc_id], field, value)
+    elif op == "npc_put":
+        state.npcs[entry["npc_id"]] = NPC.model_validate(entry["npc"])
+    elif op == "npc_del":
+        del state.npcs[entry["npc_id"]]
+    elif op == "flag":
+        state.flags[entry["name"]] = entry["value"]
+    elif op == "event":
+        state.events.log(entry["day"], entry["event_type"], entry["details"])
+    elif op == "day":
+        state.day = entry["value"]
+    else:
+        raise ValueError(f"Unknown journal op: {op!r}")
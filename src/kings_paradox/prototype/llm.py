@@ -0,0 +1,780 @@
+"""
+LLM Gateway.
+
+Process-wide LLM clients shared by the parser, scene constructor and scripts.
+Keeps one client per provider base URL, backed by a keep-alive connection
+pool, so a turn reuses warm connections instead of paying a fresh TLS
+handshake on every call.
+
+complete / acomplete / astream are the single entry point for chat
+completions; they consult the optional on-disk response cache and the
+record/replay cassette. Network calls run under a CallPolicy (timeouts,
+retries, hedging) behind a per-provider circuit breaker. cached_prompt lays
+prompts out as a stable prefix plus a volatile tail so provider-side prompt
+caching can reuse the prefix. Identical requests already in flight are
+coalesced into one upstream call (see singleflight).
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass, replace
+from typing import Any, cast
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, OpenAI
+from pydantic import BaseModel
+
+from kings_paradox.prototype import telemetry
+from kings_paradox.prototype.cache import ResponseCache, cache_key
+from kings_paradox.prototype.cassette import Cassette, CassetteMode, Interaction, ReplayLatency
+from kings_paradox.prototype.policy import (
+    CallPolicy,
+    CircuitBreaker,
+    LatencyTracker,
+    LLMUnavailableError,
+    acall,
+    call,
+)
+from kings_paradox.prototype.singleflight import AsyncSingleFlight, SingleFlight
+
+load_dotenv()
+
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Provider name -> (base_url, API key environment variable)
+PROVIDERS = {
+    "openrouter": (OPENROUTER_BASE_URL, "OPENROUTER_API_KEY"),
+    "openai": ("https://api.openai.com/v1", "OPENAI_API_KEY"),
+}
+
+DEFAULT_PROVIDER = "openrouter"
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Connection pool settings applied to every gateway client."""
+
+    max_connections: int = 20  # Hard cap on concurrent requests per client
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0  # Seconds an idle connection stays open
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        """Build a config from LLM_MAX_CONNECTIONS / LLM_MAX_KEEPALIVE / LLM_KEEPALIVE_EXPIRY."""
+        defaults = cls()
+        return cls(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", defaults.max_connections)),
+            max_keepalive_connections=int(
+                os.getenv("LLM_MAX_KEEPALIVE", defaults.max_keepalive_connections)
+            ),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", defaults.keepalive_expiry)),
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+_config = PoolConfig.from_env()
+_lock = threading.Lock()
+_clients: dict[str, OpenAI] = {}
+# Async connection pools are bound to the event loop that opened them,
+# so async clients are cached per running loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _resolve(provider: str) -> tuple[str, str | None]:
+    """
+    Return (base_url, api_key) for a provider name.
+
+    <PROVIDER>_BASE_URL (e.g. OPENROUTER_BASE_URL) overrides the base URL,
+    which is how the game and scripts are pointed at the mock server.
+    """
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {provider!r}")
+    base_url, key_env = PROVIDERS[provider]
+    return os.getenv(f"{provider.upper()}_BASE_URL", base_url), os.getenv(key_env)
+
+
+def _timeout() -> httpx.Timeout:
+    # No pool timeout: when every connection is busy, callers queue rather than fail.
+    return httpx.Timeout(600.0, connect=10.0, pool=None)
+
+
+def get_client(provider: str = DEFAULT_PROVIDER) -> OpenAI:
+    """Get the shared synchronous client for a provider."""
+    with _lock:
+        client = _clients.get(provider)
+        if client is None:
+            base_url, api_key = _resolve(provider)
+            client = OpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                max_retries=0,  # Retries are the call policy's job
+                http_client=httpx.Client(limits=_config.limits(), timeout=_timeout()),
+            )
+            _clients[provider] = client
+        return client
+
+
+def get_async_client(provider: str = DEFAULT_PROVIDER) -> AsyncOpenAI:
+    """Get the shared async client for a provider on the running event loop."""
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(provider)
+    if client is None:
+        base_url, api_key = _resolve(provider)
+        client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            max_retries=0,  # Retries are the call policy's job
+            http_client=httpx.AsyncClient(limits=_config.limits(), timeout=_timeout()),
+        )
+        clients[provider] = client
+    return client
+
+
+def get_pool_config() -> PoolConfig:
+    """Return the pool settings new clients are built with."""
+    return _config
+
+
+def configure(config: PoolConfig) -> None:
+    """Replace the pool settings. Existing clients are closed and rebuilt lazily."""
+    global _config
+    with _lock:
+        _config = config
+        _close_sync_clients()
+    _close_async_clients()
+
+
+def register_provider(name: str, base_url: str, api_key_env: str) -> None:
+    """Register (or repoint) a provider; any cached client for it is dropped."""
+    with _lock:
+        PROVIDERS[name] = (base_url, api_key_env)
+        client = _clients.pop(name, None)
+        if client is not None:
+            client.close()
+    _close_async_clients(name)
+
+
+def close_clients() -> None:
+    """Close every cached client."""
+    with _lock:
+        _close_sync_clients()
+    _close_async_clients()
+
+
+def _close_sync_clients() -> None:
+    for client in _clients.values():
+        client.close()
+    _clients.clear()
+
+
+# Closes scheduled on the running loop, kept referenced until they finish
+_closing: set[asyncio.Task[None]] = set()
+
+
+def _close_async_clients(provider: str | None = None) -> None:
+    """
+    Drop cached async clients (one provider's, or all) and close them.
+
+    A client is closed on the loop that opened it: as a task when that is
+    the running loop, thread-safely when it runs elsewhere, and directly
+    when it is idle. Clients of closed loops went with their connections.
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    for loop, clients in list(_async_clients.items()):
+        names = [provider] if provider is not None else list(clients)
+        for name in names:
+            client = clients.pop(name, None)
+            if client is None or loop.is_closed():
+                continue
+            if loop is running:
+                task = loop.create_task(client.close())
+                _closing.add(task)
+                task.add_done_callback(_closing.discard)
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.close(), loop)
+            else:
+                loop.run_until_complete(client.close())
+
+
+# === Chat completions ===
+
+
+@dataclass
+class Completion:
+    """The result of a chat completion call."""
+
+    text: str
+    model: str
+    reasoning: str = ""  # Reasoning trace, for models that return one
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0  # Prompt tokens the provider served from its prompt cache
+    cached: bool = False  # Served from the response cache
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data["cached"]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, cached: bool = False) -> "Completion":
+        return cls(**data, cached=cached)
+
+
+@dataclass
+class UsageStats:
+    """Token usage summed over every network completion in this process."""
+
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def cached_rate(self) -> float:
+        """Fraction of prompt tokens served from the provider's prompt cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def add(self, completion: Completion) -> None:
+        self.calls += 1
+        self.prompt_tokens += completion.prompt_tokens
+        self.cached_tokens += completion.cached_tokens
+        self.completion_tokens += completion.completion_tokens
+
+    def reset(self) -> None:
+        self.calls = self.prompt_tokens = self.cached_tokens = self.completion_tokens = 0
+
+
+usage = UsageStats()
+
+
+def get_usage() -> UsageStats:
+    """Return the process-wide token usage totals."""
+    return usage
+
+
+# === Prompt layout ===
+
+# Anthropic accepts at most four cache_control breakpoints per request
+MAX_CACHE_BREAKPOINTS = 4
+
+
+def supports_cache_control(model: str) -> bool:
+    """Whether a model needs explicit cache_control breakpoints (Anthropic models)."""
+    return model.startswith(("anthropic/", "claude"))
+
+
+def cached_prompt(system: list[str], user: str, model: str) -> list[dict]:
+    """
+    Lay out a prompt as a cacheable system prefix followed by a volatile tail.
+
+    Providers cache prompts by exact prefix, so `system` segments should run
+    from most widely shared (game rules) to least (one character's identity),
+    with everything that changes turn to turn left in `user`. OpenAI-style
+    providers cache such prefixes automatically; for Anthropic models each
+    segment boundary also gets a cache_control breakpoint.
+    """
+    segments = [segment for segment in system if segment]
+    if not segments:
+        return [{"role": "user", "content": user}]
+    if not supports_cache_control(model):
+        return [
+            {"role": "system", "content": "\n\n".join(segments)},
+            {"role": "user", "content": user},
+        ]
+    first_breakpoint = len(segments) - MAX_CACHE_BREAKPOINTS
+    parts = []
+    for i, segment in enumerate(segments):
+        part: dict[str, Any] = {"type": "text", "text": segment}
+        if i >= first_breakpoint:
+            part["cache_control"] = {"type": "ephemeral"}
+        parts.append(part)
+    return [
+        {"role": "system", "content": parts},
+        {"role": "user", "content": user},
+    ]
+
+
+_cache: ResponseCache | None = (
+    ResponseCache(os.environ["LLM_CACHE_PATH"]) if os.getenv("LLM_CACHE_PATH") else None
+)
+_cassette: Cassette | None = (
+    Cassette(
+        os.environ["LLM_CASSETTE"],
+        # Checked by Cassette
+        mode=cast(CassetteMode, os.getenv("LLM_CASSETTE_MODE", "replay")),
+        latency=cast(ReplayLatency, os.getenv("LLM_CASSETTE_LATENCY", "none")),
+    )
+    if os.getenv("LLM_CASSETTE")
+    else None
+)
+
+
+# In-flight requests by key; async waiters can only share a task on its own loop
+_flights = SingleFlight()
+_async_flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncSingleFlight]" = (
+    weakref.WeakKeyDictionary()
+)
+
+_policy = CallPolicy.from_env()
+_breakers: dict[str, CircuitBreaker] = {}
+_latencies: dict[tuple[str, str], LatencyTracker] = {}
+
+
+def get_policy() -> CallPolicy:
+    """Return the default policy for calls that don't pass one."""
+    return _policy
+
+
+def set_policy(policy: CallPolicy) -> None:
+    """Replace the default call policy."""
+    global _policy
+    _policy = policy
+
+
+def get_breaker(provider: str = DEFAULT_PROVIDER) -> CircuitBreaker:
+    """Return the circuit breaker guarding a provider."""
+    with _lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = _breakers[provider] = CircuitBreaker.from_env()
+        return breaker
+
+
+def _latency(provider: str, model: str) -> LatencyTracker:
+    with _lock:
+        tracker = _latencies.get((provider, model))
+        if tracker is None:
+            tracker = _latencies[(provider, model)] = LatencyTracker()
+        return tracker
+
+
+def get_cache() -> ResponseCache | None:
+    """Return the active response cache, if any."""
+    return _cache
+
+
+def set_cache(cache: ResponseCache | None) -> None:
+    """Install (or with None, disable) the process-wide response cache."""
+    global _cache
+    _cache = cache
+
+
+def get_cassette() -> Cassette | None:
+    """Return the active cassette, if any."""
+    return _cassette
+
+
+def set_cassette(cassette: Cassette | None) -> None:
+    """
+    Install (or with None, remove) the process-wide cassette.
+
+    While a replaying cassette is installed no client is created and no
+    network request is made; unrecorded requests raise CassetteMissError.
+    """
+    global _cassette
+    _cassette = cassette
+
+
+# === Structured output ===
+
+# JSON-schema keywords strict structured output rejects
+_UNSUPPORTED_SCHEMA_KEYWORDS = {"default", "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"}
+
+
+def structured_output(model: type[BaseModel], name: str | None = None) -> dict:
+    """
+    Build a strict json_schema response_format from a pydantic model.
+
+    Every object gets all its properties required and no additional ones,
+    as strict mode demands; defaults still apply when validating answers
+    from providers that ignore the schema.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name or model.__name__,
+            "strict": True,
+            "schema": _strict_schema(model.model_json_schema()),
+        },
+    }
+
+
+def _strict_schema(node: Any) -> Any:
+    if isinstance(node, list):
+        return [_strict_schema(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+    strict: dict[str, Any] = {}
+    for key, value in node.items():
+        if key in _UNSUPPORTED_SCHEMA_KEYWORDS:
+            continue
+        if key in ("properties", "$defs"):  # Keys here are names, not keywords
+            strict[key] = {name: _strict_schema(sub) for name, sub in value.items()}
+        else:
+            strict[key] = _strict_schema(value)
+    if strict.get("type") == "object" and "properties" in strict:
+        strict["required"] = list(strict["properties"])
+        strict["additionalProperties"] = False
+    return strict
+
+
+def _request(
+    messages: list[dict],
+    model: str,
+    temperature: float | None,
+    max_tokens: int | None,
+    seed: int | None,
+    extra: dict,
+) -> dict:
+    """Build chat.completions.create kwargs, omitting unset parameters."""
+    kwargs: dict = {"model": model, "messages": messages, **extra}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+    if seed is not None:
+        kwargs["seed"] = seed
+    return kwargs
+
+
+def _cached_tokens(usage: Any) -> int:
+    details = getattr(usage, "prompt_tokens_details", None)
+    return int(getattr(details, "cached_tokens", None) or 0)
+
+
+def _from_response(response: Any, model: str) -> Completion:
+    message = response.choices[0].message
+    response_usage = response.usage
+    return Completion(
+        text=message.content or "",
+        model=response.model or model,
+        reasoning=getattr(message, "reasoning", None) or "",
+        prompt_tokens=response_usage.prompt_tokens if response_usage else 0,
+        completion_tokens=response_usage.completion_tokens if response_usage else 0,
+        cached_tokens=_cached_tokens(response_usage),
+    )
+
+
+def _request_key(request: dict) -> str:
+    """Hash a create() request; shared by the cache and cassettes."""
+    extra = {
+        k: v for k, v in request.items()
+        if k not in ("model", "messages", "temperature", "max_tokens", "seed")
+    }
+    return cache_key(
+        request["model"],
+        request["messages"],
+        request.get("temperature"),
+        request.get("max_tokens"),
+        request.get("seed"),
+        extra,
+    )
+
+
+def _cache_lookup(key: str, use_cache: bool) -> Completion | None:
+    if _cache is None or not use_cache:
+        return None
+    hit = _cache.get(key)
+    return Completion.from_dict(hit, cached=True) if hit is not None else None
+
+
+def _cache_store(key: str, use_cache: bool, completion: Completion) -> None:
+    if _cache is not None and use_cache:
+        _cache.put(key, completion.to_dict())
+
+
+def _async_flight() -> AsyncSingleFlight:
+    loop = asyncio.get_running_loop()
+    flight = _async_flights.get(loop)
+    if flight is None:
+        flight = _async_flights[loop] = AsyncSingleFlight()
+    return flight
+
+
+def _trace(
+    completion: Completion,
+    latency: float,
+    ttft: float | None = None,
+    replayed: bool = False,
+    coalesced: bool = False,
+) -> None:
+    telemetry.record_llm(
+        completion.model,
+        latency,
+        prompt_tokens=completion.prompt_tokens,
+        completion_tokens=completion.completion_tokens,
+        cached_tokens=completion.cached_tokens,
+        ttft=ttft,
+        cached=completion.cached,
+        replayed=replayed,
+        coalesced=coalesced,
+    )
+
+
+def _record(
+    key: str,
+    completion: Completion,
+    latency: float,
+    ttft: float | None = None,
+    chunks: list[str] | None = None,
+    coalesced: bool = False,
+) -> None:
+    """
+    Report a finished call to telemetry and, when recording, to the active cassette.
+
+    A coalesced call shared another caller's upstream request, which that
+    caller reports; it is traced at no cost and not recorded again.
+    """
+    _trace(completion, latency, ttft, coalesced=coalesced)
+    if coalesced:
+        return
+    if _cassette is not None and not _cassette.replaying:
+        _cassette.record(Interaction(
+            key=key,
+            model=completion.model,
+            response=completion.to_dict(),
+            latency=latency,
+            ttft=ttft,
+            chunks=chunks or [],
+        ))
+
+
+def complete(
+    messages: list[dict],
+    *,
+    model: str,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    seed: int | None = None,
+    provider: str = DEFAULT_PROVIDER,
+    use_cache: bool = True,
+    policy: CallPolicy | None = None,
+    **extra: Any,
+) -> Completion:
+    """
+    Run a chat completion on the shared client.
+
+    Args:
+        messages: Chat messages
+        model: Model name
+        temperature, max_tokens, seed: Sampling parameters (omitted when None)
+        provider: Gateway provider to send the request to
+        use_cache: Set False to bypass the response cache for this call, and
+            to make a fresh request rather than share an identical one in flight
+        policy: Timeouts and retries for this call (default: get_policy())
+        **extra: Passed through to chat.completions.create
+
+    Returns:
+        Completion with the response text and token usage
+
+    Raises:
+        LLMUnavailableError: The provider didn't answer within the policy
+    """
+    request = _request(messages, model, temperature, max_tokens, seed, extra)
+    key = _request_key(request)
+    if _cassette is not None and _cassette.replaying:
+        interaction = _cassette.play(key)
+        delay = _cassette.delay(interaction)
+        time.sleep(delay)
+        replayed = Completion.from_dict(interaction.response)
+        _trace(replayed, delay, replayed=True)
+        return replayed
+
+    start = time.perf_counter()
+    completion = _cache_lookup(key, use_cache)
+    led = False  # Whether this caller made the upstream request
+    if completion is None:
+        def fetch() -> Completion:
+            nonlocal led
+            led = True
+            client = get_client(provider)
+            response = call(
+                lambda timeout: client.chat.completions.create(**request, timeout=timeout),
+                policy or _policy,
+                get_breaker(provider),
+                _latency(provider, model),
+                name=f"{provider}:{model}",
+            )
+            fetched = _from_response(response, model)
+            usage.add(fetched)
+            _cache_store(key, use_cache, fetched)
+            return fetched
+
+        # Each caller gets its own copy of a shared answer
+        completion = replace(_flights.do(f"{provider}:{key}", fetch)) if use_cache else fetch()
+    _record(key, completion, time.perf_counter() - start, coalesced=not (completion.cached or led))
+    return completion
+
+
+async def acomplete(
+    messages: list[dict],
+    *,
+    model: str,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    seed: int | None = None,
+    provider: str = DEFAULT_PROVIDER,
+    use_cache: bool = True,
+    policy: CallPolicy | None = None,
+    **extra: Any,
+) -> Completion:
+    """Async version of complete."""
+    request = _request(messages, model, temperature, max_tokens, seed, extra)
+    key = _request_key(request)
+    if _cassette is not None and _cassette.replaying:
+        interaction = _cassette.play(key)
+        delay = _cassette.delay(interaction)
+        await asyncio.sleep(delay)
+        replayed = Completion.from_dict(interaction.response)
+        _trace(replayed, delay, replayed=True)
+        return replayed
+
+    start = time.perf_counter()
+    completion = _cache_lookup(key, use_cache)
+    led = False  # Whether this caller made the upstream request
+    if completion is None:
+        async def fetch() -> Completion:
+            nonlocal led
+            led = True
+            client = get_async_client(provider)
+            response = await acall(
+                lambda: client.chat.completions.create(**request),
+                policy or _policy,
+                get_breaker(provider),
+                _latency(provider, model),
+                name=f"{provider}:{model}",
+            )
+            fetched = _from_response(response, model)
+            usage.add(fetched)
+            _cache_store(key, use_cache, fetched)
+            return fetched
+
+        if use_cache:
+            completion = replace(await _async_flight().do(f"{provider}:{key}", fetch))
+        else:
+            completion = await fetch()
+    _record(key, completion, time.perf_counter() - start, coalesced=not (completion.cached or led))
+    return completion
+
+
+async def astream(
+    messages: list[dict],
+    *,
+    model: str,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    seed: int | None = None,
+    provider: str = DEFAULT_PROVIDER,
+    use_cache: bool = True,
+    policy: CallPolicy | None = None,
+    **extra: Any,
+) -> AsyncIterator[str]:
+    """
+    Stream completion text deltas as they arrive.
+
+    A cache hit is yielded as a single chunk; a fully consumed stream is
+    written back to the cache. The policy covers opening the stream and
+    receiving the first chunk (retrying and hedging as needed); after that,
+    each chunk must arrive within the policy timeout or LLMUnavailableError
+    is raised mid-stream.
+    """
+    request = _request(messages, model, temperature, max_tokens, seed, extra)
+    key = _request_key(request)
+    if _cassette is not None and _cassette.replaying:
+        interaction = _cassette.play(key)
+        first_delay, gap = _cassette.delays(interaction)
+        recorded = interaction.chunks or [interaction.response["text"]]
+        start = time.perf_counter()
+        for i, text in enumerate(recorded):
+            await asyncio.sleep(first_delay if i == 0 else gap)
+            yield text
+        _trace(
+            Completion.from_dict(interaction.response),
+            time.perf_counter() - start,
+            ttft=first_delay,
+            replayed=True,
+        )
+        return
+
+    start = time.perf_counter()
+    hit = _cache_lookup(key, use_cache)
+    if hit is not None:
+        yield hit.text
+        _record(key, hit, time.perf_counter() - start)
+        return
+
+    policy = policy or _policy
+    client = get_async_client(provider)
+
+    async def open_stream() -> tuple[Any, AsyncIterator[Any], Any]:
+        stream = await client.chat.completions.create(
+            **request, stream=True, stream_options={"include_usage": True}
+        )
+        chunks = aiter(stream)
+        first = await anext(chunks, None)
+        return stream, chunks, first
+
+    stream, chunks, chunk = await acall(
+        open_stream,
+        policy,
+        get_breaker(provider),
+        _latency(provider, model),
+        name=f"{provider}:{model}",
+        discard=lambda opened: _close_stream(opened[0]),
+    )
+    parts = []
+    ttft: float | None = None
+    stream_usage = None
+    try:
+        while chunk is not None:
+            if chunk.usage is not None:  # Final chunk, sent because of include_usage
+                stream_usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            try:
+                chunk = await asyncio.wait_for(anext(chunks, None), policy.timeout)
+            except TimeoutError as exc:
+                raise LLMUnavailableError(f"{provider}:{model}: stream stalled") from exc
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            await close()
+    completion = Completion(
+        text="".join(parts),
+        model=model,
+        prompt_tokens=stream_usage.prompt_tokens if stream_usage else 0,
+        completion_tokens=stream_usage.completion_tokens if stream_usage else 0,
+        cached_tokens=_cached_tokens(stream_usage),
+    )
+    usage.add(completion)
+    _cache_store(key, use_cache, completion)
+    _record(key, completion, time.perf_counter() - start, ttft=ttft, chunks=parts)
+
+
+def _close_stream(stream: Any) -> None:
+    """Close the connection of a hedged stream that lost the race."""
+    close = getattr(stream, "close", None)
+    if close is not None:
+        asyncio.ensure_future(close())
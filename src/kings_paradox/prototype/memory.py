@@ -0,0 +1,191 @@
+"""
+Conversation Memory.
+
+Bounded per-scene conversation history for NPC prompts. The most recent
+turns are kept verbatim within a token budget; older turns are folded into
+a rolling summary one batch at a time, so each turn is summarized once and
+the summary is never recomputed. Pinned turns (threats, promises) are
+never dropped from the verbatim history.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from kings_paradox.prototype import routing
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) - good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class Turn:
+    """One exchange: the King's line and the reply."""
+
+    player: str  # "" when another cast member answers the previous turn's line
+    npc: str
+    speaker: str = ""  # Who replied; "" = the NPC the prompt is for
+    pinned: bool = False  # Never summarized away
+    _lines: dict[str, str] = field(default_factory=dict, repr=False, compare=False)
+
+    def render(self, default_speaker: str) -> str:
+        """Render the turn as prompt lines (cached per speaker name)."""
+        speaker = self.speaker or default_speaker
+        lines = self._lines.get(speaker)
+        if lines is None:
+            lines = f"{speaker}: \"{self.npc}\""
+            if self.player:
+                lines = f"King: \"{self.player}\"\n{lines}"
+            self._lines[speaker] = lines
+        return lines
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.player) + estimate_tokens(self.npc) + 4
+
+    def to_dict(self) -> dict:
+        data = {"player": self.player, "npc": self.npc}
+        if self.speaker:
+            data["speaker"] = self.speaker
+        return data
+
+
+# Summarizer(previous_summary, turns_to_fold) -> new summary
+Summarizer = Callable[[str, list[Turn]], Awaitable[str]]
+
+
+async def summarize_turns(summary: str, turns: list[Turn]) -> str:
+    """Fold turns into the running summary (the "summary" route: a small, cheap model)."""
+    transcript = "\n".join(turn.render("Courtier") for turn in turns)
+    prompt = f"""Maintain a running summary of a conversation in a medieval political intrigue game.
+
+CURRENT SUMMARY:
+{summary or "(none yet)"}
+
+NEW EXCHANGES TO FOLD IN:
+{transcript}
+
+INSTRUCTIONS:
+- Return the updated summary in at most 5 sentences
+- Keep accusations, threats, promises, admissions and names
+- Drop pleasantries and repetition
+- Do NOT invent anything not in the exchanges
+
+OUTPUT ONLY THE SUMMARY, NOTHING ELSE."""
+
+    completion = await routing.aroute(
+        "summary",
+        [{"role": "user", "content": prompt}],
+        temperature=0.2,
+        max_tokens=250,
+    )
+    return completion.text.strip()
+
+
+class ConversationMemory:
+    """
+    A scene's conversation history under a token budget.
+
+    append() is cheap and synchronous: once the verbatim turns exceed the
+    budget, the oldest unpinned turns move to a pending list, which still
+    renders verbatim until compact() folds it into the summary. The scene
+    loop runs compact() in the background while the player types.
+
+    Args:
+        budget: Token budget for the rendered history (summary + verbatim turns)
+        keep_recent: Unpinned turns that always stay verbatim, whatever the budget
+        summarizer: Coroutine folding turns into the summary (default: summarize_turns)
+    """
+
+    def __init__(
+        self,
+        budget: int = 1200,
+        keep_recent: int = 4,
+        summarizer: Summarizer | None = None,
+    ) -> None:
+        self.budget = budget
+        self.keep_recent = keep_recent
+        self.summarizer = summarizer or summarize_turns
+        self.summary = ""
+        self.summarized_turns = 0  # Turns folded into the summary so far
+        self._turns: list[Turn] = []  # Verbatim turns, oldest first
+        self._pending: list[Turn] = []  # Evicted, not yet summarized
+        self._rendered: dict[str, str] = {}  # Default speaker -> rendered history
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return self.summarized_turns + len(self._pending) + len(self._turns)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    @property
+    def turns(self) -> list[Turn]:
+        """Turns currently rendered verbatim (pending and kept), oldest first."""
+        return self._pending + self._turns
+
+    @property
+    def needs_compaction(self) -> bool:
+        return bool(self._pending)
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of the rendered history."""
+        summary = estimate_tokens(self.summary) if self.summary else 0
+        return summary + sum(turn.tokens for turn in self.turns)
+
+    def append(self, player: str, npc: str, speaker: str = "", pinned: bool = False) -> Turn:
+        """Record a turn, evicting old unpinned turns beyond the budget."""
+        turn = Turn(player=player, npc=npc, speaker=speaker, pinned=pinned)
+        self._turns.append(turn)
+        self._evict()
+        self._rendered.clear()
+        return turn
+
+    def pin(self, index: int = -1) -> None:
+        """Pin a verbatim turn so it is never summarized away."""
+        self._turns[index].pinned = True
+
+    def _evict(self) -> None:
+        # Pending turns are on their way into the summary, so only the summary
+        # and the kept turns count against the budget
+        kept = (estimate_tokens(self.summary) if self.summary else 0) + sum(
+            turn.tokens for turn in self._turns
+        )
+        unpinned = [turn for turn in self._turns if not turn.pinned]
+        while kept > self.budget and len(unpinned) > self.keep_recent:
+            oldest = unpinned.pop(0)
+            self._turns.remove(oldest)
+            self._pending.append(oldest)
+            kept -= oldest.tokens
+
+    async def compact(self) -> None:
+        """Fold pending turns into the summary; each turn is summarized only once."""
+        async with self._lock:
+            if not self._pending:
+                return
+            batch = list(self._pending)
+            self.summary = await self.summarizer(self.summary, batch)
+            del self._pending[:len(batch)]
+            self.summarized_turns += len(batch)
+            self._rendered.clear()
+
+    def render(self, default_speaker: str) -> str:
+        """Render the history section of an NPC prompt ("" when empty)."""
+        rendered = self._rendered.get(default_speaker)
+        if rendered is None:
+            sections = []
+            if self.summary:
+                sections.append(f"\n=== EARLIER IN THIS SCENE (SUMMARY) ===\n{self.summary}\n")
+            if self.turns:
+                lines = "\n".join(turn.render(default_speaker) for turn in self.turns)
+                sections.append(f"\n=== PREVIOUS IN THIS SCENE ===\n{lines}\n")
+            rendered = "".join(sections)
+            self._rendered[default_speaker] = rendered
+        return rendered
+
+    def to_list(self) -> list[dict]:
+        """Verbatim turns as plain dicts (the pre-memory history format)."""
+        return [turn.to_dict() for turn in self.turns]
@@ -0,0 +1,376 @@
+"""
+Mock LLM Server.
+
+A local stand-in for the OpenRouter /chat/completions endpoint (streaming and
+non-streaming) with configurable latency, throughput, error rate and 429
+rate limiting. Point the gateway at it to load-test the game loop and eval
+scripts against realistic provider latency without spending tokens:
+
+    python -m kings_paradox.prototype.mock_server --profile openrouter --port 8765
+    OPENROUTER_BASE_URL=http://127.0.0.1:8765/v1 OPENROUTER_API_KEY=mock python ...
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# A generator turns a chat.completions request body into response text
+Generator = Callable[[dict], str]
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """How the mock provider behaves under load."""
+
+    ttft: float = 0.0  # Seconds before the first token
+    tokens_per_sec: float = 0.0  # Generation speed; 0 = instant
+    jitter: float = 0.0  # Max random extra seconds added to ttft
+    error_rate: float = 0.0  # Fraction of requests answered with a 500
+    rate_limit_rps: float = 0.0  # Sustained requests/sec before 429s; 0 = unlimited
+    rate_limit_burst: int = 5  # Requests allowed above the sustained rate
+
+
+PROFILES = {
+    "instant": LatencyProfile(),
+    "openrouter": LatencyProfile(ttft=0.8, tokens_per_sec=60.0, jitter=0.4),
+    "slow": LatencyProfile(ttft=3.0, tokens_per_sec=20.0, jitter=2.0),
+    "flaky": LatencyProfile(ttft=0.8, tokens_per_sec=60.0, jitter=0.4, error_rate=0.1),
+    "throttled": LatencyProfile(ttft=0.5, tokens_per_sec=80.0, rate_limit_rps=2.0),
+}
+
+
+# === Response generators ===
+
+
+def _last_user_message(request: dict) -> str:
+    for message in reversed(request.get("messages", [])):
+        if message.get("role") == "user":
+            content = message.get("content", "")
+            if isinstance(content, list):  # Content parts
+                return "".join(part.get("text", "") for part in content)
+            return str(content)
+    return ""
+
+
+def echo_generator(request: dict) -> str:
+    """Answer with the last user message."""
+    return _last_user_message(request)
+
+
+def canned_generator(responses: list[str]) -> Generator:
+    """Answer with each response in turn, cycling."""
+    cycle = itertools.cycle(responses)
+    lock = threading.Lock()
+
+    def generate(request: dict) -> str:
+        with lock:
+            return next(cycle)
+
+    return generate
+
+
+def template_generator(template: str) -> Generator:
+    """Answer by formatting a template with {model}, {prompt} and {prompt_chars}."""
+    def generate(request: dict) -> str:
+        prompt = _last_user_message(request)
+        return template.format(
+            model=request.get("model", ""),
+            prompt=prompt,
+            prompt_chars=len(prompt),
+        )
+
+    return generate
+
+
+def game_generator(request: dict) -> str:
+    """Answer game prompts plausibly: JSON for the parser, prose for everything else."""
+    prompt = _last_user_message(request)
+    if "Parse the player's input" in prompt:
+        npcs = re.search(r"PRESENT NPCs: (.*)", prompt)
+        speech = re.search(r'PLAYER INPUT: "(.*)"', prompt)
+        target = npcs.group(1).split(",")[0].strip() if npcs else ""
+        return json.dumps({
+            "action_type": "speak",
+            "target": "" if target == "none" else target,
+            "details": {"speech": speech.group(1) if speech else "", "description": ""},
+            "confidence": 0.9,
+        })
+    return (
+        "The figure before you shifts their weight, eyes never quite meeting yours. "
+        '"Your Majesty," they say at last, "the court is full of whispers."'
+    )
+
+
+GENERATORS: dict[str, Generator] = {
+    "echo": echo_generator,
+    "game": game_generator,
+}
+
+
+# === Server ===
+
+
+class _TokenBucket:
+    """Thread-safe token bucket for 429 simulation."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+@dataclass
+class ServerStats:
+    """Counters for requests the mock server has handled."""
+
+    requests: int = 0
+    completed: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+
+
+class MockLLMServer:
+    """
+    An OpenAI-compatible chat completions server running in a background thread.
+
+    Usage:
+        with MockLLMServer(PROFILES["openrouter"], game_generator) as server:
+            client = OpenAI(base_url=server.url, api_key="mock")
+    """
+
+    def __init__(
+        self,
+        profile: LatencyProfile | None = None,
+        generator: Generator = game_generator,
+        host: str = "127.0.0.1",
+        port: int = 0,  # 0 = pick a free port
+        seed: int | None = None,
+    ) -> None:
+        self.profile = profile or LatencyProfile()
+        self.generator = generator
+        self.stats = ServerStats()
+        self._random = random.Random(seed)
+        self._stats_lock = threading.Lock()
+        self._bucket = (
+            _TokenBucket(self.profile.rate_limit_rps, self.profile.rate_limit_burst)
+            if self.profile.rate_limit_rps
+            else None
+        )
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to hand to an OpenAI client."""
+        host, port = self._httpd.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def _count(self, field: str) -> None:
+        with self._stats_lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def _roll(self) -> tuple[bool, float]:
+        """Decide (fail?, extra jitter) for one request."""
+        with self._stats_lock:
+            fail = self._random.random() < self.profile.error_rate
+            jitter = self._random.uniform(0, self.profile.jitter) if self.profile.jitter else 0.0
+        return fail, jitter
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like a real provider
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+            def handle(self) -> None:
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up, e.g. on a timeout
+
+            def do_POST(self) -> None:
+                if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                server._count("requests")
+
+                if server._bucket is not None and not server._bucket.take():
+                    server._count("rate_limited")
+                    self._send_json(
+                        429,
+                        {"error": {"message": "rate limit exceeded", "code": 429}},
+                        headers={"Retry-After": "1"},
+                    )
+                    return
+
+                fail, jitter = server._roll()
+                if fail:
+                    server._count("errors")
+                    self._send_json(500, {"error": {"message": "upstream error", "code": 500}})
+                    return
+
+                text = server.generator(request)
+                chunks = re.findall(r"\S+\s*|\s+", text) or [""]
+                time.sleep(server.profile.ttft + jitter)
+                if request.get("stream"):
+                    self._stream(request, chunks)
+                else:
+                    if server.profile.tokens_per_sec:
+                        time.sleep(len(chunks) / server.profile.tokens_per_sec)
+                    self._send_json(200, _completion_body(request, text, len(chunks)))
+                server._count("completed")
+
+            def _stream(self, request: dict, chunks: list[str]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, chunk in enumerate(chunks):
+                    if i and server.profile.tokens_per_sec:
+                        time.sleep(1 / server.profile.tokens_per_sec)
+                    self._write_event(_chunk_body(request, {"content": chunk}, None))
+                self._write_event(_chunk_body(request, {}, "stop"))
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _write_event(self, body: dict) -> None:
+                self._write_chunk(f"data: {json.dumps(body)}\n\n".encode())
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, status: int, body: dict, headers: dict | None = None) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+def _completion_body(request: dict, text: str, completion_tokens: int) -> dict:
+    prompt_chars = sum(len(json.dumps(m)) for m in request.get("messages", []))
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": text},
+        }],
+        "usage": {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_chars // 4 + completion_tokens,
+        },
+    }
+
+
+def _chunk_body(request: dict, delta: dict, finish_reason: str | None) -> dict:
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local mock of the OpenRouter chat API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="openrouter")
+    parser.add_argument("--generator", choices=["canned", "echo", "game", "template"],
+                        default="game")
+    parser.add_argument("--canned", action="append", default=[],
+                        help="Canned response (repeatable; used with --generator canned)")
+    parser.add_argument("--template", default="[{model}] {prompt_chars} chars received.",
+                        help="Response template (used with --generator template)")
+    parser.add_argument("--ttft", type=float, help="Override the profile's time-to-first-token")
+    parser.add_argument("--tps", type=float, help="Override the profile's tokens/sec")
+    parser.add_argument("--error-rate", type=float, help="Override the profile's error rate")
+    parser.add_argument("--rps", type=float, help="Override the profile's rate limit")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    overrides = {
+        "ttft": args.ttft,
+        "tokens_per_sec": args.tps,
+        "error_rate": args.error_rate,
+        "rate_limit_rps": args.rps,
+    }
+    profile = LatencyProfile(**{
+        **profile.__dict__,
+        **{k: v for k, v in overrides.items() if v is not None},
+    })
+
+    if args.generator == "canned":
+        generator = canned_generator(args.canned or ["As you command, Your Majesty."])
+    elif args.generator == "template":
+        generator = template_generator(args.template)
+    else:
+        generator = GENERATORS[args.generator]
+
+    server = MockLLMServer(profile, generator, host=args.host, port=args.port)
+    print(f"Mock LLM server on {server.url} (profile: {args.profile})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,16 @@ KP-r16: Player input parser
 Parses free-text player input into structured game actions using LLM.
 """
 
-import os
-import json
-from pydantic import BaseModel
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Literal
 
-load_dotenv()
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from kings_paradox.prototype import llm, routing
+from kings_paradox.prototype.policy import CallPolicy, LLMUnavailableError
 
 
 class PlayerAction(BaseModel):
@@ -36,24 +39,365 @@ VALID_ACTIONS = [
 ]
 
 
+
+class ActionDetails(BaseModel):
+    """Details the LLM fills in for a parsed action."""
+
+    speech: str = ""  # The actual words spoken, if any
+    description: str = ""  # Description of physical action, if any
+
+
+class ParsedAction(BaseModel):
+    """
+    The LLM's answer: a PlayerAction's fields constrained to valid values, plus confidence.
+
+    Its JSON schema is sent as the structured-output format; to_action()
+    converts it for the rest of the game.
+    """
+
+    action_type: Literal[tuple(VALID_ACTIONS)]  # type: ignore[valid-type]
+    target: str = ""  # npc_id if the action targets someone, otherwise empty
+    details: ActionDetails = ActionDetails()
+    confidence: float = Field(default=0.0, ge=0.0, le=1.0)  # How sure of type and target
+
+    @field_validator("action_type", mode="before")
+    @classmethod
+    def _first_of_compound(cls, value: object) -> object:
+        # Handle compound action types (e.g., "gesture/action/physical" -> "gesture")
+        return value.split("/")[0] if isinstance(value, str) else value
+
+    def to_action(self) -> PlayerAction:
+        return PlayerAction(
+            action_type=self.action_type,
+            target=self.target,
+            details=self.details.model_dump(),
+        )
+
+
+PARSE_FORMAT = llm.structured_output(ParsedAction, name="player_action")
+
+# How each LLM parse ended: "llm" (valid answer), "repaired" (valid after the
+# repair attempt), "fallback" (still invalid) or "unavailable" (LLM down)
+parse_paths: Counter[str] = Counter()
+
+# Parsing sits on the critical path of every turn: fail over to the speak
+# fallback quickly, and hedge the slowest calls
+PARSE_POLICY = CallPolicy(timeout=10.0, deadline=20.0, max_retries=2, hedge_quantile=0.95)
+
+
+# === Fast path ===
+# High-precision rules for inputs that don't need the LLM. Each action rule
+# must match a whole command sentence (after an optional vocative such as
+# "Guards!" or "Duke,"); questions, negated commands and conditionals other
+# than an explicit "if you ..., I'll have you ..." threat never match.
+# Speech is only taken on an explicit cue (quoted words, or say/tell/ask
+# opening a clause). Anything not clearly matched falls through to the LLM.
+
+_VIOLENCE = (
+    r"execut\w*|hang\w*|behead\w*|kill\w*|tortur\w*|flog\w*|whip\w*|burn\w*|"
+    r"head\b|hands? cut|tongue|the rack|gallows|die\b|death|blood"
+)
+# The consequence half of a threat: the speaker doing violence to "you"
+_CONSEQUENCE = (
+    rf"(?:i'll|i will|i shall|i'm going to|i am going to) "
+    rf"(?:(?:have|see) your? (?:[\w']+ ){{0,3}}?(?:{_VIOLENCE})\w*|(?:{_VIOLENCE}) you)"
+    rf"(?: (?:for|at|in|by|before) [\w' ]+)?"
+)
+_NOW = r"(?:,? (?:at once|now|immediately|this instant))?"
+_NEGATION = re.compile(r"\b(?:not|never|no|nor|cannot)\b|n't\b")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!;])\s+")
+_GESTURE = re.compile(
+    r"\*[^*]+\*|\([^)]+\)"
+    r"|i (?:slam|pound|bang|pace|glare|stare|frown|sigh|shrug|nod|slap|toss|pour|lean"
+    r"|wave|drum|tap)s?(?: [\w' ,]+)?[.!]*"
+)
+# Quoted words, or a clause opening with a verb of speaking
+_SPEECH_CUE = re.compile(
+    r"^[\"“]|(?:^|[,!:.;] )(?:i )?(?:say|tell|ask|answer|reply)s?\b"
+)
+# Words that mean an input is more than plain conversation
+_NOT_SPEECH = re.compile(
+    rf"\b({_VIOLENCE}|guards?|arrest\w*|seize\w*|dungeon|prison|chains?|irons"
+    rf"|leave|go|going|depart\w*|begone|dismiss\w*|farewell|goodbye|threat\w*"
+    rf"|sword|dagger|blade|strike|slap|punch|hit)\b|^\*|^\("
+)
+
+
+class _Rules:
+    """The whole-sentence action patterns for one set of NPC names."""
+
+    def __init__(self, aliases: tuple[str, ...]) -> None:
+        names = "|".join(re.escape(alias) for alias in sorted(aliases, key=len, reverse=True))
+        titled = rf"(?:(?:my|lord|lady|sir|good|dear|the) )*(?:{names or '(?!)'})"
+        vocative = rf"(?:guards?|my (?:lord|lady)|your grace|{titled})"
+        lead = rf"(?:{vocative}[,!:]? )?"
+        tail = rf"(?:,? {vocative})?"
+        self.vocative = re.compile(rf"{vocative}[,!:.]*")
+        self.arrest = re.compile(
+            rf"{lead}(?P<verb>arrest|seize|chain|bind|take|drag|remove|throw|clap|put) "
+            rf"(?P<object>him|her|them|{titled})"
+            rf"(?P<where>| away| out| to the (?:dungeon|cells)"
+            rf"| in(?:to)? (?:irons|chains|the dungeon|the cells)){_NOW}"
+        )
+        self.threaten = [
+            re.compile(
+                rf"{lead}(?:if|unless) you (?P<condition>[^,]+){tail},? (?:then )?"
+                rf"(?P<consequence>{_CONSEQUENCE}){tail}"
+            ),
+            re.compile(
+                rf"{lead}(?P<consequence>{_CONSEQUENCE}){tail},? (?:if|unless) you "
+                rf"(?P<condition>[^,]+)"
+            ),
+            re.compile(
+                rf"{lead}(?P<condition>[^,]+){tail}, or (?:else,? )?"
+                rf"(?P<consequence>{_CONSEQUENCE}){tail}"
+            ),
+        ]
+        self.dismiss = re.compile(
+            rf"{lead}(?:leave (?:me|us)|begone|be gone|you are dismissed|you may (?:go|leave)"
+            rf"|dismissed|get out|out of my sight|go now|away with you|that will be all)"
+            rf"(?: now)?{tail}"
+        )
+        self.leave = re.compile(
+            rf"{lead}(?:i (?:must |shall |will |should )?"
+            rf"(?:leave|go|depart|take my leave|withdraw|retire|excuse myself)"
+            rf"(?: now| for now| at once)?|i'm leaving|i am leaving|farewell|goodbye"
+            rf"|i bid you (?:farewell|good day|good night|goodnight|adieu)){tail}"
+        )
+
+
+@lru_cache(maxsize=64)
+def _rules(aliases: tuple[str, ...]) -> _Rules:
+    return _Rules(aliases)
+
+
+@dataclass
+class FastPathStats:
+    """How often the fast path answered without an LLM round trip."""
+
+    hits: Counter[str] = field(default_factory=Counter)  # action_type -> count
+    misses: int = 0
+
+    @property
+    def total_hits(self) -> int:
+        return sum(self.hits.values())
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.total_hits + self.misses
+        return self.total_hits / total if total else 0.0
+
+
+class FastPathClassifier:
+    """Rule/lexicon-based pre-classifier for obvious player inputs."""
+
+    def __init__(self) -> None:
+        self.stats = FastPathStats()
+
+    def classify(self, player_input: str, scene_context: dict) -> PlayerAction | None:
+        """Return a PlayerAction when the input is unambiguous, else None."""
+        action = self._classify(player_input, scene_context)
+        if action is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits[action.action_type] += 1
+        return action
+
+    def _classify(self, player_input: str, scene_context: dict) -> PlayerAction | None:
+        text = " ".join(player_input.lower().split())
+        if not text:
+            return None
+        present = scene_context.get("present_npcs", [])
+        npc_names = scene_context.get("npc_names", {})
+        aliases = {npc_id: _aliases(npc_id, npc_names.get(npc_id, "")) for npc_id in present}
+        target = _resolve_target(text, present, npc_names)
+
+        action = None if "?" in text else self._command(text, player_input, aliases, target)
+        if action is not None:
+            return action
+        if target and _SPEECH_CUE.search(text) and not _NOT_SPEECH.search(text):
+            return _action("speak", target, player_input)
+        return None
+
+    def _command(
+        self,
+        text: str,
+        player_input: str,
+        aliases: dict[str, set[str]],
+        target: str,
+    ) -> PlayerAction | None:
+        """An arrest, threat, dismissal, departure or gesture, if the input is only that."""
+        if _GESTURE.fullmatch(text) and not _NEGATION.search(text):
+            return PlayerAction(action_type="gesture", target=target, details={
+                "speech": "", "description": player_input.strip("*() "),
+            })
+        rules = _rules(tuple(sorted(set().union(*aliases.values()))))
+        sentences = _SENTENCE_BREAK.split(text)
+        while len(sentences) > 1 and rules.vocative.fullmatch(sentences[0]):
+            sentences.pop(0)  # "Guards!" before the order itself
+        command = sentences[0].rstrip(".!; ")
+        if any(_NOT_SPEECH.search(sentence) for sentence in sentences[1:]):
+            return None  # Later sentences must be plain talk
+
+        for threat in rules.threaten:
+            match = threat.fullmatch(command)
+            if match and not _NEGATION.search(match["consequence"]):
+                return _action("threaten", target, player_input) if target else None
+        if _NEGATION.search(command):
+            return None
+
+        match = rules.arrest.fullmatch(command)
+        if match and _arrest_form(match["verb"], match["where"]):
+            arrested = _named(match["object"], aliases) or target
+            return _action("arrest", arrested, player_input) if arrested else None
+        if rules.dismiss.fullmatch(command):
+            return _action("dismiss", target, player_input) if target else None
+        if rules.leave.fullmatch(command):
+            return PlayerAction(action_type="leave", target="", details={
+                "speech": player_input, "description": "",
+            })
+        return None
+
+
+def _arrest_form(verb: str, where: str) -> bool:
+    """Whether verb + destination is an order to imprison ("take him" alone isn't)."""
+    if verb in ("arrest", "seize", "chain", "bind"):
+        return True
+    if verb in ("take", "drag", "remove"):
+        return bool(where)
+    return where.startswith(" in")  # throw / clap / put ... in irons
+
+
+def _named(phrase: str, aliases: dict[str, set[str]]) -> str:
+    """The one NPC a phrase like "the bishop" names; "" for pronouns or ambiguity."""
+    name = re.sub(r"^((my|lord|lady|sir|good|dear|the)\s+)*", "", phrase)
+    matches = [npc_id for npc_id, names in aliases.items() if name in names]
+    return matches[0] if len(matches) == 1 else ""
+
+
+def _action(action_type: str, target: str, player_input: str) -> PlayerAction:
+    return PlayerAction(
+        action_type=action_type,
+        target=target,
+        details={"speech": player_input, "description": ""},
+    )
+
+
+def _aliases(npc_id: str, name: str = "") -> set[str]:
+    """Names an NPC can be addressed by: full id/name and each word of them."""
+    words = npc_id.split("_") + name.lower().split()
+    return {" ".join(npc_id.split("_")), name.lower()} | set(words) - {""}
+
+
+def _resolve_target(text: str, present_npcs: list[str], npc_names: dict[str, str]) -> str:
+    """
+    Work out who the input is aimed at.
+
+    A leading vocative ("Bishop, ...") wins; otherwise exactly one named NPC;
+    otherwise the only NPC present. Returns "" when ambiguous.
+    """
+    aliases = {npc_id: _aliases(npc_id, npc_names.get(npc_id, "")) for npc_id in present_npcs}
+    for npc_id, names in aliases.items():
+        for alias in names:
+            if re.match(rf"^((my|lord|lady|sir|good|dear|your grace)\s+)*{re.escape(alias)}\s*[,!:]", text):
+                return npc_id
+
+    named = [
+        npc_id for npc_id, names in aliases.items()
+        if any(re.search(rf"\b{re.escape(alias)}\b", text) for alias in names)
+    ]
+    if len(named) == 1:
+        return named[0]
+    if not named and len(present_npcs) == 1:
+        return present_npcs[0]
+    return ""
+
+
+fast_path = FastPathClassifier()
+
+
+def _validate(content: str, present_npcs: list[str]) -> ParsedAction:
+    """Validate the model's answer; raises ValueError describing what is wrong."""
+    content = content.strip()
+    # Providers that ignore response_format may still wrap JSON in fences
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1] if "\n" in content else content
+        content = content.rsplit("```", 1)[0] if "```" in content else content
+        content = content.strip()
+    try:
+        parsed = ParsedAction.model_validate_json(content or "{}")
+    except ValidationError as exc:
+        raise ValueError(_describe(exc)) from exc
+    if parsed.target and parsed.target not in present_npcs:
+        raise ValueError(
+            f"target {parsed.target!r} is not present; use one of {present_npcs} or \"\""
+        )
+    return parsed
+
+
+def _describe(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'output'}: {error['msg']}"
+        for error in exc.errors()[:5]
+    )
+
+
+def _confidence(content: str, present_npcs: list[str]) -> float | None:
+    """Rate a parse answer for the routing cascade; None if it is unusable."""
+    try:
+        return _validate(content, present_npcs).confidence
+    except ValueError:
+        return None
+
+
+async def _repair(
+    messages: list[dict],
+    content: str,
+    error: str,
+    present_npcs: list[str],
+) -> ParsedAction | None:
+    """Ask once for a corrected answer, quoting the validation error."""
+    completion = await routing.aroute(
+        "parse_repair",
+        messages + [
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": (
+                f"That output is invalid: {error}\n"
+                "Return the corrected JSON only."
+            )},
+        ],
+        temperature=0.0,
+        max_tokens=200,
+        policy=PARSE_POLICY,
+        response_format=PARSE_FORMAT,
+    )
+    try:
+        return _validate(completion.text, present_npcs)
+    except ValueError:
+        return None
+
+
 async def parse_player_input(
     player_input: str,
     scene_context: dict,
+    use_fast_path: bool = True,
 ) -> PlayerAction:
     """
     Parse free-text player input into a structured PlayerAction.
 
     Args:
         player_input: The raw text the player typed
-        scene_context: Context including present_npcs list
+        scene_context: Context including present_npcs list (and optionally
+            npc_names, id -> display name, to widen fast-path name matching)
+        use_fast_path: Try the local rule-based classifier before the LLM
 
     Returns:
         PlayerAction with action_type, target, and details
     """
-    client = AsyncOpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
+    if use_fast_path:
+        action = fast_path.classify(player_input, scene_context)
+        if action is not None:
+            return action
 
     present_npcs = scene_context.get("present_npcs", [])
     npcs_str = ", ".join(present_npcs) if present_npcs else "none"
@@ -79,7 +423,8 @@ OUTPUT JSON (exactly this format):
   "details": {{
     "speech": "<the actual words spoken, if any>",
     "description": "<description of physical action, if any>"
-  }}
+  }},
+  "confidence": <0.0-1.0, how sure you are of the action type and target>
 }}
 
 Rules:
@@ -90,39 +435,33 @@ Rules:
 
 OUTPUT ONLY VALID JSON, NOTHING ELSE."""
 
-    response = await client.chat.completions.create(
-        model="anthropic/claude-sonnet-4",  # Using sonnet for reliability
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.1,  # Low temp for consistent parsing
-        max_tokens=200,
-    )
-
-    content = response.choices[0].message.content or "{}"
-
-    # Clean up potential markdown formatting
-    content = content.strip()
-    if content.startswith("```"):
-        content = content.split("\n", 1)[1] if "\n" in content else content
-        content = content.rsplit("```", 1)[0] if "```" in content else content
-        content = content.strip()
-
+    messages = [{"role": "user", "content": prompt}]
+    parsed = None
     try:
-        parsed = json.loads(content)
-    except json.JSONDecodeError:
-        # Fallback to speak action
-        parsed = {
-            "action_type": "speak",
-            "target": present_npcs[0] if present_npcs else "",
-            "details": {"speech": player_input}
-        }
+        # Fast model first; escalates when the answer is malformed or unsure
+        completion = await routing.aroute(
+            "parse",
+            messages,
+            check=lambda content: _confidence(content, present_npcs),
+            temperature=0.1,  # Low temp for consistent parsing
+            max_tokens=200,
+            policy=PARSE_POLICY,
+            response_format=PARSE_FORMAT,
+        )
+        try:
+            parsed = _validate(completion.text, present_npcs)
+            parse_paths["llm"] += 1
+        except ValueError as exc:
+            parsed = await _repair(messages, completion.text, str(exc), present_npcs)
+            parse_paths["repaired" if parsed else "fallback"] += 1
+    except LLMUnavailableError:
+        parse_paths["unavailable"] += 1  # Degraded: handled by the speak fallback below
 
-    # Handle compound action types (e.g., "gesture/action/physical" -> "gesture")
-    action_type = parsed.get("action_type", "speak")
-    if "/" in action_type:
-        action_type = action_type.split("/")[0]
-
-    return PlayerAction(
-        action_type=action_type,
-        target=parsed.get("target", ""),
-        details=parsed.get("details", {}),
-    )
+    if parsed is None:
+        # Fallback to speak action
+        return PlayerAction(
+            action_type="speak",
+            target=present_npcs[0] if present_npcs else "",
+            details={"speech": player_input},
+        )
+    return parsed.to_action()
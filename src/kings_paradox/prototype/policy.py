@@ -0,0 +1,352 @@
+"""
+LLM Call Policy.
+
+Deadlines, retries, hedging and circuit breaking for gateway calls, so one
+stalled or failing provider request can't freeze the game loop:
+
+- every attempt has a timeout, and the whole call (retries included) a deadline
+- 429s, 5xx and connection errors are retried with exponential backoff and
+  full jitter, honouring Retry-After
+- optionally, a duplicate (hedged) request is sent once an attempt has run
+  past the recent p95 latency; the first answer wins
+- repeated failures open a per-provider circuit breaker, after which calls
+  fail fast with LLMUnavailableError so callers take their degraded path
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when a call can't be answered within its policy."""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+
+# Counters across all calls: retries, timeouts, hedges, hedge_wins, breaker_trips
+policy_stats: Counter[str] = Counter()
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    """How patiently a single gateway call is made."""
+
+    timeout: float | None = 30.0  # Seconds per attempt
+    deadline: float | None = 90.0  # Seconds for the whole call, retries included
+    max_retries: int = 3
+    backoff: float = 0.5  # Retry n waits up to backoff * 2**n seconds
+    max_backoff: float = 8.0
+    hedge_quantile: float | None = None  # e.g. 0.95: hedge attempts slower than p95
+    hedge_min_samples: int = 20  # Latency samples needed before hedging starts
+
+    @classmethod
+    def from_env(cls) -> "CallPolicy":
+        """Build a policy from LLM_TIMEOUT / LLM_DEADLINE / LLM_MAX_RETRIES / LLM_HEDGE_QUANTILE."""
+        defaults = cls()
+        timeout = os.getenv("LLM_TIMEOUT")
+        deadline = os.getenv("LLM_DEADLINE")
+        hedge = os.getenv("LLM_HEDGE_QUANTILE")
+        return cls(
+            timeout=float(timeout) if timeout else defaults.timeout,
+            deadline=float(deadline) if deadline else defaults.deadline,
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", defaults.max_retries)),
+            hedge_quantile=float(hedge) if hedge else defaults.hedge_quantile,
+        )
+
+    def backoff_delay(self, retry: int, rng: random.Random | None = None) -> float:
+        """Full-jitter backoff before retry number `retry` (0-based)."""
+        cap = min(self.max_backoff, self.backoff * 2 ** retry)
+        return (rng or random).uniform(0, cap)
+
+
+class LatencyTracker:
+    """Recent successful-call latencies, for the hedging threshold."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast after `threshold` consecutive failed attempts.
+
+    Once `cooldown` seconds have passed an open breaker lets one probe call
+    through (half-open): success closes it, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        """Build a breaker from LLM_BREAKER_THRESHOLD / LLM_BREAKER_COOLDOWN."""
+        return cls(
+            threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", 5)),
+            cooldown=float(os.getenv("LLM_BREAKER_COOLDOWN", 30.0)),
+        )
+
+    @property
+    def state(self) -> str:
+        """One of "closed", "open" or "half_open"."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._probing or self._clock() - self._opened_at >= self.cooldown:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or self._clock() - self._opened_at < self.cooldown:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                if self._opened_at is None or self._probing:
+                    policy_stats["breaker_trips"] += 1
+                self._opened_at = self._clock()
+                self._probing = False
+
+    def release(self) -> None:
+        """End a probe that neither succeeded nor failed (cancelled, or a non-provider error)."""
+        with self._lock:
+            self._probing = False
+
+    def reset(self) -> None:
+        self.record_success()
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying."""
+    if isinstance(exc, (TimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class _Call:
+    """Deadline and retry bookkeeping shared by the sync and async runners."""
+
+    def __init__(self, policy: CallPolicy, breaker: CircuitBreaker, name: str) -> None:
+        self.policy = policy
+        self.breaker = breaker
+        self.name = name
+        self.start = time.monotonic()
+        self.last_error: BaseException | None = None
+
+    def remaining(self) -> float | None:
+        if self.policy.deadline is None:
+            return None
+        return self.policy.deadline - (time.monotonic() - self.start)
+
+    def attempt_timeout(self) -> float | None:
+        """Timeout for the next attempt, or raise if the call is out of time or tripped."""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise LLMUnavailableError(f"{self.name}: deadline exceeded") from self.last_error
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name}: circuit open") from self.last_error
+        timeouts = [t for t in (self.policy.timeout, remaining) if t is not None]
+        return min(timeouts) if timeouts else None
+
+    def failed(self, exc: BaseException, retry: int) -> float:
+        """Record a failed attempt; return the backoff before retrying or raise."""
+        if not is_retryable(exc):
+            self.breaker.release()
+            raise exc
+        self.breaker.record_failure()
+        self.last_error = exc
+        if isinstance(exc, TimeoutError):
+            policy_stats["timeouts"] += 1
+        if retry >= self.policy.max_retries:
+            raise LLMUnavailableError(
+                f"{self.name}: failed after {retry + 1} attempts"
+            ) from exc
+        delay = self.policy.backoff_delay(retry)
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.policy.max_backoff))
+        remaining = self.remaining()
+        if remaining is not None and delay >= remaining:
+            raise LLMUnavailableError(f"{self.name}: deadline exceeded") from exc
+        policy_stats["retries"] += 1
+        return delay
+
+
+async def acall(
+    attempt: Callable[[], Awaitable[T]],
+    policy: CallPolicy,
+    breaker: CircuitBreaker,
+    latency: LatencyTracker | None = None,
+    name: str = "llm",
+    discard: Callable[[T], None] | None = None,
+) -> T:
+    """
+    Run an async call under a policy.
+
+    Args:
+        attempt: Makes one attempt; called again for each retry or hedge
+        policy: Timeouts, retries and hedging
+        breaker: Circuit breaker for the provider being called
+        latency: Successful-call latencies; feeds (and is fed by) hedging
+        name: Label for error messages
+        discard: Releases the result of a hedge that finished but lost the race
+
+    Raises:
+        LLMUnavailableError: Out of retries or time, or the circuit is open
+    """
+    call = _Call(policy, breaker, name)
+    for retry in range(policy.max_retries + 1):
+        timeout = call.attempt_timeout()
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(
+                _hedged(attempt, _hedge_delay(policy, latency), discard), timeout
+            )
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as exc:
+            await asyncio.sleep(call.failed(exc, retry))
+            continue
+        breaker.record_success()
+        if latency is not None:
+            latency.add(time.monotonic() - started)
+        return result
+    raise AssertionError("unreachable")  # The last failed() always raises
+
+
+def call(
+    attempt: Callable[[float | None], T],
+    policy: CallPolicy,
+    breaker: CircuitBreaker,
+    latency: LatencyTracker | None = None,
+    name: str = "llm",
+) -> T:
+    """
+    Run a blocking call under a policy (no hedging).
+
+    `attempt` receives the attempt timeout in seconds and must enforce it
+    itself, e.g. by passing it to the HTTP client.
+    """
+    call_ = _Call(policy, breaker, name)
+    for retry in range(policy.max_retries + 1):
+        timeout = call_.attempt_timeout()
+        started = time.monotonic()
+        try:
+            result = attempt(timeout)
+        except Exception as exc:
+            time.sleep(call_.failed(exc, retry))
+            continue
+        breaker.record_success()
+        if latency is not None:
+            latency.add(time.monotonic() - started)
+        return result
+    raise AssertionError("unreachable")
+
+
+def _hedge_delay(policy: CallPolicy, latency: LatencyTracker | None) -> float | None:
+    if policy.hedge_quantile is None or latency is None:
+        return None
+    if len(latency) < policy.hedge_min_samples:
+        return None
+    return latency.quantile(policy.hedge_quantile)
+
+
+async def _hedged(
+    attempt: Callable[[], Awaitable[T]],
+    hedge_delay: float | None,
+    discard: Callable[[T], None] | None,
+) -> T:
+    """Run one attempt, adding a duplicate if it is slower than hedge_delay."""
+    if hedge_delay is None:
+        return await attempt()
+
+    tasks = [asyncio.ensure_future(attempt())]
+    winner = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+        if not done:
+            policy_stats["hedges"] += 1
+            tasks.append(asyncio.ensure_future(attempt()))
+        error: BaseException | None = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = task
+                    if task is not tasks[0]:
+                        policy_stats["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in tasks:
+            if task is winner:
+                continue
+            if not task.done():
+                task.cancel()
+            elif discard is not None and not task.cancelled() and task.exception() is None:
+                discard(task.result())
@@ -0,0 +1,242 @@
+"""
+Model Routing.
+
+Per-call-site model cascades. Each call site (parse, opening, NPC reply)
+names a route: an ordered list of tiers, cheapest first. A tier's answer
+is accepted unless the call site's check rejects it (schema failure) or
+rates it below the tier's min_confidence, in which case the next, stronger
+tier is asked. A tier that is unavailable (timeouts, open circuit) is also
+skipped. Every answer is tagged with the tier that produced it.
+
+Routes are configuration: DEFAULT_ROUTES can be overridden per site with a
+JSON file named by LLM_ROUTES, e.g.
+
+    {"npc_reply": [{"model": "anthropic/claude-3.5-haiku", "min_confidence": 0.5},
+                   {"model": "anthropic/claude-sonnet-4"}]}
+"""
+
+import json
+import os
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from kings_paradox.prototype import llm
+from kings_paradox.prototype.llm import Completion
+from kings_paradox.prototype.policy import LLMUnavailableError
+
+FAST_MODEL = "anthropic/claude-3.5-haiku"
+STRONG_MODEL = "anthropic/claude-sonnet-4"
+
+
+@dataclass(frozen=True)
+class Tier:
+    """One model in a cascade."""
+
+    model: str
+    min_confidence: float = 0.0  # Escalate when the check rates an answer below this
+    temperature: float | None = None  # Overrides the call site's temperature
+
+    @classmethod
+    def from_dict(cls, data: dict | str) -> "Tier":
+        return cls(model=data) if isinstance(data, str) else cls(**data)
+
+
+DEFAULT_ROUTES: dict[str, list[Tier]] = {
+    # Usually a trivial classification: let the fast model answer when it is sure
+    "parse": [Tier(FAST_MODEL, min_confidence=0.7), Tier(STRONG_MODEL)],
+    "parse_repair": [Tier(STRONG_MODEL)],
+    "opening": [Tier(FAST_MODEL), Tier(STRONG_MODEL)],
+    # Character voice is the product; replies go straight to the strong model
+    "npc_reply": [Tier(STRONG_MODEL)],
+    "cast_reply": [Tier(STRONG_MODEL)],
+    # Background compaction of conversation memory; nobody waits on it
+    "summary": [Tier(FAST_MODEL)],
+}
+
+
+def load_routes(path: str | None = None) -> dict[str, list[Tier]]:
+    """Return DEFAULT_ROUTES with any sites overridden by a JSON routes file."""
+    routes = dict(DEFAULT_ROUTES)
+    path = path or os.getenv("LLM_ROUTES")
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        for site, tiers in overrides.items():
+            routes[site] = [Tier.from_dict(tier) for tier in tiers]
+    return routes
+
+
+_routes = load_routes()
+
+# (site, model) -> answers accepted; ("escalations", site) -> times a tier was passed over
+routing_stats: Counter[tuple[str, str]] = Counter()
+
+
+def get_route(site: str) -> list[Tier]:
+    """Return the cascade for a call site."""
+    if site not in _routes:
+        raise ValueError(f"No route for call site: {site!r}")
+    return _routes[site]
+
+
+def set_route(site: str, tiers: list[Tier]) -> None:
+    """Replace (or add) the cascade for a call site."""
+    if not tiers:
+        raise ValueError("A route needs at least one tier")
+    _routes[site] = list(tiers)
+
+
+def reset_routes() -> None:
+    """Reload routes from DEFAULT_ROUTES and LLM_ROUTES."""
+    global _routes
+    _routes = load_routes()
+
+
+@dataclass
+class RoutedCompletion:
+    """A completion plus the cascade tier that produced it."""
+
+    completion: Completion
+    site: str
+    tier: int  # Index into the route; 0 = cheapest
+    confidence: float | None  # From the check; None = rejected (last tier only)
+
+    @property
+    def text(self) -> str:
+        return self.completion.text
+
+    @property
+    def model(self) -> str:
+        return self.completion.model
+
+
+# Builds the messages for a model (prompt layout can depend on the provider)
+Messages = list[dict] | Callable[[str], list[dict]]
+# Rates an answer from 0 to 1; None rejects it outright
+Check = Callable[[str], float | None]
+
+
+def _messages_for(messages: Messages, model: str) -> list[dict]:
+    return messages(model) if callable(messages) else messages
+
+
+def _accept(site: str, tiers: list[Tier], i: int, confidence: float | None) -> bool:
+    """Whether tier i's answer stands; the last tier's answer always does."""
+    if i == len(tiers) - 1:
+        return True
+    if confidence is not None and confidence >= tiers[i].min_confidence:
+        return True
+    routing_stats[("escalations", site)] += 1
+    return False
+
+
+def _answered(site: str, tiers: list[Tier], i: int, completion: Completion,
+              confidence: float | None) -> RoutedCompletion:
+    routing_stats[(site, tiers[i].model)] += 1
+    return RoutedCompletion(completion=completion, site=site, tier=i, confidence=confidence)
+
+
+def route(
+    site: str,
+    messages: Messages,
+    *,
+    check: Check | None = None,
+    temperature: float | None = None,
+    **kwargs: Any,
+) -> RoutedCompletion:
+    """
+    Run a call site's cascade with llm.complete.
+
+    Args:
+        site: Route name (see DEFAULT_ROUTES)
+        messages: Chat messages, or a function building them for a model
+        check: Rates each answer; escalates below the tier's min_confidence
+        temperature: Default sampling temperature (a tier may override it)
+        **kwargs: Passed through to llm.complete
+
+    Raises:
+        LLMUnavailableError: Every tier was unavailable
+    """
+    tiers = get_route(site)
+    for i, tier in enumerate(tiers):
+        try:
+            completion = llm.complete(
+                _messages_for(messages, tier.model),
+                model=tier.model,
+                temperature=tier.temperature if tier.temperature is not None else temperature,
+                **kwargs,
+            )
+        except LLMUnavailableError:
+            if i == len(tiers) - 1:
+                raise
+            routing_stats[("escalations", site)] += 1
+            continue
+        confidence = check(completion.text) if check else 1.0
+        if _accept(site, tiers, i, confidence):
+            return _answered(site, tiers, i, completion, confidence)
+    raise AssertionError("unreachable")  # The last tier is always accepted
+
+
+async def aroute(
+    site: str,
+    messages: Messages,
+    *,
+    check: Check | None = None,
+    temperature: float | None = None,
+    **kwargs: Any,
+) -> RoutedCompletion:
+    """Async version of route, using llm.acomplete."""
+    tiers = get_route(site)
+    for i, tier in enumerate(tiers):
+        try:
+            completion = await llm.acomplete(
+                _messages_for(messages, tier.model),
+                model=tier.model,
+                temperature=tier.temperature if tier.temperature is not None else temperature,
+                **kwargs,
+            )
+        except LLMUnavailableError:
+            if i == len(tiers) - 1:
+                raise
+            routing_stats[("escalations", site)] += 1
+            continue
+        confidence = check(completion.text) if check else 1.0
+        if _accept(site, tiers, i, confidence):
+            return _answered(site, tiers, i, completion, confidence)
+    raise AssertionError("unreachable")
+
+
+async def astream(
+    site: str,
+    messages: Messages,
+    *,
+    temperature: float | None = None,
+    **kwargs: Any,
+) -> AsyncIterator[str]:
+    """
+    Stream from a call site's cascade.
+
+    Streamed text is shown as it arrives, so it can't be checked first:
+    the cascade only moves on when a tier fails before its first chunk.
+    """
+    tiers = get_route(site)
+    for i, tier in enumerate(tiers):
+        started = False
+        try:
+            async for chunk in llm.astream(
+                _messages_for(messages, tier.model),
+                model=tier.model,
+                temperature=tier.temperature if tier.temperature is not None else temperature,
+                **kwargs,
+            ):
+                if not started:
+                    started = True
+                    routing_stats[(site, tier.model)] += 1
+                yield chunk
+            return
+        except LLMUnavailableError:
+            if started or i == len(tiers) - 1:
+                raise
+            routing_stats[("escalations", site)] += 1
@@ -5,14 +5,24 @@ KP-eib: Scene constructor using real GameState
 Builds scenes from GameState, generates openings, manages NPC responses.
 """
 
-import os
+import json
+from collections import Counter
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
+from typing import Any, Literal
 from openai import OpenAI
-from dotenv import load_dotenv
 
+from kings_paradox.prototype import llm, routing, telemetry
+from kings_paradox.prototype.eventlog import EventLog
+from kings_paradox.prototype.flags import NPCFlag
+from kings_paradox.prototype.memory import ConversationMemory
+from kings_paradox.prototype.policy import CallPolicy, LLMUnavailableError
 from kings_paradox.prototype.state import GameState, NPC
 
-load_dotenv()
+
+# How a multi-NPC cast answers a line addressed to all of them: one call
+# per NPC ("sequential") or the whole cast in one structured call ("batched")
+ResponseMode = Literal["sequential", "batched"]
 
 
 @dataclass
@@ -22,17 +32,23 @@ class Scene:
     cast: list[NPC]
     opening: str
     context_packets: dict[str, dict]  # npc_id -> context
+    response_mode: ResponseMode = "sequential"  # Multi-NPC replies
 
 
 def get_client() -> OpenAI:
-    """Get OpenAI client configured for OpenRouter."""
-    return OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
+    """Get the shared OpenAI client configured for OpenRouter."""
+    return llm.get_client()
+
+
+# Default model for prompt layout; which model answers is set by routing
+MODEL = routing.STRONG_MODEL
 
+# Deadlines for scene generation; past them the scene degrades to stock prose
+POLICY = CallPolicy(timeout=30.0, deadline=60.0)
 
-MODEL = "anthropic/claude-sonnet-4"
+# Conversation so far: a plain list of {"player", "npc"[, "speaker"]} turns,
+# or a bounded ConversationMemory
+History = list[dict] | ConversationMemory
 
 
 # Personality frameworks - how different personality types make decisions
@@ -104,10 +120,57 @@ REMEMBER: The goal is dominance. Play the long game, strike when the moment is r
 }
 
 
-def build_context_packet(npc: NPC, state: GameState, scene_location: str) -> dict:
-    """Build a context packet for an NPC based on game state."""
-    recent_events = state.get_recent_events(since_day=max(1, state.day - 3))
+# Recent-event lines formatted for context packets
+packet_stats: Counter[str] = Counter()
+
 
+class EventLines:
+    """
+    The recent-event lines of one GameState's context packets.
+
+    Each event is formatted once: a build formats only the events logged
+    since the last one, and trims the window as the day moves on. Packets
+    themselves are built fresh every time; every turn logs an event, so a
+    packet could only ever be reused until the next line was spoken. The
+    list handed out is shared by the packets built until the next event;
+    treat it as read-only.
+    """
+
+    def __init__(self) -> None:
+        self._log: EventLog | None = None
+        self._end = 0  # Events of _log already formatted
+        self._since_day = 1
+        self._lines: list[tuple[int, str]] = []  # (day, line) for events since _since_day
+        self._recent: list[str] | None = None  # The lines as packets hold them
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> None:
+        return None  # A copied state formats its own lines
+
+    def recent(self, state: GameState) -> list[str]:
+        """Lines for the events of the last few days, formatting only new events."""
+        events = state.events
+        since_day = max(1, state.day - 3)
+        if events is not self._log or since_day < self._since_day:
+            # A different log, or earlier events are back in the window
+            self._log, self._end, self._lines, self._recent = events, 0, [], None
+        elif since_day > self._since_day:
+            self._lines = [(day, line) for day, line in self._lines if day >= since_day]
+            self._recent = None
+        self._since_day = since_day
+        for record in events.records(self._end):
+            if record.day >= since_day:
+                self._lines.append(
+                    (record.day, f"Day {record.day}: {record.event_type} - {record.details}")
+                )
+                packet_stats["event_lines"] += 1
+                self._recent = None
+        self._end = len(events)
+        if self._recent is None:
+            self._recent = [line for _, line in self._lines]
+        return self._recent
+
+
+def _packet(npc: NPC, recent_events: list[str], flags: tuple[bool, bool]) -> dict:
     return {
         "npc_id": npc.id,
         "name": npc.name,
@@ -118,26 +181,72 @@ def build_context_packet(npc: NPC, state: GameState, scene_location: str) -> dic
         "agenda": npc.agenda,
         "suspicion_of_player": npc.suspicion_of_player,
         "personality": npc.personality,
-        "recent_events": [
-            f"Day {e.day}: {e.event_type} - {e.details}"
-            for e in recent_events
-        ],
+        "recent_events": recent_events,
         "flags": {
-            "was_threatened": state.flags.get(f"{npc.id}_threatened", False),
-            "was_arrested": state.flags.get(f"{npc.id}_arrested", False),
+            "was_threatened": flags[0],
+            "was_arrested": flags[1],
         }
     }
 
 
-def generate_opening(
+def build_context_packet(npc: NPC, state: GameState, scene_location: str) -> dict:
+    """Build a context packet for an NPC based on game state."""
+    lines: EventLines | None = state._event_lines
+    if lines is None:
+        lines = state._event_lines = EventLines()
+    flags = (
+        state.flags.npc(npc.id, NPCFlag.THREATENED),
+        state.flags.npc(npc.id, NPCFlag.ARRESTED),
+    )
+    return _packet(npc, lines.recent(state), flags)
+
+
+# Static prompt text comes first so providers can cache it as a shared prefix
+OPENING_RULES = """Generate a scene opening for a text-based political intrigue game.
+
+INSTRUCTIONS:
+- Write 2-4 sentences of atmospheric prose
+- Show character states through body language and small details
+- End with the primary NPC's opening line of dialogue
+- Tone: Tense, literary, subtle
+- Do NOT explicitly state emotions or agendas - show them
+- Do NOT mention anything not established in context
+- Hidden tensions are shown through subtext, NOT explicit statements
+
+OUTPUT ONLY THE SCENE OPENING TEXT, NOTHING ELSE."""
+
+NPC_RULES = """You are voicing a character in a medieval political intrigue game.
+
+=== INSTRUCTIONS ===
+1. Respond in character (2-3 sentences)
+2. Your personality type MUST influence how you respond to pressure or threats
+3. You may ONLY reference knowledge listed in your character sheet
+4. If asked about something you don't know, admit ignorance
+5. Show emotion through subtext and body language, not explicit statements
+6. Your agenda should subtly influence your response
+
+OUTPUT your spoken dialogue with brief action/body language, nothing else."""
+
+CAST_RULES = """You are voicing several characters present together in a medieval political intrigue game.
+
+=== INSTRUCTIONS ===
+1. Write a response for EVERY character, in the order listed (2-3 sentences each)
+2. Each character's personality type MUST influence how they respond to pressure or threats
+3. A character may ONLY reference knowledge listed under their own name
+4. If asked about something they don't know, they admit ignorance
+5. Later speakers may react to earlier ones - allies support, rivals subtly undermine
+6. Show emotion through subtext and body language, not explicit statements
+
+OUTPUT JSON: an object mapping each character id to their spoken dialogue with brief action/body language."""
+
+
+def _opening_messages(
     location: str,
     cast: list[NPC],
     state: GameState,
-    context_packets: dict[str, dict],
-) -> str:
-    """Generate scene opening prose using LLM."""
-    client = get_client()
-
+    model: str = MODEL,
+) -> list[dict]:
+    """Build the scene opening prompt."""
     # Build cast description
     cast_desc = "\n".join(
         f"- {npc.name}: loyalty={npc.loyalty}, agenda='{npc.agenda}'"
@@ -154,7 +263,7 @@ def generate_opening(
     # Check for tension flags
     tensions = []
     for npc in cast:
-        if state.flags.get(f"{npc.id}_threatened"):
+        if state.flags.npc(npc.id, NPCFlag.THREATENED):
             tensions.append(f"{npc.name} was recently threatened by the King")
         if npc.loyalty < 30:
             tensions.append(f"{npc.name} has low loyalty ({npc.loyalty})")
@@ -163,9 +272,7 @@ def generate_opening(
 
     tensions_desc = "\n".join(f"- {t}" for t in tensions) or "- None apparent"
 
-    prompt = f"""Generate a scene opening for a text-based political intrigue game.
-
-LOCATION: {location}
+    scene = f"""LOCATION: {location}
 DAY: {state.day}
 
 CAST PRESENT:
@@ -174,55 +281,95 @@ CAST PRESENT:
 RECENT EVENTS:
 {events_desc}
 
-HIDDEN TENSIONS (show through subtext, NOT explicit statements):
-{tensions_desc}
+HIDDEN TENSIONS:
+{tensions_desc}"""
 
-INSTRUCTIONS:
-- Write 2-4 sentences of atmospheric prose
-- Show character states through body language and small details
-- End with the primary NPC's opening line of dialogue
-- Tone: Tense, literary, subtle
-- Do NOT explicitly state emotions or agendas - show them
-- Do NOT mention anything not established in context
+    return llm.cached_prompt([OPENING_RULES], scene, model)
 
-OUTPUT ONLY THE SCENE OPENING TEXT, NOTHING ELSE."""
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.8,
-        max_tokens=300,
-    )
-    return response.choices[0].message.content or ""
+def generate_opening(
+    location: str,
+    cast: list[NPC],
+    state: GameState,
+    context_packets: dict[str, dict],
+) -> str:
+    """Generate scene opening prose using LLM."""
+    try:
+        return routing.route(
+            "opening",
+            lambda model: _opening_messages(location, cast, state, model),
+            check=_check_prose,
+            temperature=0.8,
+            max_tokens=300,
+            policy=POLICY,
+        ).text
+    except LLMUnavailableError:
+        return _degraded_opening(location, cast)
+
+
+async def generate_opening_async(
+    location: str,
+    cast: list[NPC],
+    state: GameState,
+    context_packets: dict[str, dict],
+) -> str:
+    """Async version of generate_opening - does not block the event loop."""
+    try:
+        completion = await routing.aroute(
+            "opening",
+            lambda model: _opening_messages(location, cast, state, model),
+            check=_check_prose,
+            temperature=0.8,
+            max_tokens=300,
+            policy=POLICY,
+        )
+    except LLMUnavailableError:
+        return _degraded_opening(location, cast)
+    return completion.text
 
 
-def generate_npc_response(
-    npc: NPC,
-    player_input: str,
-    context: dict,
-    conversation_history: list[dict],
-) -> str:
-    """Generate an NPC's response to player input using 2-step pipeline."""
-    client = get_client()
+def _check_prose(text: str) -> float | None:
+    """Reject empty, truncated-looking or out-of-character prose."""
+    text = text.strip()
+    if len(text) < 20 or "as an ai" in text.lower():
+        return None
+    return 1.0
 
-    # Build conversation history
-    history_text = ""
-    if conversation_history:
-        history_text = "\n".join(
-            f"King: \"{turn['player']}\"\n{npc.name}: \"{turn['npc']}\""
-            for turn in conversation_history
-        )
-        history_text = f"\n=== PREVIOUS IN THIS SCENE ===\n{history_text}\n"
 
-    # Build knowledge context
-    knows_text = "\n".join(f"- {k}" for k in context.get("knows", [])) or "- Nothing secret"
-    events_text = "\n".join(context.get("recent_events", [])) or "- None"
+# === Degraded path ===
+# Stock prose used when the LLM is unavailable, so the scene carries on.
+
+
+def _degraded_opening(location: str, cast: list[NPC]) -> str:
+    names = ", ".join(npc.name for npc in cast) or "No one"
+    return f"The {location.replace('_', ' ')} is hushed. {names} await your word, Your Majesty."
+
 
-    # Get personality framework
+def _degraded_response(npc: NPC) -> str:
+    return (
+        f"{npc.name} hesitates, studying you in silence. "
+        "\"Forgive me, Your Majesty. I must weigh my words.\""
+    )
+
+
+async def _degrade_stream(chunks: AsyncIterator[str], fallback: str) -> AsyncIterator[str]:
+    """Pass a stream through, substituting `fallback` if the LLM fails."""
+    started = False
+    try:
+        async for chunk in chunks:
+            started = True
+            yield chunk
+    except LLMUnavailableError:
+        yield "..." if started else fallback
+
+
+def _personality_framework(context: dict) -> str:
     personality = context.get("personality", "calculator")
-    personality_framework = PERSONALITY_FRAMEWORKS.get(personality, PERSONALITY_FRAMEWORKS["calculator"])
+    return PERSONALITY_FRAMEWORKS.get(personality, PERSONALITY_FRAMEWORKS["calculator"])
+
 
-    # Determine emotional state from context
+def _emotional_state(context: dict) -> str:
+    """Determine emotional state from context."""
     emotional_hints = []
     if context["flags"].get("was_threatened"):
         emotional_hints.append("nervous, fearful")
@@ -230,62 +377,323 @@ def generate_npc_response(
         emotional_hints.append("resentful, guarded")
     if context["suspicion_of_player"] > 50:
         emotional_hints.append("suspicious, paranoid")
-    emotional_state = ", ".join(emotional_hints) or "composed, formal"
+    return ", ".join(emotional_hints) or "composed, formal"
+
+
+def _history_text(conversation_history: History, speaker: str) -> str:
+    """Render earlier turns; a turn's "speaker" overrides the default NPC name."""
+    if isinstance(conversation_history, ConversationMemory):
+        return conversation_history.render(speaker)
+    if not conversation_history:
+        return ""
+    history_text = "\n".join(
+        (f"King: \"{turn['player']}\"\n" if turn['player'] else "")
+        + f"{turn.get('speaker', speaker)}: \"{turn['npc']}\""
+        for turn in conversation_history
+    )
+    return f"\n=== PREVIOUS IN THIS SCENE ===\n{history_text}\n"
 
-    prompt = f"""You are {npc.name} in a medieval political intrigue game.
 
-=== YOUR PERSONALITY TYPE ===
-{personality_framework}
+def _character_sheet(npc: NPC, context: dict, with_personality: bool = True) -> str:
+    """The slow-changing part of an NPC's prompt: personality, agenda, knowledge."""
+    knows_text = "\n".join(f"- {k}" for k in context.get("knows", [])) or "- Nothing secret"
+    personality = (
+        f"--- Personality type ---\n{_personality_framework(context)}\n\n"
+        if with_personality
+        else ""
+    )
+    return f"""=== CHARACTER: {npc.name} (id: {npc.id}) ===
+{personality}--- Agenda ---
+{context.get('agenda', 'serve the crown')}
+
+--- What {npc.name} knows ---
+{knows_text}"""
+
+
+def _current_state(npc: NPC, context: dict) -> str:
+    return (
+        f"{npc.name} - Emotional state: {_emotional_state(context)}; "
+        f"Loyalty to King: {context.get('loyalty', 50)}/100"
+    )
 
-=== YOUR CURRENT STATE ===
-Agenda: {context.get('agenda', 'serve the crown')}
-Emotional state: {emotional_state}
-Loyalty to King: {context.get('loyalty', 50)}/100
 
-=== WHAT YOU KNOW ===
-{knows_text}
+def _npc_messages(
+    npc: NPC,
+    player_input: str,
+    context: dict,
+    conversation_history: History,
+    previous_responses: list[tuple[str, str]] | None = None,
+    model: str = MODEL,
+) -> list[dict]:
+    """
+    Build the NPC response prompt.
+
+    Rules, then the personality framework, then the character sheet form a
+    stable prefix shared across turns (and across NPCs with the same
+    personality); only the tail below changes turn to turn.
+    """
+    # Build conversation history
+    history_text = _history_text(conversation_history, npc.name)
+
+    # What other cast members just said this turn (sequential multi-NPC mode)
+    others_text = ""
+    if previous_responses:
+        others_text = "\n".join(f"{name}: \"{line}\"" for name, line in previous_responses)
+        others_text = f"\n=== WHAT OTHERS JUST SAID ===\n{others_text}\n"
+
+    events_text = "\n".join(context.get("recent_events", [])) or "- None"
+
+    tail = f"""You are {npc.name}.
+
+=== YOUR CURRENT STATE ===
+{_current_state(npc, context)}
 
 === RECENT EVENTS YOU'RE AWARE OF ===
 {events_text}
 {history_text}
 === THE KING SAYS ===
 "{player_input}"
+{others_text}"""
 
-=== INSTRUCTIONS ===
-1. Respond in character (2-3 sentences)
-2. Your personality type MUST influence how you respond to pressure or threats
-3. You may ONLY reference knowledge listed above
-4. If asked about something you don't know, admit ignorance
-5. Show emotion through subtext and body language, not explicit statements
-6. Your agenda should subtly influence your response
+    return llm.cached_prompt(
+        [
+            NPC_RULES,
+            f"=== YOUR PERSONALITY TYPE ===\n{_personality_framework(context)}",
+            _character_sheet(npc, context, with_personality=False),
+        ],
+        tail,
+        model,
+    )
 
-OUTPUT your spoken dialogue with brief action/body language, nothing else."""
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.8,
-        max_tokens=250,
+def _cast_messages(
+    cast: list[NPC],
+    player_input: str,
+    context_packets: dict[str, dict],
+    conversation_history: History,
+    model: str = MODEL,
+) -> list[dict]:
+    """Build a single prompt that voices every cast member at once."""
+    sheets_text = "\n\n".join(
+        _character_sheet(npc, context_packets.get(npc.id, {})) for npc in cast
+    )
+    states_text = "\n".join(
+        _current_state(npc, context_packets.get(npc.id, {})) for npc in cast
     )
-    return response.choices[0].message.content or ""
 
+    # Recent events are court-wide, so every packet carries the same list
+    first = context_packets.get(cast[0].id, {}) if cast else {}
+    events_text = "\n".join(first.get("recent_events", [])) or "- None"
+    history_text = _history_text(conversation_history, cast[0].name if cast else "")
 
-def construct_scene(
-    state: GameState,
+    tail = f"""=== CURRENT STATE ===
+{states_text}
+
+=== RECENT EVENTS THEY ARE AWARE OF ===
+{events_text}
+{history_text}
+=== THE KING SAYS ===
+"{player_input}"
+"""
+
+    return llm.cached_prompt([CAST_RULES, sheets_text], tail, model)
+
+
+def _cast_schema(cast: list[NPC]) -> dict:
+    """JSON schema with one required dialogue field per cast member."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "cast_responses",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    npc.id: {
+                        "type": "string",
+                        "description": f"{npc.name}'s dialogue with brief action/body language",
+                    }
+                    for npc in cast
+                },
+                "required": [npc.id for npc in cast],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def stream_opening(
     location: str,
-    required_npcs: list[str],
-) -> Scene | None:
+    cast: list[NPC],
+    state: GameState,
+    context_packets: dict[str, dict],
+) -> AsyncIterator[str]:
+    """Stream the scene opening token-by-token as it is generated."""
+    return _degrade_stream(
+        routing.astream(
+            "opening",
+            lambda model: _opening_messages(location, cast, state, model),
+            temperature=0.8,
+            max_tokens=300,
+            policy=POLICY,
+        ),
+        _degraded_opening(location, cast),
+    )
+
+
+def generate_npc_response(
+    npc: NPC,
+    player_input: str,
+    context: dict,
+    conversation_history: History,
+) -> str:
+    """Generate an NPC's response to player input using 2-step pipeline."""
+    try:
+        return routing.route(
+            "npc_reply",
+            lambda model: _npc_messages(
+                npc, player_input, context, conversation_history, model=model
+            ),
+            check=_check_prose,
+            temperature=0.8,
+            max_tokens=250,
+            policy=POLICY,
+        ).text
+    except LLMUnavailableError:
+        return _degraded_response(npc)
+
+
+async def generate_npc_response_async(
+    npc: NPC,
+    player_input: str,
+    context: dict,
+    conversation_history: History,
+) -> str:
+    """Async version of generate_npc_response - does not block the event loop."""
+    try:
+        completion = await routing.aroute(
+            "npc_reply",
+            lambda model: _npc_messages(
+                npc, player_input, context, conversation_history, model=model
+            ),
+            check=_check_prose,
+            temperature=0.8,
+            max_tokens=250,
+            policy=POLICY,
+        )
+    except LLMUnavailableError:
+        return _degraded_response(npc)
+    return completion.text
+
+
+def stream_npc_response(
+    npc: NPC,
+    player_input: str,
+    context: dict,
+    conversation_history: History,
+) -> AsyncIterator[str]:
+    """Stream an NPC's response token-by-token as it is generated."""
+    return _degrade_stream(
+        routing.astream(
+            "npc_reply",
+            lambda model: _npc_messages(
+                npc, player_input, context, conversation_history, model=model
+            ),
+            temperature=0.8,
+            max_tokens=250,
+            policy=POLICY,
+        ),
+        _degraded_response(npc),
+    )
+
+
+async def generate_cast_responses_async(
+    cast: list[NPC],
+    player_input: str,
+    context_packets: dict[str, dict],
+    conversation_history: History,
+    mode: ResponseMode = "sequential",
+) -> dict[str, str]:
     """
-    Construct a scene from game state.
+    Generate every cast member's response to the King, in cast order.
 
-    Args:
-        state: Current game state
-        location: Where the scene takes place
-        required_npcs: NPC IDs that must be present
+    "sequential" makes one call per NPC, each seeing what the earlier ones
+    said. "batched" voices the whole cast in a single structured call, falling
+    back to sequential calls for any NPC the batched output omits (or for
+    the whole cast if the batched call fails).
 
     Returns:
-        Scene object or None if scene cannot be constructed
+        npc_id -> response text
     """
+    responses: dict[str, str] = {}
+    if mode == "batched" and len(cast) > 1:
+        try:
+            completion = await routing.aroute(
+                "cast_reply",
+                lambda model: _cast_messages(
+                    cast, player_input, context_packets, conversation_history, model
+                ),
+                check=lambda text: 1.0 if _parse_json_object(text) else None,
+                temperature=0.8,
+                max_tokens=250 * len(cast),
+                response_format=_cast_schema(cast),
+                policy=POLICY,
+            )
+            parsed = _parse_json_object(completion.text)
+        except LLMUnavailableError:
+            parsed = {}
+        responses = {
+            npc.id: parsed[npc.id].strip()
+            for npc in cast
+            if isinstance(parsed.get(npc.id), str) and parsed[npc.id].strip()
+        }
+
+    for npc in cast:
+        if npc.id in responses:
+            continue
+        previous = [(other.name, responses[other.id]) for other in cast if other.id in responses]
+        try:
+            completion = await routing.aroute(
+                "npc_reply",
+                lambda model: _npc_messages(
+                    npc,
+                    player_input,
+                    context_packets.get(npc.id, {}),
+                    conversation_history,
+                    previous,
+                    model,
+                ),
+                check=_check_prose,
+                temperature=0.8,
+                max_tokens=250,
+                policy=POLICY,
+            )
+            responses[npc.id] = completion.text
+        except LLMUnavailableError:
+            responses[npc.id] = _degraded_response(npc)
+
+    return {npc.id: responses[npc.id] for npc in cast}
+
+
+def _parse_json_object(content: str) -> dict:
+    """Parse a JSON object from model output, tolerating markdown fences."""
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1] if "\n" in content else content
+        content = content.rsplit("```", 1)[0].strip()
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def _gather_cast(
+    state: GameState,
+    location: str,
+    required_npcs: list[str],
+) -> list[NPC] | None:
+    """Pick the scene cast, or None if a required NPC is unavailable."""
     # Gather cast
     cast = []
     for npc_id in required_npcs:
@@ -301,18 +709,76 @@ def construct_scene(
         if npc not in cast and len(cast) < 3:
             cast.append(npc)
 
+    return cast
+
+
+def _context_packets(cast: list[NPC], state: GameState, location: str) -> dict[str, dict]:
+    with telemetry.span("context", location=location, npcs=len(cast)):
+        return {npc.id: build_context_packet(npc, state, location) for npc in cast}
+
+
+def construct_scene(
+    state: GameState,
+    location: str,
+    required_npcs: list[str],
+) -> Scene | None:
+    """
+    Construct a scene from game state.
+
+    Args:
+        state: Current game state
+        location: Where the scene takes place
+        required_npcs: NPC IDs that must be present
+
+    Returns:
+        Scene object or None if scene cannot be constructed
+    """
+    cast = _gather_cast(state, location, required_npcs)
+    if cast is None:
+        return None
+
     # Build context packets
-    context_packets = {
-        npc.id: build_context_packet(npc, state, location)
-        for npc in cast
-    }
+    context_packets = _context_packets(cast, state, location)
 
     # Generate opening
-    opening = generate_opening(location, cast, state, context_packets)
+    with telemetry.span("opening", location=location):
+        opening = generate_opening(location, cast, state, context_packets)
+
+    return Scene(
+        location=location,
+        cast=cast,
+        opening=opening,
+        context_packets=context_packets,
+    )
+
+
+async def construct_scene_async(
+    state: GameState,
+    location: str,
+    required_npcs: list[str],
+    with_opening: bool = True,
+    response_mode: ResponseMode = "sequential",
+) -> Scene | None:
+    """
+    Async version of construct_scene - the opening is generated without blocking.
+
+    With with_opening=False the scene is returned with an empty opening so the
+    caller can stream it instead (see stream_opening).
+    """
+    cast = _gather_cast(state, location, required_npcs)
+    if cast is None:
+        return None
+
+    context_packets = _context_packets(cast, state, location)
+    opening = ""
+    if with_opening:
+        with telemetry.span("opening", location=location):
+            opening = await generate_opening_async(location, cast, state, context_packets)
 
     return Scene(
         location=location,
         cast=cast,
         opening=opening,
         context_packets=context_packets,
+        response_mode=response_mode,
     )
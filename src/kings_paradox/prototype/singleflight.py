@@ -0,0 +1,119 @@
+"""
+Single-Flight Coalescing.
+
+Concurrent identical requests share one upstream call: the first caller for
+a key makes the call and later callers wait for its result, rather than
+each paying for their own. Once the call lands the key is free again, so
+this only merges overlapping calls (the response cache handles the rest).
+"""
+
+import asyncio
+import threading
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar, cast
+
+T = TypeVar("T")
+
+# "leaders" (upstream calls made), "coalesced" (callers that shared one),
+# "abandoned" (upstream calls cancelled because every waiter dropped out)
+flight_stats: Counter[str] = Counter()
+
+
+class _Flight(Generic[T]):
+    def __init__(self, task: "asyncio.Future[T]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent calls on one event loop.
+
+    The upstream call runs in its own task, so a waiter that is cancelled
+    only stops waiting; the call carries on for the others. If every waiter
+    drops out, the upstream call is cancelled too.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[str, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return fn()'s result, sharing an in-flight call for the same key."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._landed(key, flight))
+            flight_stats["leaders"] += 1
+        else:
+            flight_stats["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody needs the answer any more; later callers start afresh
+                self._forget(key, flight)
+                flight.task.cancel()
+                flight_stats["abandoned"] += 1
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _landed(self, key: str, flight: _Flight) -> None:
+        self._forget(key, flight)
+        if not flight.task.cancelled():
+            flight.task.exception()  # Mark retrieved; waiters re-raise it themselves
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesces concurrent blocking calls across threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Return fn()'s result, sharing an in-flight call for the same key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+                flight_stats["leaders"] += 1
+            else:
+                flight_stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return cast(T, call.result)
+
+        try:
+            result = call.result = fn()
+            return result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
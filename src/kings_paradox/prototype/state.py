@@ -5,8 +5,22 @@ KP-778: GameState data model with Pydantic
 This is the Hard System's source of truth.
 """
 
-from typing import Literal
-from pydantic import BaseModel, field_validator
+import weakref
+from collections.abc import ItemsView, ValuesView
+from dataclasses import dataclass, fields
+from typing import Any, Literal, NamedTuple, TypeVar, overload
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_serializer, field_validator
+
+from kings_paradox.prototype.eventlog import Event, EventLog
+from kings_paradox.prototype.flags import FlagRegistry, NPCFlag
+
+
+NPC_STATUSES = frozenset({"free", "imprisoned", "dead"})
+
+_T = TypeVar("_T")
+
+def _clamp(value: int) -> int:
+    return max(0, min(100, value))
 
 
 class NPC(BaseModel):
@@ -24,40 +38,421 @@ class NPC(BaseModel):
     agenda: str = ""  # Current hidden agenda
     personality: Literal["calculator", "loyalist", "coward", "schemer"] = "calculator"
 
+    # The owning table, told about field changes; weak, so undo() can tell a
+    # dropped table's records from a live one's (see NPCTable._adopt)
+    _table: "weakref.ref[NPCTable] | None" = PrivateAttr(default=None)
+    # Forks holding this record without owning it; see NPCTable.fork
+    _sharers: "list[weakref.ref[NPCTable]]" = PrivateAttr(default_factory=list)
+
+    def __eq__(self, other: object) -> bool:
+        # Field values only: the table links above aren't part of the record
+        if not isinstance(other, NPC):
+            return NotImplemented
+        return self.__dict__ == other.__dict__
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name not in type(self).model_fields:
+            super().__setattr__(name, value)
+            return
+        _unshare(self)
+        table = _owner(self)
+        if table is None:
+            super().__setattr__(name, value)
+            return
+        old = getattr(self, name)
+        super().__setattr__(name, value)
+        table._changed(self, name, old)
+
     @field_validator("status")
     @classmethod
     def validate_status(cls, v: str) -> str:
-        valid = {"free", "imprisoned", "dead"}
-        if v not in valid:
-            raise ValueError(f"status must be one of {valid}")
+        if v not in NPC_STATUSES:
+            raise ValueError(f"status must be one of {set(NPC_STATUSES)}")
         return v
 
     @field_validator("loyalty", mode="after")
     @classmethod
     def clamp_loyalty(cls, v: int) -> int:
-        return max(0, min(100, v))
+        return _clamp(v)
 
     @field_validator("suspicion_of_player", mode="after")
     @classmethod
     def clamp_suspicion(cls, v: int) -> int:
-        return max(0, min(100, v))
+        return _clamp(v)
 
 
-class Event(BaseModel):
-    """A logged event in the game history."""
+@dataclass(frozen=True, slots=True)
+class StatDelta:
+    """Changes to one NPC in a batch: relative stats, absolute status and location."""
 
-    day: int
-    event_type: str
-    details: dict = {}
+    loyalty: int = 0
+    suspicion_of_player: int = 0
+    status: str | None = None
+    location: str | None = None
+
+
+_STAT_DELTA_FIELDS = frozenset(field.name for field in fields(StatDelta))
+
+
+def _copy_record(npc: NPC) -> NPC:
+    """A copy of an NPC's fields, belonging to no table."""
+    copy = npc.model_copy(update={"knows": list(npc.knows)})
+    copy._table = None
+    copy._sharers = []
+    return copy
+
+
+def _owner(npc: NPC) -> "NPCTable | None":
+    """The table owning npc, if it is still alive."""
+    ref = npc._table
+    return None if ref is None else ref()
+
+
+def _unshare(npc: NPC) -> None:
+    """Before npc is written, give each fork still sharing it a copy of its current contents."""
+    for ref in npc._sharers:
+        table = ref()
+        if table is not None:
+            table._freeze(npc)
+    npc._sharers.clear()
+
+
+class NPCChange(NamedTuple):
+    """One field an update_npcs batch actually changed."""
+
+    npc_id: str
+    field: str
+    old: Any
+    new: Any
+
+
+class NPCTable(dict[str, NPC]):
+    """
+    NPCs by id, with a location -> NPC-id index.
+
+    The index follows NPCs as they move: assigning npc.location updates it.
+    Each NPC record is owned by one table, which passes its field changes
+    on to the owning GameState (for the journal). A fork shares its
+    parent's records: the parent keeps owning them and reads them for
+    free, a write to one first leaves the fork a copy of its old contents,
+    and the fork takes its own copy when it looks one up. So a fork only
+    copies the records it touches or that change under it.
+    """
+
+    def __init__(self, npcs: dict[str, NPC] | None = None) -> None:
+        super().__init__()
+        self._by_location: dict[str, set[str]] = {}
+        self._order: dict[str, int] = {}  # Insertion order, for stable results
+        self._keys: dict[int, str] = {}  # id(npc) -> key
+        self._next_order = 0
+        self._owner: GameState | None = None
+        if npcs:
+            self.update(npcs)
+
+    def fork(self) -> "NPCTable":
+        """
+        A table sharing this one's NPC records; changes on either side stay separate.
+
+        This table keeps owning its records, so references into it stay
+        live. Costs O(NPCs) bookkeeping; no record is copied until written.
+        """
+        child = NPCTable()
+        dict.update(child, self)
+        child._by_location = {location: set(ids) for location, ids in self._by_location.items()}
+        child._order = dict(self._order)
+        child._keys = dict(self._keys)
+        child._next_order = self._next_order
+        ref = weakref.ref(child)
+        for npc in dict.values(self):
+            npc._sharers.append(ref)
+        return child
+
+    def _freeze(self, npc: NPC) -> None:
+        """Swap a shared record, about to be written by its owner, for a copy of our own."""
+        npc_id = self._keys.get(id(npc))
+        if npc_id is None or dict.get(self, npc_id) is not npc:
+            return
+        self._own(npc_id, npc, _copy_record(npc))
+
+    def _own(self, npc_id: str, npc: NPC, copy: NPC) -> NPC:
+        dict.__setitem__(self, npc_id, copy)
+        del self._keys[id(npc)]
+        self._keys[id(copy)] = npc_id
+        copy._table = weakref.ref(self)
+        return copy
+
+    def _claim(self, npc_id: str, npc: NPC) -> NPC:
+        """Return this table's own copy of a record, copying it if it is shared."""
+        if _owner(npc) is self:
+            return npc
+        self._unregister(npc)
+        return self._own(npc_id, npc, _copy_record(npc))
+
+    def _unregister(self, npc: NPC) -> None:
+        npc._sharers = [ref for ref in npc._sharers if ref() is not self and ref() is not None]
+
+    def _adopt(self) -> None:
+        """
+        Own the held records whose owning table is gone.
+
+        Used when a checkpoint replaces the table it was forked from. Records
+        another live table still owns stay shared, so their owner's writes
+        still leave this table a copy.
+        """
+        for npc in dict.values(self):
+            if _owner(npc) is None:
+                self._unregister(npc)
+                npc._table = weakref.ref(self)
+
+    def __getitem__(self, npc_id: str) -> NPC:
+        return self._claim(npc_id, super().__getitem__(npc_id))
+
+    @overload
+    def get(self, npc_id: str, default: None = None, /) -> NPC | None: ...
+    @overload
+    def get(self, npc_id: str, default: NPC, /) -> NPC: ...
+    @overload
+    def get(self, npc_id: str, default: _T, /) -> NPC | _T: ...
+
+    def get(self, npc_id: str, default: Any = None, /) -> Any:
+        return self[npc_id] if npc_id in self else default
+
+    def values(self) -> ValuesView[NPC]:  # type: ignore[override]
+        self._claim_all()
+        return super().values()
+
+    def items(self) -> ItemsView[str, NPC]:  # type: ignore[override]
+        self._claim_all()
+        return super().items()
+
+    def _claim_all(self) -> None:
+        for npc_id, npc in list(dict.items(self)):
+            if _owner(npc) is not self:
+                self._claim(npc_id, npc)
+
+    def __setitem__(self, npc_id: str, npc: NPC) -> None:
+        if npc_id in self:
+            self._unindex(npc_id, dict.__getitem__(self, npc_id))
+        owner = _owner(npc)
+        if owner is not None and owner is not self:
+            npc = _copy_record(npc)  # Owned by another table
+        super().__setitem__(npc_id, npc)
+        if npc_id not in self._order:
+            self._order[npc_id] = self._next_order
+            self._next_order += 1
+        self._by_location.setdefault(npc.location, set()).add(npc_id)
+        self._keys[id(npc)] = npc_id
+        npc._table = weakref.ref(self)
+        if self._owner is not None:
+            self._owner._journaled("npc_put", npc_id=npc_id, npc=npc.model_dump())
+
+    def __delitem__(self, npc_id: str) -> None:
+        self._unindex(npc_id, dict.__getitem__(self, npc_id))
+        self._order.pop(npc_id, None)
+        super().__delitem__(npc_id)
+        if self._owner is not None:
+            self._owner._journaled("npc_del", npc_id=npc_id)
+
+    def update(self, *args: Any, **kwargs: NPC) -> None:
+        for npc_id, npc in dict(*args, **kwargs).items():
+            self[npc_id] = npc
+
+    def setdefault(self, npc_id: str, npc: NPC) -> NPC:
+        if npc_id not in self:
+            self[npc_id] = npc
+        return self[npc_id]
+
+    _MISSING = object()
+
+    def pop(self, npc_id: str, default: Any = _MISSING) -> Any:
+        if npc_id not in self:
+            if default is self._MISSING:
+                raise KeyError(npc_id)
+            return default
+        npc = dict.__getitem__(self, npc_id)
+        del self[npc_id]
+        return npc
+
+    def popitem(self) -> tuple[str, NPC]:
+        npc_id = next(reversed(self))
+        return npc_id, self.pop(npc_id)
+
+    def clear(self) -> None:
+        for npc_id in list(self):
+            del self[npc_id]
+
+    def at(self, location: str) -> list[NPC]:
+        """NPCs at a location, in the order they were added."""
+        ids = self._by_location.get(location)
+        if not ids:
+            return []
+        return [self[npc_id] for npc_id in sorted(ids, key=self._order.__getitem__)]
+
+    def _unindex(self, npc_id: str, npc: NPC) -> None:
+        ids = self._by_location.get(npc.location)
+        if ids is not None:
+            ids.discard(npc_id)
+            if not ids:
+                del self._by_location[npc.location]
+        self._keys.pop(id(npc), None)
+        if _owner(npc) is self:
+            npc._table = None
+
+    def _applied(self, changes: list[NPCChange]) -> None:
+        """Index and journal a batch of changes written straight to the records."""
+        for change in changes:
+            if change.field == "location":
+                self._move(change.npc_id, change.old, change.new)
+        if changes and self._owner is not None:
+            self._owner._journaled(
+                "npc_batch", changes=[[c.npc_id, c.field, c.new] for c in changes]
+            )
+
+    def _move(self, npc_id: str, old: str, new: str) -> None:
+        ids = self._by_location.get(old)
+        if ids is not None:
+            ids.discard(npc_id)
+            if not ids:
+                del self._by_location[old]
+        self._by_location.setdefault(new, set()).add(npc_id)
+
+    def _changed(self, npc: NPC, field: str, old: Any) -> None:
+        npc_id = self._keys.get(id(npc))
+        if npc_id is None:
+            return
+        if field == "location":
+            self._move(npc_id, old, npc.location)
+        if self._owner is not None:
+            self._owner._journaled("npc_set", npc_id=npc_id, field=field, value=getattr(npc, field))
 
 
 class GameState(BaseModel):
     """The complete game state - Hard System source of truth."""
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     day: int
-    npcs: dict[str, NPC] = {}
-    events: list[Event] = []
-    flags: dict[str, bool] = {}
+    npcs: NPCTable = Field(default_factory=NPCTable)
+    events: EventLog = Field(default_factory=EventLog)
+    flags: FlagRegistry = Field(default_factory=FlagRegistry)
+
+    _journal: Any = PrivateAttr(default=None)  # journal.Journal recording mutations
+    _history: Any = PrivateAttr(default=None)  # history.History recording mutations
+    _event_lines: Any = PrivateAttr(default=None)  # scene.EventLines for context packets
+    _undo: list["GameState"] = PrivateAttr(default_factory=list)  # checkpoint() stack
+
+    def __eq__(self, other: object) -> bool:
+        # Field values only, so a fork equals its parent until either changes
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return self.__dict__ == other.__dict__
+
+    @field_validator("npcs", mode="before")
+    @classmethod
+    def to_npc_table(cls, v: Any) -> NPCTable:
+        if isinstance(v, NPCTable):
+            return v
+        return NPCTable({npc_id: NPC.model_validate(npc) for npc_id, npc in v.items()})
+
+    @field_serializer("npcs")
+    def serialize_npcs(self, npcs: NPCTable) -> dict[str, dict]:
+        return {npc_id: npc.model_dump() for npc_id, npc in npcs.items()}
+
+    @field_validator("events", mode="before")
+    @classmethod
+    def to_event_log(cls, v: Any) -> EventLog:
+        return v if isinstance(v, EventLog) else EventLog(v)
+
+    @field_serializer("events")
+    def serialize_events(self, events: EventLog) -> list[dict]:
+        return events.to_list()
+
+    @field_validator("flags", mode="before")
+    @classmethod
+    def to_flag_registry(cls, v: Any) -> FlagRegistry:
+        return v if isinstance(v, FlagRegistry) else FlagRegistry(v)
+
+    @field_serializer("flags")
+    def serialize_flags(self, flags: FlagRegistry) -> dict[str, bool]:
+        return dict(flags)
+
+    def model_post_init(self, context: Any) -> None:
+        self.npcs = self.npcs  # Wrapped in an NPCTable by __setattr__
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "npcs":
+            if not isinstance(value, NPCTable):
+                value = NPCTable(value)
+            value._owner = self
+        elif name == "events" and not isinstance(value, EventLog):
+            value = EventLog(value)
+        elif name == "flags" and not isinstance(value, FlagRegistry):
+            value = FlagRegistry(value)
+        super().__setattr__(name, value)
+        if not self._recorded:
+            return
+        if name == "day":
+            self._journaled("day", value=value)
+        elif name in ("npcs", "events", "flags"):
+            self._rebased()  # Wholesale replacement: can't be expressed as mutations
+
+    @property
+    def _recorded(self) -> bool:
+        return self._journal is not None or self._history is not None
+
+    def _journaled(self, op: str, **args: Any) -> None:
+        """Record a mutation in the attached journal and history, if any."""
+        if self._journal is not None:
+            self._journal.record(op, args)
+        if self._history is not None:
+            self._history.record(op, args)
+
+    def _rebased(self) -> None:
+        """Restart the journal and history from the current state."""
+        if self._journal is not None:
+            self._journal.snapshot()
+        if self._history is not None:
+            self._history.rebase()
+
+    def fork(self) -> "GameState":
+        """
+        A copy-on-write copy of the state, for what-if branches and lookahead.
+
+        NPC records are shared until this state writes them or the fork looks
+        them up, the event log is shared as a prefix, flag bitsets are copied
+        by reference, and nothing is journaled. Cost is O(NPCs) for the NPC
+        table, independent of the event history.
+        """
+        child = GameState.model_construct(
+            day=self.day,
+            npcs=self.npcs.fork(),
+            events=self.events.fork(),
+            flags=self.flags.copy(),
+        )
+        child.npcs = child.npcs  # Take ownership of the forked table
+        return child
+
+    def checkpoint(self) -> None:
+        """Remember the current state so undo() can return to it."""
+        self._undo.append(self.fork())
+
+    def undo(self) -> bool:
+        """
+        Return to the last checkpoint; False if there is none.
+
+        Costs O(NPCs) to take over the checkpoint's records, plus a journal
+        snapshot and a history checkpoint when either is attached.
+        """
+        if not self._undo:
+            return False
+        saved = self._undo.pop()
+        for name in ("day", "npcs", "events", "flags"):
+            BaseModel.__setattr__(self, name, getattr(saved, name))
+        self.npcs._adopt()
+        self.npcs._owner = self
+        if self._recorded:
+            self._rebased()
+        return True
 
     def get_npc(self, npc_id: str) -> NPC | None:
         """Get an NPC by ID, or None if not found."""
@@ -69,27 +464,89 @@ class GameState(BaseModel):
         if npc is None:
             return
 
-        npc.status = "imprisoned"
-        npc.location = "dungeon"
-        self.flags[f"{npc_id}_arrested"] = True
+        self.update_npcs({npc_id: StatDelta(status="imprisoned", location="dungeon")})
+        self.set_npc_flag(npc_id, NPCFlag.ARRESTED)
         self.log_event("arrest", {"target": npc_id})
 
     def update_loyalty(self, npc_id: str, delta: int) -> None:
         """Update an NPC's loyalty by delta, clamping to 0-100."""
-        npc = self.npcs.get(npc_id)
-        if npc is None:
-            return
+        if npc_id in self.npcs:
+            self.update_npcs({npc_id: StatDelta(loyalty=delta)})
+
+    def update_npcs(self, deltas: dict[str, StatDelta | dict]) -> list[NPCChange]:
+        """
+        Apply a batch of stat changes to many NPCs at once.
 
-        # Manually clamp since validator doesn't run on mutation
-        npc.loyalty = max(0, min(100, npc.loyalty + delta))
+        The whole batch is checked before anything is written: loyalty and
+        suspicion are clamped to 0-100 and statuses validated once here, so
+        the writes go straight to the records without per-field pydantic
+        work. Nothing changes if any entry is invalid.
+
+        Args:
+            deltas: NPC id -> StatDelta (or a dict of its fields)
+
+        Returns:
+            The fields that actually changed, in batch order
+
+        Raises:
+            KeyError: An NPC id isn't in the state
+            ValueError: An unknown field, an unknown status or an empty location
+        """
+        planned = []
+        for npc_id, delta in deltas.items():
+            if not isinstance(delta, StatDelta):
+                unknown = set(delta) - _STAT_DELTA_FIELDS
+                if unknown:
+                    raise ValueError(f"unknown StatDelta field {min(unknown)!r} for {npc_id}")
+                delta = StatDelta(**delta)
+            if npc_id not in self.npcs:
+                raise KeyError(npc_id)
+            if delta.status is not None and delta.status not in NPC_STATUSES:
+                raise ValueError(f"status must be one of {set(NPC_STATUSES)}")
+            if delta.location is not None and not delta.location:
+                raise ValueError("location must not be empty")
+            npc = self.npcs[npc_id]
+            values: dict[str, Any] = {}
+            if delta.loyalty:
+                values["loyalty"] = _clamp(npc.loyalty + delta.loyalty)
+            if delta.suspicion_of_player:
+                values["suspicion_of_player"] = _clamp(
+                    npc.suspicion_of_player + delta.suspicion_of_player
+                )
+            if delta.status is not None:
+                values["status"] = delta.status
+            if delta.location is not None:
+                values["location"] = delta.location
+            planned.append((npc_id, npc, values))
+
+        changes: list[NPCChange] = []
+        for npc_id, npc, values in planned:
+            for field, value in values.items():
+                old = npc.__dict__[field]
+                if old == value:
+                    continue
+                _unshare(npc)
+                npc.__dict__[field] = value  # Checked above; skips NPC.__setattr__
+                npc.__pydantic_fields_set__.add(field)
+                changes.append(NPCChange(npc_id, field, old, value))
+        self.npcs._applied(changes)
+        return changes
 
     def log_event(self, event_type: str, details: dict) -> None:
         """Log an event to the game history."""
-        self.events.append(Event(day=self.day, event_type=event_type, details=details))
+        self.events.log(self.day, event_type, details)
+        self._journaled("event", day=self.day, event_type=event_type, details=details)
 
     def set_flag(self, flag_name: str, value: bool) -> None:
         """Set a game flag."""
         self.flags[flag_name] = value
+        self._journaled("flag", name=flag_name, value=value)
+
+    def set_npc_flag(self, npc_id: str, flag: NPCFlag, value: bool = True) -> None:
+        """Set a per-NPC flag (threatened, arrested)."""
+        self.flags.set_npc(npc_id, flag, value)
+        if self._recorded:
+            self._journaled("flag", name=f"{npc_id}_{flag.value}", value=value)
 
     def advance_day(self) -> None:
         """Move to the next day."""
@@ -97,8 +554,8 @@ class GameState(BaseModel):
 
     def get_npcs_at_location(self, location: str) -> list[NPC]:
         """Get all NPCs at a given location."""
-        return [npc for npc in self.npcs.values() if npc.location == location]
+        return self.npcs.at(location)
 
     def get_recent_events(self, since_day: int) -> list[Event]:
         """Get events from a given day onwards."""
-        return [e for e in self.events if e.day >= since_day]
+        return self.events.since(since_day)
@@ -0,0 +1,264 @@
+"""
+Turn Telemetry.
+
+Tracing spans for the game pipeline (turn, parse, consequences, context
+building, NPC generation) with per-LLM-call wall time, time-to-first-token,
+token counts, cached tokens, model and estimated cost. Finished spans are
+appended to a JSONL trace file and summarized in an end-of-session report.
+
+Tracing is off until start_tracing() is called; until then span() is a
+no-op and LLM calls aren't recorded.
+"""
+
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Price:
+    """USD per million tokens."""
+
+    prompt: float
+    completion: float
+    cached: float  # Prompt tokens read from the provider's prompt cache
+
+
+# Estimates only: cache writes and provider markups aren't modelled
+PRICES: dict[str, Price] = {
+    "anthropic/claude-3.5-haiku": Price(prompt=0.80, completion=4.00, cached=0.08),
+    "anthropic/claude-sonnet-4": Price(prompt=3.00, completion=15.00, cached=0.30),
+    "openai/gpt-4o-mini": Price(prompt=0.15, completion=0.60, cached=0.075),
+    "openai/gpt-4o": Price(prompt=2.50, completion=10.00, cached=1.25),
+}
+
+
+def estimate_cost(
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0,
+) -> float | None:
+    """Estimated USD cost of a call, or None for a model without a price."""
+    price = PRICES.get(model)
+    if price is None:
+        return None
+    uncached = prompt_tokens - cached_tokens
+    return (
+        uncached * price.prompt
+        + cached_tokens * price.cached
+        + completion_tokens * price.completion
+    ) / 1_000_000
+
+
+@dataclass
+class Span:
+    """One timed phase; attrs carry whatever the phase measured."""
+
+    name: str
+    span_id: int
+    parent_id: int | None
+    start: float  # Unix time
+    wall_ms: float = 0.0
+    attrs: dict = field(default_factory=dict)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class Tracer:
+    """Collects finished spans and writes each to a JSONL file (if given)."""
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path else None
+        self.spans: list[Span] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a") if self.path else None
+
+    def new_span(self, name: str, parent_id: int | None, attrs: dict) -> Span:
+        return Span(
+            name=name,
+            span_id=next(self._ids),
+            parent_id=parent_id,
+            start=time.time(),
+            attrs=attrs,
+        )
+
+    def finish(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+            if self._file is not None:
+                self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+                self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def report(self, counters: Mapping[str, Mapping] | None = None) -> str:
+        """
+        Summarize the session: wall time per phase, LLM tokens and cost per model.
+
+        Args:
+            counters: Extra named counters to append (routing, parse paths, ...)
+        """
+        lines = [
+            "Session telemetry",
+            "",
+            f"{'phase':<16}{'count':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}",
+        ]
+        by_name: dict[str, list[float]] = defaultdict(list)
+        for span in self.spans:
+            by_name[span.name].append(span.wall_ms)
+        for name, walls in sorted(by_name.items()):
+            walls.sort()
+            lines.append(
+                f"{name:<16}{len(walls):>6}{_quantile(walls, 0.5):>10.0f}"
+                f"{_quantile(walls, 0.95):>10.0f}{walls[-1]:>10.0f}"
+            )
+
+        models: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        ttfts: dict[str, list[float]] = defaultdict(list)
+        for span in self.spans:
+            if span.name != "llm":
+                continue
+            totals = models[span.attrs.get("model", "?")]
+            totals["calls"] += 0 if span.attrs.get("coalesced") else 1
+            for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+                totals[key] += span.attrs.get(key, 0)
+            totals["cost"] += span.attrs.get("cost") or 0.0
+            if span.attrs.get("ttft_ms") is not None:
+                ttfts[span.attrs.get("model", "?")].append(span.attrs["ttft_ms"])
+        if models:
+            lines += ["", (
+                f"{'model':<30}{'calls':>6}{'prompt':>9}{'cached':>9}"
+                f"{'output':>10}{'p50 ttft':>10}{'cost $':>10}"
+            )]
+            for model, totals in sorted(models.items()):
+                ttft = sorted(ttfts[model])
+                lines.append(
+                    f"{model:<30}{totals['calls']:>6.0f}{totals['prompt_tokens']:>9.0f}"
+                    f"{totals['cached_tokens']:>9.0f}{totals['completion_tokens']:>10.0f}"
+                    f"{(f'{_quantile(ttft, 0.5):.0f}' if ttft else '-'):>10}"
+                    f"{totals['cost']:>10.4f}"
+                )
+            total_cost = sum(totals["cost"] for totals in models.values())
+            lines.append(f"Estimated total cost: ${total_cost:.4f}")
+
+        for title, counter in (counters or {}).items():
+            if counter:
+                values = ", ".join(f"{_label(k)}={v}" for k, v in sorted(counter.items(), key=str))
+                lines.append(f"{title}: {values}")
+        return "\n".join(lines)
+
+
+def _quantile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _label(key: object) -> str:
+    return "/".join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+_tracer: Tracer | None = None
+_current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def start_tracing(path: str | Path | None = None) -> Tracer:
+    """Start recording spans (to a JSONL file when path is given)."""
+    global _tracer
+    stop_tracing()
+    _tracer = Tracer(path)
+    return _tracer
+
+
+def stop_tracing() -> None:
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span | None]:
+    """
+    Time a phase as a child of the current span.
+
+    Yields the Span (None while tracing is off) so the phase can add attrs.
+    Tasks started inside the block inherit it as their parent.
+    """
+    tracer = _tracer
+    if tracer is None:
+        yield None
+        return
+    parent = _current.get()
+    current = tracer.new_span(name, parent.span_id if parent else None, attrs)
+    token = _current.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as exc:
+        current.set(error=type(exc).__name__)
+        raise
+    finally:
+        current.wall_ms = (time.perf_counter() - started) * 1000
+        _current.reset(token)
+        tracer.finish(current)
+
+
+def record_llm(
+    model: str,
+    wall: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    cached_tokens: int = 0,
+    ttft: float | None = None,
+    **attrs: Any,
+) -> None:
+    """
+    Record a finished LLM call (times in seconds) under the current span.
+
+    Calls answered without the provider (attrs cached=True or replayed=True)
+    are recorded at zero cost. A call that shared another caller's upstream
+    request (coalesced=True) is recorded with no tokens either, and the
+    report doesn't count it as a call: the leader's record covers it.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return
+    if attrs.get("coalesced"):
+        prompt_tokens = completion_tokens = cached_tokens = 0
+    billed = not (attrs.get("cached") or attrs.get("replayed") or attrs.get("coalesced"))
+    parent = _current.get()
+    llm_span = tracer.new_span("llm", parent.span_id if parent else None, {
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": cached_tokens,
+        "ttft_ms": ttft * 1000 if ttft is not None else None,
+        "cost": (
+            estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+            if billed else 0.0
+        ),
+        **attrs,
+    })
+    llm_span.start -= wall
+    llm_span.wall_ms = wall * 1000
+    tracer.finish(llm_span)
@@ -1,6 +1,7 @@
 """Pytest configuration and shared fixtures for technical risk tests."""
 
 import os
+import re
 from pathlib import Path
 
 import pytest
@@ -34,6 +35,12 @@ def anthropic_api_key() -> str | None:
     return os.getenv("ANTHROPIC_API_KEY")
 
 
+@pytest.fixture(scope="session")
+def openrouter_api_key() -> str | None:
+    """Return OpenRouter API key (the LLM gateway's default provider) from environment."""
+    return os.getenv("OPENROUTER_API_KEY")
+
+
 @pytest.fixture
 def skip_if_no_openai(openai_api_key: str | None) -> None:
     """Skip test if OpenAI API key is not available."""
@@ -46,3 +53,86 @@ def skip_if_no_anthropic(anthropic_api_key: str | None) -> None:
     """Skip test if Anthropic API key is not available."""
     if not anthropic_api_key:
         pytest.skip("ANTHROPIC_API_KEY not set")
+
+
+@pytest.fixture
+def skip_if_no_openrouter(openrouter_api_key: str | None) -> None:
+    """Skip test if the gateway's OpenRouter API key is not available."""
+    if not openrouter_api_key:
+        pytest.skip("OPENROUTER_API_KEY not set")
+
+
+class FakeCompletions:
+    """Stand-in for client.chat.completions that answers from a callable."""
+
+    def __init__(self, respond) -> None:
+        self.respond = respond
+        self.calls: list[dict] = []
+
+    def _build(self, kwargs: dict):
+        from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+        self.calls.append(kwargs)
+        text = self.respond(kwargs)
+        if kwargs.get("stream"):
+            return [
+                ChatCompletionChunk.model_validate({
+                    "id": "fake", "object": "chat.completion.chunk", "created": 0,
+                    "model": kwargs["model"],
+                    "choices": [{"index": 0, "delta": {"content": word}}],
+                })
+                for word in re.findall(r"\S+\s*|\s+", text)
+            ]
+        return ChatCompletion.model_validate({
+            "id": "fake", "object": "chat.completion", "created": 0, "model": kwargs["model"],
+            "choices": [{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": text},
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        })
+
+    def create(self, **kwargs):
+        return self._build(kwargs)
+
+
+class FakeAsyncCompletions(FakeCompletions):
+    async def create(self, **kwargs):
+        result = self._build(kwargs)
+        if kwargs.get("stream"):
+            async def chunks():
+                for chunk in result:
+                    yield chunk
+            return chunks()
+        return result
+
+
+class FakeLLM:
+    """Fake sync + async clients sharing one call log."""
+
+    def __init__(self) -> None:
+        self.respond = lambda kwargs: "fake response"
+        self.sync = FakeCompletions(lambda kwargs: self.respond(kwargs))
+        self.async_ = FakeAsyncCompletions(lambda kwargs: self.respond(kwargs))
+
+    @property
+    def calls(self) -> list[dict]:
+        return self.sync.calls + self.async_.calls
+
+
+@pytest.fixture
+def fake_llm(monkeypatch) -> FakeLLM:
+    """Route every gateway call to a fake client; set fake_llm.respond to script replies."""
+    from types import SimpleNamespace
+
+    from kings_paradox.prototype import llm
+
+    fake = FakeLLM()
+    sync_client = SimpleNamespace(chat=SimpleNamespace(completions=fake.sync))
+    async_client = SimpleNamespace(chat=SimpleNamespace(completions=fake.async_))
+    monkeypatch.setattr(llm, "get_client", lambda provider=llm.DEFAULT_PROVIDER: sync_client)
+    monkeypatch.setattr(
+        llm, "get_async_client", lambda provider=llm.DEFAULT_PROVIDER: async_client
+    )
+    monkeypatch.setattr(llm, "_cache", None)
+    return fake
@@ -0,0 +1,125 @@
+"""
+Tests for the LLM response cache.
+"""
+
+import time
+
+import pytest
+
+from kings_paradox.prototype import llm
+from kings_paradox.prototype.cache import ResponseCache, cache_key
+from kings_paradox.prototype.scene import stream_npc_response
+
+MESSAGES = [{"role": "user", "content": "Speak, Duke."}]
+
+
+@pytest.fixture
+def cache(tmp_path) -> ResponseCache:
+    return ResponseCache(tmp_path / "llm.sqlite")
+
+
+class TestCacheKey:
+    """Tests for request hashing."""
+
+    def test_same_request_same_key(self):
+        assert cache_key("m", MESSAGES, 0.1, 200) == cache_key("m", list(MESSAGES), 0.1, 200)
+
+    def test_any_parameter_changes_key(self):
+        base = cache_key("m", MESSAGES, 0.1, 200, seed=1)
+        assert cache_key("other", MESSAGES, 0.1, 200, seed=1) != base
+        assert cache_key("m", MESSAGES, 0.2, 200, seed=1) != base
+        assert cache_key("m", MESSAGES, 0.1, 201, seed=1) != base
+        assert cache_key("m", MESSAGES, 0.1, 200, seed=2) != base
+
+
+class TestResponseCache:
+    """Tests for storage, eviction and statistics."""
+
+    def test_miss_then_hit(self, cache: ResponseCache):
+        assert cache.get("k") is None
+        cache.put("k", {"text": "hello"})
+        assert cache.get("k") == {"text": "hello"}
+
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+        assert stats.hit_rate == 0.5
+
+    def test_persists_across_instances(self, tmp_path):
+        ResponseCache(tmp_path / "c.sqlite").put("k", {"text": "kept"})
+        assert ResponseCache(tmp_path / "c.sqlite").get("k") == {"text": "kept"}
+
+    def test_evicts_least_recently_used_by_count(self, tmp_path):
+        cache = ResponseCache(tmp_path / "c.sqlite", max_entries=2)
+        cache.put("a", {"v": 1})
+        time.sleep(0.01)
+        cache.put("b", {"v": 2})
+        time.sleep(0.01)
+        cache.get("a")  # "b" is now least recently used
+        time.sleep(0.01)
+        cache.put("c", {"v": 3})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats().evictions == 1
+
+    def test_evicts_by_size(self, tmp_path):
+        cache = ResponseCache(tmp_path / "c.sqlite", max_entries=None, max_bytes=100)
+        for i in range(5):
+            cache.put(f"k{i}", {"text": "x" * 40})
+        assert cache.stats().size_bytes <= 100
+
+    def test_expires_by_age(self, tmp_path):
+        cache = ResponseCache(tmp_path / "c.sqlite", max_age=0.01)
+        cache.put("k", {"text": "stale"})
+        time.sleep(0.02)
+        assert cache.get("k") is None
+
+
+class TestGatewayCaching:
+    """Tests for the cache in front of llm.complete / acomplete / astream."""
+
+    def test_second_identical_call_is_served_from_cache(self, fake_llm, cache, monkeypatch):
+        monkeypatch.setattr(llm, "_cache", cache)
+
+        first = llm.complete(MESSAGES, model="m", temperature=0.1, max_tokens=50)
+        second = llm.complete(MESSAGES, model="m", temperature=0.1, max_tokens=50)
+
+        assert len(fake_llm.calls) == 1
+        assert first.cached is False
+        assert second.cached is True
+        assert second.text == first.text == "fake response"
+
+    def test_bypass_flag(self, fake_llm, cache, monkeypatch):
+        monkeypatch.setattr(llm, "_cache", cache)
+
+        llm.complete(MESSAGES, model="m", use_cache=False)
+        llm.complete(MESSAGES, model="m", use_cache=False)
+
+        assert len(fake_llm.calls) == 2
+        assert cache.stats().entries == 0
+
+    @pytest.mark.asyncio
+    async def test_async_and_stream_share_entries(self, fake_llm, cache, monkeypatch):
+        monkeypatch.setattr(llm, "_cache", cache)
+        fake_llm.respond = lambda kwargs: "I serve the crown."
+
+        streamed = "".join([c async for c in llm.astream(MESSAGES, model="m")])
+        completion = await llm.acomplete(MESSAGES, model="m")
+
+        assert streamed == "I serve the crown."
+        assert completion.cached is True
+        assert len(fake_llm.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_scene_streams_through_gateway(self, fake_llm):
+        from kings_paradox.prototype.state import NPC
+
+        npc = NPC(id="duke", name="Duke", status="free", loyalty=50, location="court")
+        context = {
+            "flags": {}, "loyalty": 50, "suspicion_of_player": 0, "personality": "schemer",
+        }
+        text = "".join([c async for c in stream_npc_response(npc, "Hello", context, [])])
+
+        assert text == "fake response"
+        assert fake_llm.calls[0]["stream"] is True
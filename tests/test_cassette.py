@@ -0,0 +1,159 @@
+"""
+Tests for LLM record/replay cassettes.
+"""
+
+import json
+import time
+
+import pytest
+
+from kings_paradox.prototype import game, llm
+from kings_paradox.prototype.cassette import Cassette, CassetteMissError, Interaction
+
+MESSAGES = [{"role": "user", "content": "Speak, Duke."}]
+
+
+@pytest.fixture(autouse=True)
+def no_cassette(monkeypatch):
+    monkeypatch.setattr(llm, "_cassette", None)
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Fail the test if anything tries to build a real client."""
+    def refuse(provider=llm.DEFAULT_PROVIDER):
+        raise AssertionError("network client requested during replay")
+
+    monkeypatch.setattr(llm, "get_client", refuse)
+    monkeypatch.setattr(llm, "get_async_client", refuse)
+
+
+class TestCassette:
+    """Tests for the cassette file format."""
+
+    def test_rejects_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            Cassette(tmp_path / "c.jsonl", mode="rewind")
+
+    def test_repeated_requests_play_in_order(self, tmp_path):
+        path = tmp_path / "c.jsonl"
+        recorder = Cassette(path, mode="record")
+        for text in ("first", "second"):
+            recorder.record(Interaction(
+                key="k", model="m", response={"text": text, "model": "m"}, latency=0.1,
+            ))
+
+        player = Cassette(path, mode="replay")
+        assert [player.play("k").response["text"] for _ in range(3)] == [
+            "first", "second", "second",
+        ]
+
+    def test_miss_raises(self, tmp_path):
+        path = tmp_path / "c.jsonl"
+        path.write_text("")
+        with pytest.raises(CassetteMissError):
+            Cassette(path).play("missing")
+
+    def test_recorded_delays(self, tmp_path):
+        interaction = Interaction(
+            key="k", model="m", response={}, latency=1.0, ttft=0.4, chunks=["a", "b", "c", "d"],
+        )
+        path = tmp_path / "c.jsonl"
+        path.write_text("")
+        assert Cassette(path, latency="none").delays(interaction) == (0.0, 0.0)
+        ttft, gap = Cassette(path, latency="recorded").delays(interaction)
+        assert ttft == 0.4
+        assert gap == pytest.approx(0.2)
+
+
+class TestGatewayRecordReplay:
+    """Tests for cassettes in front of llm.complete / acomplete / astream."""
+
+    def test_record_then_replay_offline(self, tmp_path, fake_llm, monkeypatch):
+        path = tmp_path / "session.jsonl"
+        llm.set_cassette(Cassette(path, mode="record"))
+        recorded = llm.complete(MESSAGES, model="m", temperature=0.8)
+        assert len(json.loads(path.read_text().splitlines()[0])["key"]) == 64
+
+        llm.set_cassette(Cassette(path, mode="replay"))
+        monkeypatch.setattr(llm, "get_client", None)  # Any client use would crash
+        replayed = llm.complete(MESSAGES, model="m", temperature=0.8)
+
+        assert replayed.text == recorded.text
+        assert len(fake_llm.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_replays_recorded_chunks(self, tmp_path, fake_llm):
+        path = tmp_path / "session.jsonl"
+        fake_llm.respond = lambda kwargs: "The Duke bows low."
+        llm.set_cassette(Cassette(path, mode="record"))
+        recorded = [c async for c in llm.astream(MESSAGES, model="m")]
+
+        llm.set_cassette(Cassette(path, mode="replay"))
+        replayed = [c async for c in llm.astream(MESSAGES, model="m")]
+
+        assert replayed == recorded
+        assert "".join(replayed) == "The Duke bows low."
+        assert len(fake_llm.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_replay_with_recorded_latency(self, tmp_path, offline):
+        path = tmp_path / "session.jsonl"
+        key = llm._request_key(llm._request(MESSAGES, "m", None, None, None, {}))
+        path.write_text(json.dumps({
+            "key": key, "model": "m", "response": {"text": "slow", "model": "m"},
+            "latency": 0.05,
+        }) + "\n")
+
+        llm.set_cassette(Cassette(path, mode="replay", latency="recorded"))
+        start = time.perf_counter()
+        completion = await llm.acomplete(MESSAGES, model="m")
+
+        assert completion.text == "slow"
+        assert time.perf_counter() - start >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_unrecorded_request_raises(self, tmp_path, offline):
+        path = tmp_path / "session.jsonl"
+        path.write_text("")
+        llm.set_cassette(Cassette(path, mode="replay"))
+        with pytest.raises(CassetteMissError):
+            await llm.acomplete(MESSAGES, model="m")
+
+
+class TestGameReplay:
+    """A recorded game session replays with no network access."""
+
+    INPUTS = ["1", "Tell me of the Baron.", "I take my leave.", "3"]
+
+    @staticmethod
+    def respond(kwargs: dict) -> str:
+        prompt = kwargs["messages"][-1]["content"]
+        if "Parse the player's input" in prompt:
+            if "I take my leave." in prompt:
+                return json.dumps({"action_type": "leave", "target": "", "details": {}})
+            return json.dumps({
+                "action_type": "speak",
+                "target": "duke_valerius",
+                "details": {"speech": "Tell me of the Baron."},
+            })
+        return "The Duke inclines his head."
+
+    def play(self, monkeypatch, options: game.GameOptions) -> None:
+        inputs = iter(self.INPUTS)
+        monkeypatch.setattr("builtins.input", lambda prompt="": next(inputs))
+        game.asyncio.run(game.main(options))
+
+    def test_main_replays_offline(self, tmp_path, fake_llm, monkeypatch, capsys):
+        path = str(tmp_path / "game.jsonl")
+        fake_llm.respond = self.respond
+        self.play(monkeypatch, game.GameOptions(cassette=path, cassette_mode="record"))
+        recorded_output = capsys.readouterr().out
+        calls = len(fake_llm.calls)
+
+        fake_llm.respond = lambda kwargs: pytest.fail("network call during replay")
+        self.play(monkeypatch, game.GameOptions(cassette=path, cassette_mode="replay"))
+
+        assert capsys.readouterr().out == recorded_output
+        assert "The Duke inclines his head." in recorded_output
+        assert len(fake_llm.calls) == calls
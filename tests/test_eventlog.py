@@ -0,0 +1,103 @@
+"""
+Tests for the columnar event log.
+"""
+
+import pytest
+
+from kings_paradox.prototype.eventlog import Event, EventLog
+from kings_paradox.prototype.state import GameState
+
+
+class TestEventLog:
+    """Tests for EventLog storage and its list-compatible API."""
+
+    def make_log(self) -> EventLog:
+        log = EventLog()
+        log.log(1, "arrest", {"target": "duke"})
+        log.log(2, "conversation", {"target": "bishop", "speech": "Pray."})
+        log.log(2, "arrest", {"target": "bishop"})
+        log.log(4, "player_left", {})
+        return log
+
+    def test_behaves_like_a_list_of_events(self):
+        log = self.make_log()
+
+        assert len(log) == 4
+        assert log[0] == Event(day=1, event_type="arrest", details={"target": "duke"})
+        assert log[-1].event_type == "player_left"
+        assert [e.day for e in log[1:3]] == [2, 2]
+        assert [e.event_type for e in log] == ["arrest", "conversation", "arrest", "player_left"]
+        with pytest.raises(IndexError):
+            log[4]
+
+    def test_types_and_targets_are_interned(self):
+        log = self.make_log()
+
+        assert log.event_types == ["arrest", "conversation", "player_left"]
+        assert [r.target for r in log.records()] == ["duke", "bishop", "bishop", None]
+
+    def test_records_read_without_building_models(self):
+        record = self.make_log().record(1)
+
+        assert (record.day, record.event_type) == (2, "conversation")
+        assert record.details["speech"] == "Pray."
+        assert not hasattr(record, "__dict__")
+        assert record.to_event().details == {"target": "bishop", "speech": "Pray."}
+
+    def test_materialized_events_do_not_alias_the_log(self):
+        log = self.make_log()
+        log[0].details["target"] = "someone else"
+        assert log[0].details == {"target": "duke"}
+
+    def test_logged_and_returned_details_do_not_alias_the_log(self):
+        details = {"target": "duke"}
+        log = EventLog()
+        log.log(1, "arrest", details)
+        fork = log.fork()
+
+        details["target"] = "bishop"
+        log.record(0).details["target"] = "baron"
+        log.to_list()[0]["details"]["target"] = "general"
+
+        assert log[0].details == {"target": "duke"}
+        assert fork.record(0).details == {"target": "duke"}
+
+    def test_since_bisects_ordered_days_and_scans_otherwise(self):
+        log = self.make_log()
+        assert [e.day for e in log.since(2)] == [2, 2, 4]
+
+        log.append(Event(day=1, event_type="late_entry"))
+        assert [e.event_type for e in log.since(2)] == ["conversation", "arrest", "player_left"]
+
+    def test_equality_with_lists(self):
+        assert EventLog() == []
+        assert EventLog([{"day": 1, "event_type": "a"}]) == [Event(day=1, event_type="a")]
+
+
+class TestGameStateEvents:
+    """Tests for GameState.events backed by an EventLog."""
+
+    def test_assignment_and_serialization_keep_the_list_format(self):
+        state = GameState(day=2, events=[Event(day=1, event_type="coronation")])
+        state.log_event("arrest", {"target": "duke"})
+
+        assert isinstance(state.events, EventLog)
+        dumped = state.model_dump()
+        assert dumped["events"] == [
+            {"day": 1, "event_type": "coronation", "details": {}},
+            {"day": 2, "event_type": "arrest", "details": {"target": "duke"}},
+        ]
+        restored = GameState.model_validate_json(state.model_dump_json())
+        assert restored.events == state.events
+
+        state.events = []
+        assert isinstance(state.events, EventLog) and len(state.events) == 0
+
+    def test_deep_copy_is_independent(self):
+        state = GameState(day=1)
+        state.log_event("meeting", {})
+        copy = state.model_copy(deep=True)
+        copy.log_event("arrest", {})
+
+        assert len(state.events) == 1
+        assert len(copy.events) == 2
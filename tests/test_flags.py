@@ -0,0 +1,86 @@
+"""
+Tests for the flag registry.
+"""
+
+import pytest
+
+from kings_paradox.prototype.flags import FlagRegistry, NPCFlag
+from kings_paradox.prototype.state import GameState
+
+
+class TestFlagRegistry:
+    """Tests for per-NPC bitsets and the dict view."""
+
+    def test_typed_queries(self):
+        flags = FlagRegistry()
+        flags.set_npc("duke", NPCFlag.THREATENED)
+        flags.set_npc("bishop", NPCFlag.ARRESTED)
+        flags.set_npc("spy", NPCFlag.THREATENED)
+
+        assert flags.npc("duke", NPCFlag.THREATENED)
+        assert not flags.npc("duke", NPCFlag.ARRESTED)
+        assert not flags.npc("stranger", NPCFlag.THREATENED)
+        assert flags.npcs_with(NPCFlag.THREATENED) == ["duke", "spy"]
+
+        flags.set_npc("duke", NPCFlag.THREATENED, False)
+        assert flags.npcs_with(NPCFlag.THREATENED) == ["spy"]
+
+    def test_dict_view_maps_old_keys(self):
+        flags = FlagRegistry({"baron_executed": True, "duke_valerius_threatened": True})
+        flags["bishop_erasmus_arrested"] = False
+
+        assert flags.npc("duke_valerius", NPCFlag.THREATENED)
+        assert flags["bishop_erasmus_arrested"] is False
+        assert dict(flags) == {
+            "baron_executed": True,
+            "duke_valerius_threatened": True,
+            "bishop_erasmus_arrested": False,
+        }
+        assert "duke_valerius_arrested" not in flags
+        assert flags.get("duke_valerius_arrested") is None
+        with pytest.raises(KeyError):
+            flags["missing"]
+
+        del flags["duke_valerius_threatened"]
+        assert not flags.npc("duke_valerius", NPCFlag.THREATENED)
+        assert len(flags) == 2
+        assert FlagRegistry() == {}
+
+    def test_copies_are_independent(self):
+        flags = FlagRegistry({"baron_executed": True})
+        flags.set_npc("duke", NPCFlag.THREATENED)
+        copy = flags.copy()
+        copy.set_npc("duke", NPCFlag.ARRESTED)
+        copy.set_npc("bishop", NPCFlag.THREATENED)
+        copy["baron_executed"] = False
+
+        assert dict(flags) == {"baron_executed": True, "duke_threatened": True}
+        assert copy.npcs_with(NPCFlag.THREATENED) == ["duke", "bishop"]
+
+
+class TestGameStateFlags:
+    """Tests for GameState.flags backed by a FlagRegistry."""
+
+    def test_serializes_as_a_dict(self):
+        state = GameState(day=1, flags={"baron_executed": True})
+        state.arrest_npc("nobody")  # Unknown NPCs are ignored
+        state.set_npc_flag("duke_valerius", NPCFlag.THREATENED)
+
+        assert isinstance(state.flags, FlagRegistry)
+        assert state.model_dump()["flags"] == {
+            "baron_executed": True,
+            "duke_valerius_threatened": True,
+        }
+        restored = GameState.model_validate_json(state.model_dump_json())
+        assert restored.flags.npc("duke_valerius", NPCFlag.THREATENED)
+
+        state.flags = {}
+        assert isinstance(state.flags, FlagRegistry) and state.flags == {}
+
+    def test_forks_do_not_share_flags(self):
+        state = GameState(day=1)
+        child = state.fork()
+        child.set_npc_flag("duke_valerius", NPCFlag.ARRESTED)
+
+        assert not state.flags.npc("duke_valerius", NPCFlag.ARRESTED)
+        assert child.flags["duke_valerius_arrested"]
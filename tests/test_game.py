@@ -0,0 +1,298 @@
+"""
+Tests for the main game loop helpers.
+KP-eho: Main game loop wiring all components
+"""
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+from kings_paradox.prototype import game
+from kings_paradox.prototype.game import GameOptions, parse_options, render_stream
+from kings_paradox.prototype.parser import PlayerAction
+from kings_paradox.prototype.scene import Scene
+
+
+async def _chunks(*parts: str):
+    for part in parts:
+        yield part
+
+
+class TestRenderStream:
+    """Tests for streamed text rendering."""
+
+    @pytest.mark.asyncio
+    async def test_prints_tokens_and_returns_full_text(self, capsys):
+        text = await render_stream(_chunks("The Duke ", "bows.\n", "He waits."))
+
+        assert text == "The Duke bows.\nHe waits."
+        out = capsys.readouterr().out
+        assert out == "  The Duke bows.\n  He waits.\n"
+
+    @pytest.mark.asyncio
+    async def test_rich_live_returns_full_text(self):
+        text = await render_stream(_chunks("Your ", "Majesty."), rich_live=True)
+        assert text == "Your Majesty."
+
+
+class TestParseOptions:
+    """Tests for command-line options."""
+
+    def test_defaults_stream(self):
+        assert parse_options([]) == GameOptions(stream=True, rich_live=False)
+
+    def test_flags(self):
+        options = parse_options(["--no-stream", "--rich"])
+        assert options.stream is False
+        assert options.rich_live is True
+
+
+class TestAsyncInput:
+    """Tests for reading player input without blocking the event loop."""
+
+    @pytest.mark.skipif(not hasattr(os, "openpty"), reason="needs a pseudo-terminal")
+    @pytest.mark.asyncio
+    async def test_terminal_is_read_on_the_loop(self, monkeypatch):
+        # A thread blocked in input() would keep Ctrl-C from exiting
+        monkeypatch.setattr("asyncio.to_thread", lambda *args: pytest.fail("read on a thread"))
+        main, terminal = os.openpty()
+        with open(terminal) as stdin:
+            monkeypatch.setattr("sys.stdin", stdin)
+            reading = asyncio.create_task(game._ainput("  > "))
+            await asyncio.sleep(0.05)
+            assert not reading.done()
+            os.write(main, b"Guards!\n")
+            assert await asyncio.wait_for(reading, timeout=5) == "Guards!"
+        os.close(main)
+
+    @pytest.mark.asyncio
+    async def test_other_input_reads_on_a_worker_thread(self, monkeypatch):
+        monkeypatch.setattr("builtins.input", lambda prompt="": "1")
+        assert await game._ainput("  > ") == "1"
+
+
+class TestSpeculativeSceneLoop:
+    """Tests for generating the NPC reply while the input is parsed."""
+
+    @pytest.fixture
+    def scripted(self, monkeypatch):
+        """Slow fake parser and NPC generator; returns a dict to script parse results."""
+        script = {"actions": [], "generated": [], "parsing": False}
+
+        async def parse(player_input, scene_context):
+            script["parsing"] = True
+            await asyncio.sleep(0.1)
+            script["parsing"] = False
+            return script["actions"].pop(0)
+
+        async def respond(npc, player_input, context, history):
+            # (input, loyalty in the prompt, started while the input was being parsed)
+            script["generated"].append((player_input, context["loyalty"], script["parsing"]))
+            await asyncio.sleep(0.1)
+            return f"{npc.name} considers '{player_input}'."
+
+        monkeypatch.setattr(game, "parse_player_input", parse)
+        monkeypatch.setattr(game, "generate_npc_response_async", respond)
+        game.speculation_stats.clear()
+        return script
+
+    def scene(self) -> tuple:
+        state = game.create_initial_state()
+        duke = state.npcs["duke_valerius"]
+        scene = Scene(
+            location="throne_room",
+            cast=[duke],
+            opening="The Duke waits.",
+            context_packets={"duke_valerius": {"loyalty": 35}},
+        )
+        return state, scene
+
+    async def play(self, monkeypatch, inputs: list[str]) -> None:
+        state, scene = self.scene()
+        feed = iter(inputs)
+        monkeypatch.setattr("builtins.input", lambda prompt="": next(feed))
+        await game.run_scene_loop(
+            state, scene, "duke_valerius", GameOptions(stream=False, speculative=True)
+        )
+
+    @pytest.mark.asyncio
+    async def test_speak_turn_overlaps_parse_and_reply(self, scripted, monkeypatch, capsys):
+        scripted["actions"] = [
+            PlayerAction(action_type="speak", target="duke_valerius"),
+            PlayerAction(action_type="leave"),
+        ]
+        await self.play(monkeypatch, ["Speak plainly.", "I leave."])
+
+        assert "Duke Valerius considers 'Speak plainly.'." in capsys.readouterr().out
+        # Generated once, while the input was still being parsed
+        assert scripted["generated"][0] == ("Speak plainly.", 35, True)
+        assert [i for i, _, _ in scripted["generated"]].count("Speak plainly.") == 1
+        assert game.speculation_stats == {"used": 1, "discarded": 1}
+
+    @pytest.mark.asyncio
+    async def test_changed_stats_discard_speculation(self, scripted, monkeypatch, capsys):
+        scripted["actions"] = [
+            PlayerAction(action_type="threaten", target="duke_valerius"),
+            PlayerAction(action_type="leave"),
+        ]
+        await self.play(monkeypatch, ["Kneel, or hang.", "I leave."])
+
+        # Speculated at loyalty 35; the threat cost 10, so the reply is regenerated
+        assert [(i, loyalty) for i, loyalty, _ in scripted["generated"][:2]] == [
+            ("Kneel, or hang.", 35),
+            ("Kneel, or hang.", 25),
+        ]
+        assert "Duke Valerius considers 'Kneel, or hang.'." in capsys.readouterr().out
+        assert game.speculation_stats == {"discarded": 2}
+
+    @pytest.mark.asyncio
+    async def test_scene_ending_action_discards_speculation(self, scripted, monkeypatch, capsys):
+        scripted["actions"] = [PlayerAction(action_type="arrest", target="duke_valerius")]
+        await self.play(monkeypatch, ["Guards, seize him!"])
+
+        out = capsys.readouterr().out
+        assert "considers" not in out
+        assert "The guards seize Duke Valerius" in out
+        assert game.speculation_stats == {"discarded": 1}
+
+
+class TestCastReplies:
+    """Tests for the whole cast answering a line aimed at nobody in particular."""
+
+    @pytest.fixture
+    def scripted(self, monkeypatch):
+        """Fake parser and cast generator; returns the recorded cast calls."""
+        calls = []
+        actions = [
+            PlayerAction(action_type="speak"),
+            PlayerAction(action_type="speak", target="bishop_erasmus"),
+            PlayerAction(action_type="leave"),
+        ]
+
+        async def parse(player_input, scene_context):
+            return actions.pop(0)
+
+        async def cast_replies(cast, player_input, packets, history, mode):
+            calls.append(([npc.id for npc in cast], sorted(packets), mode, history.to_list()))
+            return {npc.id: f"{npc.name} answers." for npc in cast}
+
+        async def respond(npc, player_input, context, history):
+            return f"{npc.name} alone answers."
+
+        monkeypatch.setattr(game, "parse_player_input", parse)
+        monkeypatch.setattr(game, "generate_cast_responses_async", cast_replies)
+        monkeypatch.setattr(game, "generate_npc_response_async", respond)
+        return calls
+
+    @pytest.mark.parametrize("mode", ["sequential", "batched"])
+    @pytest.mark.asyncio
+    async def test_cast_answers_in_scene_mode(self, scripted, monkeypatch, capsys, mode):
+        state = game.create_initial_state()
+        cast = [state.npcs["duke_valerius"], state.npcs["bishop_erasmus"]]
+        scene = Scene(location="throne_room", cast=cast, opening="The court waits.",
+                      context_packets={}, response_mode=mode)
+        feed = iter(["Who will speak first?", "Bishop, your view.", "I leave."])
+        monkeypatch.setattr("builtins.input", lambda prompt="": next(feed))
+
+        await game.run_scene_loop(state, scene, "duke_valerius", GameOptions(stream=False))
+
+        # Only the line aimed at nobody went to the cast; the Bishop answered alone
+        ids = ["duke_valerius", "bishop_erasmus"]
+        assert [call[:3] for call in scripted] == [(ids, sorted(ids), mode)]
+        out = capsys.readouterr().out
+        assert "Duke Valerius answers." in out and "Bishop Erasmus answers." in out
+        assert "Bishop Erasmus alone answers." in out
+
+    def test_batched_replies_flag(self):
+        assert parse_options([]).response_mode == "sequential"
+        assert parse_options(["--batched-replies"]).response_mode == "batched"
+
+
+class TestScenePrefetch:
+    """Tests for building menu scenes while the player chooses."""
+
+    @pytest.fixture
+    def slow_scenes(self, monkeypatch):
+        """Fake scene construction taking 0.1s; returns the list of locations built."""
+        built = []
+        cancelled = []
+
+        async def construct(
+            state, location, required_npcs, with_opening=True, response_mode="sequential"
+        ):
+            built.append(location)
+            try:
+                await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                cancelled.append(location)
+                raise
+            cast = [state.npcs[npc_id] for npc_id in required_npcs]
+            return Scene(location=location, cast=cast, opening=f"At the {location}.",
+                         context_packets={})
+
+        monkeypatch.setattr(game, "construct_scene_async", construct)
+        game.prefetch_stats.clear()
+        return built, cancelled
+
+    @pytest.mark.asyncio
+    async def test_builds_every_option_and_cancels_the_rest(self, slow_scenes):
+        built, cancelled = slow_scenes
+        state = game.create_initial_state()
+        prefetch = game.ScenePrefetcher(state, game.get_menu_choices(state))
+        await asyncio.sleep(0)
+
+        scene = await prefetch.take(1)
+        await asyncio.sleep(0)
+
+        assert built == ["throne_room", "chapel"]
+        assert scene.location == "chapel"
+        assert cancelled == ["throne_room"]
+        assert game.prefetch_stats == {"waited": 1, "cancelled": 1}
+
+    @pytest.mark.asyncio
+    async def test_scene_is_ready_after_the_player_reads_the_menu(
+        self, slow_scenes, monkeypatch, capsys
+    ):
+        throne_room_built = threading.Event()
+        construct = game.construct_scene_async
+
+        async def signalling_construct(state, location, *args, **kwargs):
+            scene = await construct(state, location, *args, **kwargs)
+            if location == "throne_room":
+                throne_room_built.set()
+            return scene
+
+        def reading_input(prompt=""):
+            # Still reading the menu (on a worker thread) when the build lands;
+            # without prefetching nothing is built yet and this times out
+            assert throne_room_built.wait(timeout=5)
+            return "1"
+
+        monkeypatch.setattr(game, "construct_scene_async", signalling_construct)
+        monkeypatch.setattr("builtins.input", reading_input)
+        scenes = []
+
+        async def scene_loop(state, scene, primary_npc_id, options):
+            scenes.append(scene)
+
+        monkeypatch.setattr(game, "run_scene_loop", scene_loop)
+
+        await game.run_day(game.create_initial_state(), GameOptions())
+
+        assert scenes[0].opening == "At the throne_room."
+        assert game.prefetch_stats == {"ready": 1, "cancelled": 1}
+
+    @pytest.mark.asyncio
+    async def test_rest_cancels_every_prefetch(self, slow_scenes, monkeypatch):
+        built, cancelled = slow_scenes
+        monkeypatch.setattr("builtins.input", lambda prompt="": "3")
+
+        await game.run_day(game.create_initial_state(), GameOptions())
+        await asyncio.sleep(0)
+
+        assert sorted(cancelled) == ["chapel", "throne_room"]
+
+    def test_no_prefetch_flag(self):
+        assert parse_options(["--no-prefetch"]).prefetch is False
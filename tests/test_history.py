@@ -0,0 +1,127 @@
+"""
+Tests for the event-sourced state history.
+"""
+
+import pytest
+
+from kings_paradox.prototype.flags import NPCFlag
+from kings_paradox.prototype.game import create_initial_state
+from kings_paradox.prototype.history import History
+from kings_paradox.prototype.journal import Journal
+from kings_paradox.prototype.state import StatDelta
+
+
+def play_day(state, ends: dict | None = None) -> None:
+    """One day of mutations through the usual paths, ending the day."""
+    day = state.day
+    state.update_loyalty("duke_valerius", -5)
+    state.update_npcs({"bishop_erasmus": StatDelta(suspicion_of_player=day)})
+    state.log_event("audience", {"target": "duke_valerius", "n": day})
+    if day == 2:
+        state.set_npc_flag("duke_valerius", NPCFlag.THREATENED)
+    if day == 3:
+        state.arrest_npc("duke_valerius")
+    state.npcs["bishop_erasmus"].location = f"chapel_{day}"
+    if ends is not None:
+        ends[day] = state.model_dump()
+    state.advance_day()
+
+
+class TestHistory:
+    """Tests for checkpoints and replay to a past day."""
+
+    def play(self, history: History, days: int):
+        state = history.start(create_initial_state())
+        ends = {}
+        for _ in range(days):
+            play_day(state, ends)
+        return state, ends
+
+    def test_rebuilds_every_past_day(self):
+        history = History(checkpoint_every=2)
+        state, ends = self.play(history, 6)
+
+        for day, dumped in ends.items():
+            assert history.state_at(day).model_dump() == dumped
+        assert history.state_at(state.day).model_dump() == state.model_dump()
+
+    def test_views_are_maintained_on_replay(self):
+        history = History(checkpoint_every=10)
+        self.play(history, 4)
+
+        day3 = history.state_at(3)
+
+        assert day3.flags.npcs_with(NPCFlag.THREATENED) == ["duke_valerius"]
+        assert [n.id for n in day3.get_npcs_at_location("dungeon")] == ["duke_valerius"]
+        assert [n.id for n in day3.get_npcs_at_location("chapel_3")] == ["bishop_erasmus"]
+        assert history.state_at(1).get_npcs_at_location("dungeon") == []
+
+    def test_checkpoints_every_n_days(self):
+        history = History(checkpoint_every=2)
+        self.play(history, 5)
+
+        assert [day for day, _ in history.checkpoints] == [1, 3, 5]
+
+    def test_past_states_are_detached(self):
+        history = History()
+        state, _ = self.play(history, 2)
+
+        recorded = len(history.mutations)
+        past = history.state_at(1)
+        past.update_loyalty("duke_valerius", 50)
+        past.log_event("what_if", {})
+
+        assert history.state_at(1).model_dump() == history.state_at(1).model_dump()
+        assert history.state_at(1).npcs["duke_valerius"].loyalty != past.npcs["duke_valerius"].loyalty
+        assert "what_if" not in [e.event_type for e in state.events]
+        assert len(history.mutations) == recorded
+        assert history.changes_on(2)[-1] == ("npc_set", {
+            "npc_id": "bishop_erasmus", "field": "location", "value": "chapel_2",
+        })
+        assert history.changes_on(3) == [("day", {"value": 3})]
+
+    def test_undo_drops_the_abandoned_timeline(self):
+        history = History(checkpoint_every=1)
+        state = history.start(create_initial_state())
+        state.checkpoint()
+        play_day(state)
+        play_day(state)
+        state.undo()
+        state.update_loyalty("duke_valerius", 20)
+
+        assert [day for day, _ in history.checkpoints] == [1, 1]
+        assert history.state_at(1).model_dump() == state.model_dump()
+        assert history.state_at(3).model_dump() == state.model_dump()
+
+    def test_undo_on_a_past_state_leaves_the_live_state_alone(self):
+        history = History()
+        state = history.start(create_initial_state())
+
+        past = history.state_at(1)
+        past.checkpoint()
+        past.undo()
+        past.npcs["duke_valerius"].location = "chapel"
+
+        assert state.npcs["duke_valerius"].location == "duke_quarters"
+        assert [n.id for n in state.get_npcs_at_location("chapel")] == ["bishop_erasmus"]
+
+    def test_records_alongside_a_journal(self, tmp_path):
+        state = Journal(tmp_path).start(create_initial_state())
+        history = History()
+        history.start(state)
+        play_day(state)
+
+        assert Journal(tmp_path).resume().model_dump() == state.model_dump()
+        assert history.state_at(2).model_dump() == state.model_dump()
+
+    def test_days_before_recording(self):
+        state = create_initial_state()
+        state.day = 4
+        history = History()
+        history.start(state)
+        history.stop()
+        state.log_event("unrecorded", {})
+
+        with pytest.raises(ValueError):
+            history.state_at(3)
+        assert len(history.mutations) == 0
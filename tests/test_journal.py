@@ -0,0 +1,103 @@
+"""
+Tests for journaled save/load.
+"""
+
+import json
+
+from kings_paradox.prototype.game import create_initial_state, parse_options
+from kings_paradox.prototype.journal import JOURNAL, SNAPSHOT, Journal
+from kings_paradox.prototype.state import NPC
+
+
+def play(state) -> None:
+    """A day's worth of mutations through every journaled path."""
+    state.update_loyalty("duke_valerius", -10)
+    state.set_flag("duke_valerius_threatened", True)
+    state.log_event("threatened", {"target": "duke_valerius", "speech": "Kneel."})
+    state.npcs["bishop_erasmus"].location = "bishop_erasmus_quarters"
+    state.arrest_npc("duke_valerius")
+    state.advance_day()
+
+
+class TestJournal:
+    """Tests for the write-ahead journal and snapshots."""
+
+    def test_resume_replays_every_mutation(self, tmp_path):
+        state = Journal(tmp_path).start(create_initial_state())
+        play(state)
+
+        restored = Journal(tmp_path).resume()
+
+        assert restored.model_dump() == state.model_dump()
+        assert [n.id for n in restored.get_npcs_at_location("dungeon")] == ["duke_valerius"]
+
+    def test_mutations_append_without_rewriting_the_snapshot(self, tmp_path):
+        journal = Journal(tmp_path)
+        state = journal.start(create_initial_state())
+        snapshot = (tmp_path / SNAPSHOT).read_text()
+
+        play(state)
+
+        assert (tmp_path / SNAPSHOT).read_text() == snapshot
+        ops = [json.loads(line)["op"] for line in (tmp_path / JOURNAL).read_text().splitlines()]
+        assert ops[:4] == ["npc_batch", "flag", "event", "npc_set"]
+        assert ops[-1] == "day"
+
+    def test_snapshot_compacts_the_journal(self, tmp_path):
+        journal = Journal(tmp_path, snapshot_every=5)
+        state = journal.start(create_initial_state())
+        for i in range(12):
+            state.log_event("meeting", {"n": i})
+
+        assert journal.pending == 2
+        assert len((tmp_path / JOURNAL).read_text().splitlines()) == 2
+        assert len(Journal(tmp_path).resume().events) == 12
+
+    def test_torn_final_line_is_ignored(self, tmp_path):
+        journal = Journal(tmp_path)
+        state = journal.start(create_initial_state())
+        state.log_event("meeting", {})
+        journal.close()
+        with open(tmp_path / JOURNAL, "a") as f:
+            f.write('{"seq": 2, "op": "ev')
+
+        resumed = Journal(tmp_path)
+        restored = resumed.resume()
+        restored.log_event("arrest", {})
+
+        assert [e.event_type for e in Journal(tmp_path).resume().events] == ["meeting", "arrest"]
+
+    def test_entries_already_in_the_snapshot_are_skipped(self, tmp_path):
+        journal = Journal(tmp_path)
+        state = journal.start(create_initial_state())
+        state.log_event("meeting", {})
+        stale = (tmp_path / JOURNAL).read_text()
+        journal.snapshot()
+        # Crash after the snapshot was written but before the journal was truncated
+        (tmp_path / JOURNAL).write_text(stale)
+
+        assert len(Journal(tmp_path).resume().events) == 1
+
+    def test_replacing_collections_snapshots(self, tmp_path):
+        journal = Journal(tmp_path)
+        state = journal.start(create_initial_state())
+        state.npcs = {"spy": NPC(id="spy", name="Spy", status="free", loyalty=5, location="x")}
+        state.npcs["spy"].loyalty = 1
+
+        restored = Journal(tmp_path).resume()
+        assert list(restored.npcs) == ["spy"]
+        assert restored.npcs["spy"].loyalty == 1
+
+    def test_copies_are_not_journaled(self, tmp_path):
+        journal = Journal(tmp_path)
+        state = journal.start(create_initial_state())
+        copy = state.model_copy(deep=True)
+        copy.log_event("what_if", {})
+
+        assert journal.seq == 0
+
+    def test_resume_without_a_save(self, tmp_path):
+        assert Journal(tmp_path / "missing").resume() is None
+
+    def test_save_flag(self):
+        assert parse_options(["--save", "saves/reign"]).save == "saves/reign"
@@ -0,0 +1,153 @@
+"""
+Tests for the LLM gateway.
+
+Shared, pooled clients - no network calls are made.
+"""
+
+import asyncio
+
+import pytest
+
+from kings_paradox.prototype import llm
+
+
+async def _async_client():
+    return llm.get_async_client()
+
+
+@pytest.fixture(autouse=True)
+def api_keys(monkeypatch):
+    """Provide dummy keys and start every test with an empty client cache."""
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    llm.close_clients()
+    yield
+    llm.close_clients()
+
+
+class TestPoolConfig:
+    """Tests for connection pool settings."""
+
+    def test_defaults(self):
+        config = llm.PoolConfig()
+        assert config.max_connections >= config.max_keepalive_connections
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("LLM_MAX_CONNECTIONS", "7")
+        monkeypatch.setenv("LLM_MAX_KEEPALIVE", "3")
+        config = llm.PoolConfig.from_env()
+        assert config.max_connections == 7
+        assert config.max_keepalive_connections == 3
+
+
+class TestSharedClients:
+    """Tests for client reuse."""
+
+    def test_sync_client_is_shared(self):
+        assert llm.get_client() is llm.get_client()
+
+    def test_one_client_per_provider(self):
+        openrouter = llm.get_client("openrouter")
+        openai = llm.get_client("openai")
+        assert openrouter is not openai
+        assert str(openrouter.base_url).startswith(llm.OPENROUTER_BASE_URL)
+
+    def test_unknown_provider_rejected(self):
+        with pytest.raises(ValueError):
+            llm.get_client("nonexistent")
+
+    def test_configure_rebuilds_clients(self):
+        before = llm.get_client()
+        llm.configure(llm.PoolConfig(max_connections=5, max_keepalive_connections=2))
+        try:
+            after = llm.get_client()
+            assert after is not before
+            assert llm.get_pool_config().max_connections == 5
+        finally:
+            llm.configure(llm.PoolConfig())
+
+    def test_register_provider(self):
+        llm.register_provider("local", "http://127.0.0.1:9/v1", "OPENAI_API_KEY")
+        try:
+            client = llm.get_client("local")
+            assert str(client.base_url).startswith("http://127.0.0.1:9/v1")
+        finally:
+            llm.PROVIDERS.pop("local", None)
+
+    @pytest.mark.asyncio
+    async def test_async_client_is_shared_within_loop(self):
+        assert llm.get_async_client() is llm.get_async_client()
+
+    @pytest.mark.asyncio
+    async def test_configure_closes_async_clients(self):
+        before = llm.get_async_client()
+        llm.configure(llm.PoolConfig(max_connections=5, max_keepalive_connections=2))
+        try:
+            await asyncio.gather(*llm._closing)
+            assert before.is_closed()
+            assert llm.get_async_client() is not before
+        finally:
+            llm.configure(llm.PoolConfig())
+
+    def test_close_clients_closes_idle_loop_clients(self):
+        loop = asyncio.new_event_loop()
+        try:
+            client = loop.run_until_complete(_async_client())
+            llm.close_clients()
+            assert client.is_closed()
+        finally:
+            loop.close()
+
+
+class TestCachedPrompt:
+    """Tests for the stable-prefix prompt layout."""
+
+    def test_anthropic_segments_get_cache_breakpoints(self):
+        messages = llm.cached_prompt(["rules", "", "sheet"], "tail", "anthropic/claude-sonnet-4")
+
+        system, user = messages
+        assert [part["text"] for part in system["content"]] == ["rules", "sheet"]
+        assert all(part["cache_control"] == {"type": "ephemeral"} for part in system["content"])
+        assert user == {"role": "user", "content": "tail"}
+
+    def test_breakpoints_capped_at_last_segments(self):
+        segments = [str(i) for i in range(6)]
+        system = llm.cached_prompt(segments, "tail", "anthropic/claude-sonnet-4")[0]
+
+        marked = [part["text"] for part in system["content"] if "cache_control" in part]
+        assert marked == ["2", "3", "4", "5"]
+
+    def test_other_providers_get_a_plain_system_prefix(self):
+        messages = llm.cached_prompt(["rules", "sheet"], "tail", "openai/gpt-4o")
+        assert messages[0] == {"role": "system", "content": "rules\n\nsheet"}
+
+    def test_no_segments_is_a_single_user_message(self):
+        assert llm.cached_prompt([], "tail", "m") == [{"role": "user", "content": "tail"}]
+
+
+class TestUsage:
+    """Tests for prompt-cache token reporting."""
+
+    def test_cached_tokens_read_from_usage_details(self):
+        from openai.types.chat import ChatCompletion
+
+        response = ChatCompletion.model_validate({
+            "id": "x", "object": "chat.completion", "created": 0, "model": "m",
+            "choices": [{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "Aye."},
+            }],
+            "usage": {
+                "prompt_tokens": 1200, "completion_tokens": 5, "total_tokens": 1205,
+                "prompt_tokens_details": {"cached_tokens": 1024},
+            },
+        })
+        assert llm._from_response(response, "m").cached_tokens == 1024
+
+    def test_network_calls_are_counted(self, fake_llm, monkeypatch):
+        monkeypatch.setattr(llm, "usage", llm.UsageStats())
+        llm.complete([{"role": "user", "content": "Hail."}], model="m")
+
+        assert llm.usage.calls == 1
+        assert llm.usage.prompt_tokens == 10
+        assert llm.usage.cached_rate == 0.0
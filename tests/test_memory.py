@@ -0,0 +1,135 @@
+"""
+Tests for bounded conversation memory.
+"""
+
+import pytest
+
+from kings_paradox.prototype import routing
+from kings_paradox.prototype.memory import (
+    ConversationMemory,
+    Turn,
+    estimate_tokens,
+    summarize_turns,
+)
+from kings_paradox.prototype.scene import _history_text
+
+
+class RecordingSummarizer:
+    """Summarizer stub that records which turns it was asked to fold."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    async def __call__(self, summary: str, turns) -> str:
+        self.batches.append([turn.player for turn in turns])
+        folded = ", ".join(turn.player for turn in turns)
+        return f"{summary} {folded}".strip()
+
+
+def line(n: int) -> str:
+    return f"Question {n}: " + "x" * 80
+
+
+class TestConversationMemory:
+    """Tests for the verbatim window, summary and pins."""
+
+    def test_short_history_stays_verbatim(self):
+        memory = ConversationMemory(budget=1000)
+        memory.append("Speak.", "I obey.")
+
+        assert _history_text(memory, "Duke Valerius") == (
+            "\n=== PREVIOUS IN THIS SCENE ===\n"
+            "King: \"Speak.\"\nDuke Valerius: \"I obey.\"\n"
+        )
+        assert not memory.needs_compaction
+
+    def test_matches_list_history_rendering(self):
+        turns = [{"player": "Speak.", "npc": "I obey."}, {"player": "Why?", "npc": "Duty."}]
+        memory = ConversationMemory()
+        for turn in turns:
+            memory.append(turn["player"], turn["npc"])
+
+        assert memory.render("Duke") == _history_text(turns, "Duke")
+        assert memory.to_list() == turns
+
+    def test_old_turns_move_to_pending_beyond_budget(self):
+        memory = ConversationMemory(budget=100, keep_recent=2)
+        for n in range(6):
+            memory.append(line(n), "Aye.")
+
+        assert memory.needs_compaction
+        assert len(memory) == 6
+        # Pending turns still render verbatim until summarized
+        assert line(0) in memory.render("Duke")
+
+    @pytest.mark.asyncio
+    async def test_each_turn_summarized_once(self):
+        summarizer = RecordingSummarizer()
+        memory = ConversationMemory(budget=100, keep_recent=2, summarizer=summarizer)
+        for n in range(4):
+            memory.append(line(n), "Aye.")
+        await memory.compact()
+        for n in range(4, 6):
+            memory.append(line(n), "Aye.")
+        await memory.compact()
+        await memory.compact()  # Nothing pending - no call
+
+        folded = [player for batch in summarizer.batches for player in batch]
+        assert folded == [line(n) for n in range(len(folded))]
+        assert len(summarizer.batches) == 2
+        assert memory.summarized_turns == len(folded)
+        rendered = memory.render("Duke")
+        assert "EARLIER IN THIS SCENE (SUMMARY)" in rendered
+        assert f"King: \"{line(0)}\"" not in rendered
+        assert f"King: \"{line(5)}\"" in rendered
+
+    @pytest.mark.asyncio
+    async def test_history_stays_within_budget(self):
+        memory = ConversationMemory(budget=200, keep_recent=2, summarizer=RecordingSummarizer())
+        for n in range(40):
+            memory.append(line(n), "Aye.")
+            await memory.compact()
+            kept = sum(turn.tokens for turn in memory.turns)
+            assert kept <= 200 or len(memory.turns) <= 2
+
+    @pytest.mark.asyncio
+    async def test_pinned_turns_never_dropped(self):
+        memory = ConversationMemory(budget=100, keep_recent=1, summarizer=RecordingSummarizer())
+        memory.append("Betray me and you hang.", "I would never.", pinned=True)
+        for n in range(5):
+            memory.append(line(n), "Aye.")
+        await memory.compact()
+
+        assert "Betray me and you hang." in memory.render("Duke")
+        assert memory.turns[0].pinned
+
+    def test_speaker_overrides_default(self):
+        memory = ConversationMemory()
+        memory.append("And you, Bishop?", "God guides me.", speaker="Bishop Erasmus")
+        assert "Bishop Erasmus: \"God guides me.\"" in memory.render("Duke Valerius")
+
+    def test_cast_turn_states_the_kings_line_once(self):
+        memory = ConversationMemory()
+        memory.append("Well?", "I am loyal.", speaker="Duke Valerius")
+        memory.append("", "As am I.", speaker="Bishop Erasmus")
+
+        rendered = memory.render("Duke Valerius")
+        assert rendered.count("King:") == 1
+        assert rendered == _history_text(memory.to_list(), "Duke Valerius")
+        assert 'Bishop Erasmus: "As am I."' in rendered
+
+    @pytest.mark.asyncio
+    async def test_default_summarizer_uses_the_summary_route(self, fake_llm):
+        fake_llm.respond = lambda kwargs: " The Duke swore loyalty. "
+        routing.set_route("summary", [routing.Tier("test/summarizer")])
+        try:
+            summary = await summarize_turns("", [Turn("Well?", "I am loyal.")])
+        finally:
+            routing.reset_routes()
+
+        assert summary == "The Duke swore loyalty."
+        assert fake_llm.calls[0]["model"] == "test/summarizer"
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("x" * 400) == 101
@@ -0,0 +1,110 @@
+"""
+Tests for the local mock LLM server.
+
+These talk to the server over real HTTP through the OpenAI SDK.
+"""
+
+import json
+import time
+
+import openai
+import pytest
+from openai import OpenAI
+
+from kings_paradox.prototype import llm
+from kings_paradox.prototype.mock_server import (
+    LatencyProfile,
+    MockLLMServer,
+    canned_generator,
+    echo_generator,
+    template_generator,
+)
+from kings_paradox.prototype.parser import parse_player_input
+
+
+def client_for(server: MockLLMServer) -> OpenAI:
+    return OpenAI(base_url=server.url, api_key="mock", max_retries=0)
+
+
+MESSAGES = [{"role": "user", "content": "Who poisoned the Baron?"}]
+
+
+class TestGenerators:
+    """Tests for response generators."""
+
+    def test_echo(self):
+        assert echo_generator({"messages": MESSAGES}) == "Who poisoned the Baron?"
+
+    def test_canned_cycles(self):
+        generate = canned_generator(["a", "b"])
+        assert [generate({}) for _ in range(3)] == ["a", "b", "a"]
+
+    def test_template(self):
+        generate = template_generator("{model}: {prompt}")
+        assert generate({"model": "m", "messages": MESSAGES}) == "m: Who poisoned the Baron?"
+
+
+class TestMockLLMServer:
+    """Tests for the HTTP endpoint."""
+
+    def test_non_streaming_completion(self):
+        with MockLLMServer(generator=echo_generator) as server:
+            response = client_for(server).chat.completions.create(model="m", messages=MESSAGES)
+
+        assert response.choices[0].message.content == "Who poisoned the Baron?"
+        assert response.usage.completion_tokens == 4
+        assert server.stats.completed == 1
+
+    def test_streaming_completion(self):
+        with MockLLMServer(generator=echo_generator) as server:
+            stream = client_for(server).chat.completions.create(
+                model="m", messages=MESSAGES, stream=True
+            )
+            chunks = [c.choices[0].delta.content or "" for c in stream if c.choices]
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == "Who poisoned the Baron?"
+
+    def test_ttft_and_throughput(self):
+        profile = LatencyProfile(ttft=0.1, tokens_per_sec=40.0)
+        with MockLLMServer(profile, echo_generator) as server:
+            start = time.perf_counter()
+            client_for(server).chat.completions.create(model="m", messages=MESSAGES)
+            elapsed = time.perf_counter() - start
+
+        assert elapsed >= 0.1 + 4 / 40.0
+
+    def test_error_rate(self):
+        with MockLLMServer(LatencyProfile(error_rate=1.0)) as server:
+            with pytest.raises(openai.InternalServerError):
+                client_for(server).chat.completions.create(model="m", messages=MESSAGES)
+        assert server.stats.errors == 1
+
+    def test_rate_limit(self):
+        profile = LatencyProfile(rate_limit_rps=0.01, rate_limit_burst=1)
+        with MockLLMServer(profile) as server:
+            client = client_for(server)
+            client.chat.completions.create(model="m", messages=MESSAGES)
+            with pytest.raises(openai.RateLimitError):
+                client.chat.completions.create(model="m", messages=MESSAGES)
+        assert server.stats.rate_limited == 1
+
+    @pytest.mark.asyncio
+    async def test_parser_runs_against_mock(self, monkeypatch):
+        """The gateway's base URL override points the real game code at the server."""
+        with MockLLMServer() as server:
+            monkeypatch.setenv("OPENROUTER_BASE_URL", server.url)
+            monkeypatch.setenv("OPENROUTER_API_KEY", "mock")
+            monkeypatch.setattr(llm, "_cache", None)
+            monkeypatch.setattr(llm, "_cassette", None)
+            llm.close_clients()
+            try:
+                action = await parse_player_input(
+                    "How fares the realm?", {"present_npcs": ["duke_valerius"]}
+                )
+            finally:
+                llm.close_clients()
+
+        assert action.action_type == "speak"
+        assert action.target == "duke_valerius"
+        assert json.dumps(action.details)
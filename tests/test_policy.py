@@ -0,0 +1,259 @@
+"""
+Tests for the LLM call policy: timeouts, retries, hedging, circuit breaking.
+"""
+
+import asyncio
+import random
+
+import httpx
+import openai
+import pytest
+
+from kings_paradox.prototype import llm, scene
+from kings_paradox.prototype.mock_server import LatencyProfile, MockLLMServer
+from kings_paradox.prototype.policy import (
+    CallPolicy,
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    LLMUnavailableError,
+    acall,
+    call,
+    policy_stats,
+)
+from kings_paradox.prototype.state import NPC
+
+FAST = CallPolicy(timeout=1.0, deadline=5.0, max_retries=3, backoff=0.0)
+
+
+def rate_limited() -> openai.RateLimitError:
+    request = httpx.Request("POST", "http://test/v1/chat/completions")
+    response = httpx.Response(429, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def bad_request() -> openai.BadRequestError:
+    request = httpx.Request("POST", "http://test/v1/chat/completions")
+    response = httpx.Response(400, request=request)
+    return openai.BadRequestError("bad request", response=response, body=None)
+
+
+class Flaky:
+    """An attempt that fails `failures` times before answering."""
+
+    def __init__(self, failures: int, error=rate_limited, delay: float = 0.0) -> None:
+        self.failures = failures
+        self.error = error
+        self.delay = delay
+        self.attempts = 0
+
+    async def __call__(self) -> str:
+        self.attempts += 1
+        await asyncio.sleep(self.delay)
+        if self.attempts <= self.failures:
+            raise self.error()
+        return "ok"
+
+
+@pytest.fixture(autouse=True)
+def clear_stats():
+    policy_stats.clear()
+
+
+class TestCallPolicy:
+    """Tests for backoff and env configuration."""
+
+    def test_backoff_is_jittered_and_capped(self):
+        policy = CallPolicy(backoff=0.5, max_backoff=4.0)
+        rng = random.Random(0)
+        delays = [policy.backoff_delay(10, rng) for _ in range(50)]
+        assert all(0 <= d <= 4.0 for d in delays)
+        assert len(set(delays)) > 1
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("LLM_TIMEOUT", "5")
+        monkeypatch.setenv("LLM_HEDGE_QUANTILE", "0.9")
+        policy = CallPolicy.from_env()
+        assert policy.timeout == 5.0
+        assert policy.hedge_quantile == 0.9
+
+
+class TestCircuitBreaker:
+    """Tests for breaker state transitions."""
+
+    def test_opens_after_threshold_then_probes(self):
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=2, cooldown=10.0, clock=lambda: now[0])
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+        now[0] = 10.0
+        assert breaker.allow()  # One probe
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_failed_probe_reopens(self):
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=1, cooldown=10.0, clock=lambda: now[0])
+        breaker.record_failure()
+        now[0] = 10.0
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert policy_stats["breaker_trips"] == 2
+
+
+class TestAcall:
+    """Tests for the async runner."""
+
+    @pytest.mark.asyncio
+    async def test_retries_rate_limits(self):
+        attempt = Flaky(failures=2)
+        assert await acall(attempt, FAST, CircuitBreaker()) == "ok"
+        assert attempt.attempts == 3
+        assert policy_stats["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        attempt = Flaky(failures=10)
+        with pytest.raises(LLMUnavailableError) as info:
+            await acall(attempt, FAST, CircuitBreaker(threshold=100))
+        assert attempt.attempts == 4
+        assert isinstance(info.value.__cause__, openai.RateLimitError)
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_errors_propagate(self):
+        attempt = Flaky(failures=1, error=bad_request)
+        with pytest.raises(openai.BadRequestError):
+            await acall(attempt, FAST, CircuitBreaker())
+        assert attempt.attempts == 1
+
+    @pytest.mark.asyncio
+    async def test_attempt_timeout(self):
+        policy = CallPolicy(timeout=0.05, deadline=1.0, max_retries=1, backoff=0.0)
+        attempt = Flaky(failures=0, delay=0.5)
+        with pytest.raises(LLMUnavailableError):
+            await acall(attempt, policy, CircuitBreaker())
+        assert policy_stats["timeouts"] == 2
+
+    @pytest.mark.asyncio
+    async def test_deadline_caps_total_time(self):
+        policy = CallPolicy(timeout=1.0, deadline=0.1, max_retries=10, backoff=0.0)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with pytest.raises(LLMUnavailableError):
+            await acall(Flaky(failures=0, delay=0.5), policy, CircuitBreaker())
+        assert loop.time() - start < 0.3
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60.0)
+        with pytest.raises(CircuitOpenError):
+            await acall(Flaky(failures=10), FAST, breaker)
+        attempt = Flaky(failures=0)
+        with pytest.raises(CircuitOpenError):
+            await acall(attempt, FAST, breaker)
+        assert attempt.attempts == 0
+
+    @pytest.mark.asyncio
+    async def test_hedge_after_quantile(self):
+        latency = LatencyTracker()
+        for _ in range(20):
+            latency.add(0.02)
+        delays = iter([1.0, 0.0])  # First attempt stalls, the hedge answers at once
+
+        async def attempt():
+            await asyncio.sleep(next(delays))
+            return "ok"
+
+        policy = CallPolicy(timeout=2.0, hedge_quantile=0.95)
+        result = await acall(attempt, policy, CircuitBreaker(), latency)
+
+        assert result == "ok"
+        assert policy_stats["hedges"] == 1
+        assert policy_stats["hedge_wins"] == 1
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_samples(self):
+        policy = CallPolicy(timeout=2.0, hedge_quantile=0.95)
+        await acall(Flaky(failures=0, delay=0.05), policy, CircuitBreaker(), LatencyTracker())
+        assert policy_stats["hedges"] == 0
+
+
+class TestCall:
+    """Tests for the blocking runner."""
+
+    def test_passes_attempt_timeout_and_retries(self):
+        seen = []
+
+        def attempt(timeout):
+            seen.append(timeout)
+            if len(seen) < 2:
+                raise rate_limited()
+            return "ok"
+
+        assert call(attempt, FAST, CircuitBreaker()) == "ok"
+        assert seen[0] == pytest.approx(1.0)
+
+
+class TestGatewayPolicy:
+    """The gateway and its callers under a failing provider."""
+
+    @pytest.fixture
+    def mock_provider(self, monkeypatch):
+        def start(profile: LatencyProfile) -> MockLLMServer:
+            server = MockLLMServer(profile).start()
+            monkeypatch.setenv("OPENROUTER_BASE_URL", server.url)
+            monkeypatch.setenv("OPENROUTER_API_KEY", "mock")
+            monkeypatch.setattr(llm, "_cache", None)
+            monkeypatch.setattr(llm, "_cassette", None)
+            monkeypatch.setattr(llm, "_breakers", {})
+            llm.close_clients()
+            servers.append(server)
+            return server
+
+        servers: list[MockLLMServer] = []
+        yield start
+        llm.close_clients()
+        for server in servers:
+            server.stop()
+
+    @pytest.mark.asyncio
+    async def test_server_errors_exhaust_retries(self, mock_provider):
+        server = mock_provider(LatencyProfile(error_rate=1.0))
+        with pytest.raises(LLMUnavailableError):
+            await llm.acomplete(
+                [{"role": "user", "content": "Hail."}], model="m", policy=FAST
+            )
+        assert server.stats.errors == 4
+
+    @pytest.mark.asyncio
+    async def test_npc_reply_degrades_when_provider_down(self, mock_provider, monkeypatch):
+        mock_provider(LatencyProfile(error_rate=1.0))
+        monkeypatch.setattr(
+            scene, "POLICY", CallPolicy(timeout=1.0, deadline=2.0, max_retries=1, backoff=0.0)
+        )
+        duke = NPC(id="duke_valerius", name="Duke Valerius", status="free", loyalty=40,
+                   location="throne_room")
+        context = {"flags": {}, "loyalty": 40, "suspicion_of_player": 0}
+
+        text = await scene.generate_npc_response_async(duke, "Speak.", context, [])
+        streamed = "".join([
+            chunk async for chunk in scene.stream_npc_response(duke, "Speak.", context, [])
+        ])
+
+        assert text == streamed == scene._degraded_response(duke)
+
+    @pytest.mark.asyncio
+    async def test_stalled_stream_times_out(self, mock_provider):
+        mock_provider(LatencyProfile(ttft=1.0))
+        policy = CallPolicy(timeout=0.1, deadline=0.5, max_retries=1, backoff=0.0)
+        with pytest.raises(LLMUnavailableError):
+            async for _ in llm.astream(
+                [{"role": "user", "content": "Hail."}], model="m", policy=policy
+            ):
+                pass
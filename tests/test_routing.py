@@ -0,0 +1,139 @@
+"""
+Tests for per-call-site model cascades.
+"""
+
+import json
+
+import pytest
+
+from kings_paradox.prototype import llm, routing
+from kings_paradox.prototype.parser import parse_player_input
+from kings_paradox.prototype.policy import LLMUnavailableError
+from kings_paradox.prototype.routing import Tier
+
+CHEAP, STRONG = "cheap/model", "strong/model"
+MESSAGES = [{"role": "user", "content": "Classify."}]
+
+
+@pytest.fixture(autouse=True)
+def cascade():
+    """A two-tier test route; routing state is restored afterwards."""
+    routing.set_route("test", [Tier(CHEAP, min_confidence=0.7), Tier(STRONG)])
+    routing.routing_stats.clear()
+    yield
+    routing.reset_routes()
+
+
+def answer_by_model(**answers: str):
+    return lambda kwargs: answers[kwargs["model"].split("/")[0]]
+
+
+class TestRoutes:
+    """Tests for route configuration."""
+
+    def test_defaults_cover_call_sites(self):
+        assert {"parse", "opening", "npc_reply", "cast_reply"} <= set(routing.DEFAULT_ROUTES)
+        assert routing.get_route("parse")[0].model == routing.FAST_MODEL
+
+    def test_json_overrides(self, tmp_path):
+        path = tmp_path / "routes.json"
+        path.write_text(json.dumps({
+            "npc_reply": ["cheap/model", {"model": "strong/model", "temperature": 0.5}],
+        }))
+        routes = routing.load_routes(str(path))
+
+        assert routes["npc_reply"] == [Tier(CHEAP), Tier(STRONG, temperature=0.5)]
+        assert routes["parse"] == routing.DEFAULT_ROUTES["parse"]
+
+    def test_unknown_site(self):
+        with pytest.raises(ValueError):
+            routing.get_route("nowhere")
+
+
+class TestCascade:
+    """Tests for escalation between tiers."""
+
+    @pytest.mark.asyncio
+    async def test_confident_cheap_answer_stands(self, fake_llm):
+        fake_llm.respond = answer_by_model(cheap="0.9", strong="1.0")
+        result = await routing.aroute("test", MESSAGES, check=float)
+
+        assert (result.tier, result.model, result.text) == (0, CHEAP, "0.9")
+        assert len(fake_llm.calls) == 1
+        assert routing.routing_stats[("test", CHEAP)] == 1
+
+    @pytest.mark.asyncio
+    async def test_low_confidence_escalates(self, fake_llm):
+        fake_llm.respond = answer_by_model(cheap="0.2", strong="0.3")
+        result = await routing.aroute("test", MESSAGES, check=float)
+
+        assert (result.tier, result.model) == (1, STRONG)
+        assert result.confidence == 0.3  # The last tier always stands
+        assert [call["model"] for call in fake_llm.calls] == [CHEAP, STRONG]
+        assert routing.routing_stats[("escalations", "test")] == 1
+
+    def test_rejected_answer_escalates_sync(self, fake_llm):
+        fake_llm.respond = answer_by_model(cheap="not json", strong="{}")
+        result = routing.route(
+            "test", MESSAGES, check=lambda text: 1.0 if text.startswith("{") else None
+        )
+        assert result.model == STRONG
+
+    @pytest.mark.asyncio
+    async def test_messages_built_per_model(self, fake_llm):
+        await routing.aroute("test", lambda model: [{"role": "user", "content": model}])
+        assert fake_llm.calls[0]["messages"][0]["content"] == CHEAP
+
+    @pytest.mark.asyncio
+    async def test_unavailable_tier_is_skipped(self, fake_llm, monkeypatch):
+        real = llm.acomplete
+
+        async def acomplete(messages, *, model, **kwargs):
+            if model == CHEAP:
+                raise LLMUnavailableError("down")
+            return await real(messages, model=model, **kwargs)
+
+        monkeypatch.setattr(llm, "acomplete", acomplete)
+        result = await routing.aroute("test", MESSAGES)
+        assert result.model == STRONG
+
+    @pytest.mark.asyncio
+    async def test_stream_uses_first_tier(self, fake_llm):
+        fake_llm.respond = answer_by_model(cheap="The Duke bows.", strong="unused")
+        text = "".join([chunk async for chunk in routing.astream("test", MESSAGES)])
+
+        assert text == "The Duke bows."
+        assert routing.routing_stats[("test", CHEAP)] == 1
+
+
+class TestParserRouting:
+    """The parser escalates unsure or malformed fast-model answers."""
+
+    COURT = {"present_npcs": ["duke_valerius", "bishop_erasmus"]}
+
+    @staticmethod
+    def parse_answer(confidence: float, target: str = "duke_valerius") -> str:
+        return json.dumps({
+            "action_type": "speak", "target": target, "details": {}, "confidence": confidence,
+        })
+
+    @pytest.mark.asyncio
+    async def test_unsure_parse_escalates(self, fake_llm):
+        answers = {routing.FAST_MODEL: self.parse_answer(0.4, "bishop_erasmus"),
+                   routing.STRONG_MODEL: self.parse_answer(0.95)}
+        fake_llm.respond = lambda kwargs: answers[kwargs["model"]]
+
+        action = await parse_player_input("Hm.", self.COURT, use_fast_path=False)
+
+        assert action.target == "duke_valerius"
+        assert len(fake_llm.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_unknown_target_escalates(self, fake_llm):
+        answers = {routing.FAST_MODEL: self.parse_answer(0.99, "baron_aldric"),
+                   routing.STRONG_MODEL: self.parse_answer(0.9)}
+        fake_llm.respond = lambda kwargs: answers[kwargs["model"]]
+
+        action = await parse_player_input("Hm.", self.COURT, use_fast_path=False)
+
+        assert action.target == "duke_valerius"
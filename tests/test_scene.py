@@ -3,9 +3,17 @@ Tests for Scene Constructor.
 KP-eib: Scene constructor using real GameState
 """
 
+import json
+
 import pytest
 from kings_paradox.prototype.state import GameState, NPC
-from kings_paradox.prototype.scene import build_context_packet, construct_scene
+from kings_paradox.prototype import scene as scene_module
+from kings_paradox.prototype.scene import (
+    build_context_packet,
+    construct_scene,
+    construct_scene_async,
+    generate_cast_responses_async,
+)
 
 
 @pytest.fixture
@@ -110,3 +118,207 @@ class TestConstructScene:
         assert any(npc.id == "duke_valerius" for npc in scene.cast)
         assert "duke_valerius" in scene.context_packets
         assert len(scene.opening) > 0  # Opening was generated
+
+
+class TestConstructSceneAsync:
+    """Tests for async scene construction (opening generation stubbed)."""
+
+    @pytest.mark.asyncio
+    async def test_returns_none_for_missing_npc(self, game_state: GameState):
+        scene = await construct_scene_async(
+            game_state,
+            location="throne_room",
+            required_npcs=["nonexistent_npc"],
+        )
+        assert scene is None
+
+    @pytest.mark.asyncio
+    async def test_returns_none_for_imprisoned_npc(self, game_state: GameState):
+        scene = await construct_scene_async(
+            game_state,
+            location="throne_room",
+            required_npcs=["baron_aldric"],
+        )
+        assert scene is None
+
+    @pytest.mark.asyncio
+    async def test_builds_cast_and_awaits_opening(self, game_state: GameState, monkeypatch):
+        async def fake_opening(location, cast, state, context_packets):
+            return f"{len(cast)} figures wait in the {location}."
+
+        monkeypatch.setattr(scene_module, "generate_opening_async", fake_opening)
+
+        scene = await construct_scene_async(
+            game_state,
+            location="throne_room",
+            required_npcs=["duke_valerius"],
+        )
+
+        assert scene is not None
+        assert scene.cast[0].id == "duke_valerius"
+        assert {"duke_valerius", "bishop_erasmus"} == set(scene.context_packets)
+        assert scene.opening == "2 figures wait in the throne_room."
+        assert scene.response_mode == "sequential"
+
+
+class TestContextPackets:
+    """Tests for building context packets from the game state."""
+
+    def test_each_turn_sees_the_events_before_it(self, game_state: GameState):
+        duke = game_state.npcs["duke_valerius"]
+        build_context_packet(duke, game_state, "throne_room")
+        game_state.log_event("conversation", {"npc": "duke_valerius"})
+
+        assert build_context_packet(duke, game_state, "throne_room")["recent_events"] == [
+            "Day 5: conversation - {'npc': 'duke_valerius'}",
+        ]
+
+    def test_rebuilt_when_the_npc_changes(self, game_state: GameState):
+        duke = game_state.npcs["duke_valerius"]
+        build_context_packet(duke, game_state, "throne_room")
+        game_state.update_loyalty("duke_valerius", -15)
+        duke.agenda = "flee"
+
+        packet = build_context_packet(duke, game_state, "throne_room")
+        assert (packet["loyalty"], packet["agenda"]) == (25, "flee")
+
+        game_state.set_flag("duke_valerius_arrested", True)
+        assert build_context_packet(duke, game_state, "throne_room")["flags"]["was_arrested"]
+
+    def test_new_events_are_formatted_once(self, game_state: GameState):
+        duke = game_state.npcs["duke_valerius"]
+        bishop = game_state.npcs["bishop_erasmus"]
+        game_state.log_event("arrest", {"target": "baron"})
+        build_context_packet(duke, game_state, "throne_room")
+        formatted = scene_module.packet_stats["event_lines"]
+
+        game_state.log_event("feast", {})
+        duke_packet = build_context_packet(duke, game_state, "throne_room")
+        bishop_packet = build_context_packet(bishop, game_state, "throne_room")
+
+        assert scene_module.packet_stats["event_lines"] == formatted + 1
+        assert duke_packet["recent_events"] == [
+            "Day 5: arrest - {'target': 'baron'}",
+            "Day 5: feast - {}",
+        ]
+        assert bishop_packet["recent_events"] == duke_packet["recent_events"]
+
+    def test_window_follows_the_day(self, game_state: GameState):
+        duke = game_state.npcs["duke_valerius"]
+        game_state.log_event("arrest", {})
+        for _ in range(4):
+            game_state.advance_day()
+        game_state.log_event("feast", {})
+
+        assert build_context_packet(duke, game_state, "throne_room")["recent_events"] == [
+            "Day 9: feast - {}",
+        ]
+        game_state.day = 6
+        assert len(build_context_packet(duke, game_state, "throne_room")["recent_events"]) == 2
+
+    def test_other_records_use_their_own_fields(self, game_state: GameState):
+        stranger = game_state.npcs["duke_valerius"].model_copy()
+        stranger.loyalty = 90
+        assert build_context_packet(stranger, game_state, "throne_room")["loyalty"] == 90
+
+    def test_forks_and_undo_see_their_own_npcs(self, game_state: GameState):
+        duke = game_state.npcs["duke_valerius"]
+        build_context_packet(duke, game_state, "throne_room")
+        game_state.checkpoint()
+        game_state.update_loyalty("duke_valerius", 30)
+        child = game_state.fork()
+        child.update_loyalty("duke_valerius", 10)
+
+        def loyalty(state):
+            return build_context_packet(state.npcs["duke_valerius"], state, "throne_room")["loyalty"]
+
+        assert (loyalty(game_state), loyalty(child)) == (70, 80)
+        game_state.undo()
+        assert loyalty(game_state) == 40
+
+
+class TestPromptLayout:
+    """Tests for the cacheable prompt prefix."""
+
+    def test_npc_prefix_is_stable_across_turns(self, game_state: GameState):
+        duke = game_state.npcs["duke_valerius"]
+        context = build_context_packet(duke, game_state, "throne_room")
+        first = scene_module._npc_messages(duke, "Speak.", context, [])
+        later = scene_module._npc_messages(
+            duke, "Speak again.", context, [{"player": "Speak.", "npc": "I obey."}]
+        )
+
+        assert first[0] == later[0]
+        assert "Speak again." in later[-1]["content"]
+        assert "I obey." not in str(later[0])
+
+    def test_framework_segment_shared_across_npcs(self, game_state: GameState):
+        duke = game_state.npcs["duke_valerius"]
+        bishop = game_state.npcs["bishop_erasmus"]
+        duke_prefix = scene_module._npc_messages(
+            duke, "Speak.", build_context_packet(duke, game_state, "throne_room"), []
+        )[0]["content"]
+        bishop_prefix = scene_module._npc_messages(
+            bishop, "Speak.", build_context_packet(bishop, game_state, "throne_room"), []
+        )[0]["content"]
+
+        assert duke_prefix[:2] == bishop_prefix[:2]
+        assert duke_prefix[2] != bishop_prefix[2]
+
+
+class TestCastResponses:
+    """Tests for multi-NPC response generation."""
+
+    @pytest.fixture
+    def cast(self, game_state: GameState) -> tuple[list[NPC], dict[str, dict]]:
+        cast = [game_state.npcs["duke_valerius"], game_state.npcs["bishop_erasmus"]]
+        packets = {npc.id: build_context_packet(npc, game_state, "throne_room") for npc in cast}
+        return cast, packets
+
+    @pytest.mark.asyncio
+    async def test_sequential_passes_earlier_replies_forward(self, cast, fake_llm):
+        fake_llm.respond = lambda kwargs: "A measured bow."
+        npcs, packets = cast
+
+        responses = await generate_cast_responses_async(npcs, "Speak.", packets, [])
+
+        assert responses == {"duke_valerius": "A measured bow.", "bishop_erasmus": "A measured bow."}
+        assert len(fake_llm.calls) == 2
+        assert "WHAT OTHERS JUST SAID" not in fake_llm.calls[0]["messages"][-1]["content"]
+        assert 'Duke Valerius: "A measured bow."' in fake_llm.calls[1]["messages"][-1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_batched_uses_one_structured_call(self, cast, fake_llm):
+        fake_llm.respond = lambda kwargs: json.dumps({
+            "duke_valerius": "The Duke stiffens.",
+            "bishop_erasmus": "The Bishop murmurs a blessing.",
+        })
+        npcs, packets = cast
+
+        responses = await generate_cast_responses_async(
+            npcs, "Speak.", packets, [], mode="batched"
+        )
+
+        assert list(responses) == ["duke_valerius", "bishop_erasmus"]
+        assert responses["bishop_erasmus"] == "The Bishop murmurs a blessing."
+        assert len(fake_llm.calls) == 1
+        schema = fake_llm.calls[0]["response_format"]["json_schema"]["schema"]
+        assert schema["required"] == ["duke_valerius", "bishop_erasmus"]
+
+    @pytest.mark.asyncio
+    async def test_batched_falls_back_for_missing_npc(self, cast, fake_llm):
+        def respond(kwargs):
+            if "response_format" in kwargs:
+                return '```json\n{"duke_valerius": "The Duke stiffens."}\n```'
+            return "The Bishop says nothing."
+
+        fake_llm.respond = respond
+        npcs, packets = cast
+
+        responses = await generate_cast_responses_async(
+            npcs, "Speak.", packets, [], mode="batched"
+        )
+
+        assert responses["bishop_erasmus"] == "The Bishop says nothing."
+        assert len(fake_llm.calls) == 2
+        assert 'Duke Valerius: "The Duke stiffens."' in fake_llm.calls[1]["messages"][-1]["content"]
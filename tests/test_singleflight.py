@@ -0,0 +1,226 @@
+"""
+Tests for single-flight request coalescing.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from kings_paradox.prototype import llm, singleflight
+from kings_paradox.prototype.singleflight import AsyncSingleFlight, SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def clear_stats():
+    singleflight.flight_stats.clear()
+
+
+class TestAsyncSingleFlight:
+    """Tests for coalescing on an event loop."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_upstream_call(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+
+        assert results == ["answer"] * 5
+        assert len(calls) == 1
+        assert singleflight.flight_stats == {"leaders": 1, "coalesced": 4}
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_key_is_free_once_the_call_lands(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+
+        assert await flight.do("k", fetch) == 1
+        assert await flight.do("k", fetch) == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter(self):
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise ValueError("bad")
+
+        results = await asyncio.gather(
+            flight.do("k", fetch), flight.do("k", fetch), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_the_call_running_for_others(self):
+        flight = AsyncSingleFlight()
+        cancelled = asyncio.Event()
+
+        async def fetch():
+            try:
+                await asyncio.sleep(0.05)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "answer"
+
+        first = asyncio.ensure_future(flight.do("k", fetch))
+        second = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == "answer"
+        assert first.cancelled()
+        assert not cancelled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_upstream_cancelled_when_every_waiter_leaves(self):
+        flight = AsyncSingleFlight()
+        cancelled = asyncio.Event()
+
+        async def fetch():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.ensure_future(flight.do("k", fetch)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert cancelled.is_set()
+        assert len(flight) == 0
+        assert singleflight.flight_stats["abandoned"] == 1
+
+    @pytest.mark.asyncio
+    async def test_new_caller_after_abandonment_starts_afresh(self):
+        flight = AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(1)
+
+        async def fast():
+            return "fresh"
+
+        waiter = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        assert await flight.do("k", fast) == "fresh"
+
+
+class TestSingleFlight:
+    """Tests for coalescing across threads."""
+
+    def test_threads_share_one_upstream_call(self):
+        flight = SingleFlight()
+        calls = []
+        barrier = threading.Barrier(4)
+        results = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return "answer"
+
+        def worker():
+            barrier.wait()
+            results.append(flight.do("k", fetch))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["answer"] * 4
+        assert len(calls) == 1
+        assert len(flight) == 0
+
+    def test_error_is_raised_in_every_thread(self):
+        flight = SingleFlight()
+        errors = []
+        started = threading.Event()
+
+        def fetch():
+            started.set()
+            time.sleep(0.05)
+            raise ValueError("bad")
+
+        def worker():
+            try:
+                flight.do("k", fetch)
+            except ValueError as exc:
+                errors.append(exc)
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=worker)
+        follower.start()
+        leader.join()
+        follower.join()
+
+        assert len(errors) == 2
+
+
+class TestGatewayCoalescing:
+    """Tests for coalescing in llm.acomplete."""
+
+    @pytest.fixture
+    def slow_llm(self, fake_llm):
+        create = fake_llm.async_.create
+
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.05)
+            return await create(**kwargs)
+
+        fake_llm.async_.create = slow_create
+        return fake_llm
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_make_one_call(self, slow_llm, monkeypatch):
+        monkeypatch.setattr(llm, "usage", llm.UsageStats())
+        messages = [{"role": "user", "content": "Hail."}]
+
+        results = await asyncio.gather(
+            *(llm.acomplete(messages, model="m", temperature=0.7) for _ in range(3))
+        )
+
+        assert len(slow_llm.calls) == 1
+        assert [r.text for r in results] == ["fake response"] * 3
+        assert results[0] is not results[1]
+        assert llm.usage.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_different_requests_are_not_merged(self, slow_llm):
+        await asyncio.gather(
+            llm.acomplete([{"role": "user", "content": "Hail."}], model="m"),
+            llm.acomplete([{"role": "user", "content": "Begone."}], model="m"),
+        )
+        assert len(slow_llm.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_use_cache_false_makes_a_fresh_request(self, slow_llm):
+        messages = [{"role": "user", "content": "Hail."}]
+        await asyncio.gather(
+            llm.acomplete(messages, model="m"),
+            llm.acomplete(messages, model="m", use_cache=False),
+        )
+        assert len(slow_llm.calls) == 2
@@ -4,7 +4,7 @@ KP-778: GameState data model with Pydantic
 """
 
 import pytest
-from kings_paradox.prototype.state import NPC, GameState, Event
+from kings_paradox.prototype.state import NPC, GameState, Event, NPCChange, NPCTable, StatDelta
 
 
 class TestNPC:
@@ -86,6 +86,7 @@ class TestGameState:
         state = GameState(day=1)
         assert state.day == 1
         assert state.npcs == {}
+        assert isinstance(state.npcs, NPCTable)
         assert state.events == []
         assert state.flags == {}
 
@@ -225,6 +226,234 @@ class TestGameState:
         restored = GameState.model_validate_json(json_str)
 
         assert restored.day == 3
+        assert isinstance(restored.npcs, NPCTable)
         assert restored.npcs["duke_valerius"].name == "Duke Valerius"
         assert restored.npcs["duke_valerius"].knows == ["secret_king_illegitimate"]
         assert restored.flags["intro_complete"] is True
+
+
+class TestIndexes:
+    """Tests for the location and event-day indexes."""
+
+    def make_state(self) -> GameState:
+        return GameState(day=1, npcs={
+            "duke": NPC(id="duke", name="Duke", status="free", loyalty=50, location="throne_room"),
+            "bishop": NPC(id="bishop", name="Bishop", status="free", loyalty=60, location="chapel"),
+            "general": NPC(id="general", name="General", status="free", loyalty=70,
+                           location="throne_room"),
+        })
+
+    def test_location_index_follows_moves(self):
+        state = self.make_state()
+
+        state.npcs["duke"].location = "chapel"
+        state.arrest_npc("general")
+
+        assert [n.id for n in state.get_npcs_at_location("chapel")] == ["duke", "bishop"]
+        assert state.get_npcs_at_location("throne_room") == []
+        assert [n.id for n in state.get_npcs_at_location("dungeon")] == ["general"]
+
+    def test_location_index_follows_table_edits(self):
+        state = self.make_state()
+
+        del state.npcs["duke"]
+        state.npcs["spy"] = NPC(id="spy", name="Spy", status="free", loyalty=10,
+                                location="throne_room")
+        state.npcs = {"bishop": state.npcs["bishop"]}
+
+        assert state.get_npcs_at_location("throne_room") == []
+        assert [n.id for n in state.get_npcs_at_location("chapel")] == ["bishop"]
+
+    def test_index_survives_copy_and_roundtrip(self):
+        state = self.make_state()
+
+        for copy in (state.model_copy(deep=True),
+                     GameState.model_validate_json(state.model_dump_json())):
+            copy.npcs["duke"].location = "dungeon"
+            assert [n.id for n in copy.get_npcs_at_location("dungeon")] == ["duke"]
+        assert state.get_npcs_at_location("dungeon") == []
+
+    def test_equality_compares_fields_only(self):
+        state = self.make_state()
+        duke = state.npcs["duke"]
+        fork = state.fork()
+
+        assert duke == duke.model_copy()
+        assert state == GameState.model_validate_json(state.model_dump_json())
+        assert fork == state
+        fork.npcs["duke"].loyalty = 10
+        assert fork != state
+
+    def test_recent_events_with_logged_and_assigned_events(self):
+        state = GameState(day=1)
+        for day in range(1, 6):
+            state.day = day
+            state.log_event("meeting", {"day": day})
+        assert [e.day for e in state.get_recent_events(since_day=4)] == [4, 5]
+
+        state.events = [Event(day=5, event_type="a"), Event(day=2, event_type="b")]
+        assert [e.event_type for e in state.get_recent_events(since_day=3)] == ["a"]
+
+
+class TestForks:
+    """Tests for copy-on-write forks and undo."""
+
+    def make_state(self) -> GameState:
+        state = GameState(day=2, npcs={
+            "duke": NPC(id="duke", name="Duke", status="free", loyalty=50, location="throne_room"),
+            "bishop": NPC(id="bishop", name="Bishop", status="free", loyalty=60, location="chapel"),
+        })
+        state.log_event("coronation", {})
+        return state
+
+    def test_fork_changes_do_not_leak_either_way(self):
+        state = self.make_state()
+        fork = state.fork()
+
+        fork.arrest_npc("duke")
+        state.update_loyalty("bishop", -30)
+        state.log_event("meeting", {"target": "bishop"})
+
+        assert state.npcs["duke"].status == "free"
+        assert fork.npcs["duke"].status == "imprisoned"
+        assert fork.npcs["bishop"].loyalty == 60
+        assert [e.event_type for e in state.events] == ["coronation", "meeting"]
+        assert [e.event_type for e in fork.events] == ["coronation", "arrest"]
+        assert "duke_arrested" not in state.flags
+        assert [n.id for n in fork.get_npcs_at_location("dungeon")] == ["duke"]
+        assert state.get_npcs_at_location("dungeon") == []
+
+    def test_fork_copies_only_records_it_touches(self):
+        state = self.make_state()
+        fork = state.fork()
+        bishop = dict.__getitem__(state.npcs, "bishop")
+
+        fork.update_loyalty("duke", -5)
+
+        assert dict.__getitem__(fork.npcs, "bishop") is bishop
+        assert fork.events._base is state.events
+
+    def test_fork_of_fork_reads_through_the_shared_prefix(self):
+        state = self.make_state()
+        fork = state.fork()
+        fork.log_event("arrest", {"target": "duke"})
+        grandchild = fork.fork()
+        grandchild.day = 4
+        grandchild.log_event("execution", {"target": "duke"})
+
+        assert [e.day for e in grandchild.get_recent_events(since_day=2)] == [2, 2, 4]
+        assert [e.event_type for e in grandchild.get_recent_events(since_day=3)] == ["execution"]
+        assert GameState.model_validate_json(grandchild.model_dump_json()).events == grandchild.events
+
+    def test_undo_returns_to_the_checkpoint(self):
+        state = self.make_state()
+        state.checkpoint()
+        state.arrest_npc("duke")
+        state.advance_day()
+
+        assert state.undo() is True
+        assert state.day == 2
+        assert state.npcs["duke"].status == "free"
+        assert [e.event_type for e in state.events] == ["coronation"]
+        assert "duke_arrested" not in state.flags
+        assert state.undo() is False
+
+        state.npcs["duke"].location = "chapel"
+        assert [n.id for n in state.get_npcs_at_location("chapel")] == ["duke", "bishop"]
+
+    def test_references_held_across_a_checkpoint_stay_live(self):
+        state = self.make_state()
+        duke = state.npcs["duke"]
+        state.checkpoint()
+
+        duke.loyalty = 5
+        state.update_npcs({"duke": StatDelta(location="chapel")})
+
+        assert state.npcs["duke"] is duke
+        assert state.npcs["duke"].loyalty == 5
+        assert state.undo() is True
+        assert state.npcs["duke"].loyalty == 50
+        assert state.npcs["duke"].location == "throne_room"
+        assert state.get_npcs_at_location("chapel")[0].id == "bishop"
+
+    def test_undoing_a_forks_checkpoint_keeps_writes_in_the_fork(self):
+        state = self.make_state()
+        fork = state.fork()
+        fork.checkpoint()
+        fork.undo()
+
+        fork.npcs["duke"].location = "chapel"
+
+        assert state.npcs["duke"].location == "throne_room"
+        assert [n.id for n in state.get_npcs_at_location("chapel")] == ["bishop"]
+        assert [n.id for n in fork.get_npcs_at_location("chapel")] == ["duke", "bishop"]
+
+    def test_reading_the_live_table_copies_nothing(self):
+        state = self.make_state()
+        duke = state.npcs["duke"]
+        fork = state.fork()
+
+        assert state.npcs["duke"] is duke
+        assert list(state.npcs.values())[0] is duke
+        assert fork.npcs["duke"] is not duke
+
+
+class TestUpdateNPCs:
+    """Tests for batch stat mutation."""
+
+    def make_state(self) -> GameState:
+        return GameState(day=1, npcs={
+            "duke": NPC(id="duke", name="Duke", status="free", loyalty=95, location="throne_room"),
+            "bishop": NPC(id="bishop", name="Bishop", status="free", loyalty=5, location="chapel",
+                          suspicion_of_player=90),
+        })
+
+    def test_batch_clamps_and_reports_changes(self):
+        state = self.make_state()
+
+        changes = state.update_npcs({
+            "duke": StatDelta(loyalty=20, location="chapel"),
+            "bishop": {"loyalty": -20, "suspicion_of_player": 50, "status": "imprisoned"},
+        })
+
+        assert changes == [
+            NPCChange("duke", "loyalty", 95, 100),
+            NPCChange("duke", "location", "throne_room", "chapel"),
+            NPCChange("bishop", "loyalty", 5, 0),
+            NPCChange("bishop", "suspicion_of_player", 90, 100),
+            NPCChange("bishop", "status", "free", "imprisoned"),
+        ]
+        assert [n.id for n in state.get_npcs_at_location("chapel")] == ["duke", "bishop"]
+
+    def test_no_op_fields_are_not_reported(self):
+        state = self.make_state()
+        assert state.update_npcs({"duke": StatDelta(location="throne_room")}) == []
+
+    def test_invalid_batch_changes_nothing(self):
+        state = self.make_state()
+
+        with pytest.raises(ValueError):
+            state.update_npcs({
+                "duke": StatDelta(loyalty=-50),
+                "bishop": StatDelta(status="exiled"),
+            })
+        with pytest.raises(KeyError):
+            state.update_npcs({"duke": StatDelta(loyalty=-50), "ghost": StatDelta(loyalty=1)})
+
+        assert state.npcs["duke"].loyalty == 95
+
+    def test_unknown_field_is_named(self):
+        state = self.make_state()
+
+        with pytest.raises(ValueError, match="'loyality'"):
+            state.update_npcs({"duke": {"loyalty": 1}, "bishop": {"loyality": -5}})
+
+        assert state.npcs["duke"].loyalty == 95
+
+    def test_batch_writes_respect_forks(self):
+        state = self.make_state()
+        fork = state.fork()
+        fork.update_npcs({"duke": StatDelta(loyalty=-50)})
+
+        assert state.npcs["duke"].loyalty == 95
+        assert fork.npcs["duke"].loyalty == 45
@@ -0,0 +1,143 @@
+"""
+Tests for turn tracing and telemetry.
+"""
+
+import asyncio
+import json
+from collections import Counter
+
+import pytest
+
+from kings_paradox.prototype import llm, telemetry
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = telemetry.start_tracing(tmp_path / "trace.jsonl")
+    yield tracer
+    telemetry.stop_tracing()
+
+
+class TestSpans:
+    """Tests for span nesting and the JSONL trace."""
+
+    def test_span_is_a_no_op_when_tracing_is_off(self):
+        telemetry.stop_tracing()
+        with telemetry.span("turn") as span:
+            assert span is None
+
+    def test_nested_spans_record_parent_and_wall_time(self, tracer):
+        with telemetry.span("turn", npc="duke") as turn:
+            with telemetry.span("parse") as parse:
+                pass
+            turn.set(action="speak")
+
+        assert [s.name for s in tracer.spans] == ["parse", "turn"]
+        assert parse.parent_id == turn.span_id
+        assert turn.parent_id is None
+        assert turn.attrs == {"npc": "duke", "action": "speak"}
+        assert turn.wall_ms >= parse.wall_ms >= 0
+
+    def test_spans_are_written_as_jsonl(self, tracer):
+        with telemetry.span("turn"):
+            pass
+        telemetry.stop_tracing()
+
+        lines = tracer.path.read_text().splitlines()
+        assert json.loads(lines[0])["name"] == "turn"
+
+    def test_error_is_recorded(self, tracer):
+        with pytest.raises(ValueError):
+            with telemetry.span("parse"):
+                raise ValueError("bad")
+        assert tracer.spans[0].attrs["error"] == "ValueError"
+
+    @pytest.mark.asyncio
+    async def test_tasks_inherit_the_current_span(self, tracer):
+        async def child():
+            with telemetry.span("npc_response"):
+                await asyncio.sleep(0)
+
+        with telemetry.span("turn") as turn:
+            await asyncio.create_task(child())
+
+        assert tracer.spans[0].parent_id == turn.span_id
+
+
+class TestLLMTelemetry:
+    """Tests for per-call token and cost records."""
+
+    def test_estimate_cost_discounts_cached_tokens(self):
+        full = telemetry.estimate_cost("anthropic/claude-sonnet-4", 1000, 100)
+        cached = telemetry.estimate_cost("anthropic/claude-sonnet-4", 1000, 100, cached_tokens=800)
+        assert full == pytest.approx((1000 * 3 + 100 * 15) / 1e6)
+        assert cached < full
+        assert telemetry.estimate_cost("unknown/model", 1000, 100) is None
+
+    def test_gateway_calls_are_recorded_under_the_current_span(self, tracer, fake_llm):
+        with telemetry.span("parse") as parse:
+            llm.complete([{"role": "user", "content": "Hail."}], model="anthropic/claude-sonnet-4")
+
+        call = tracer.spans[0]
+        assert call.name == "llm"
+        assert call.parent_id == parse.span_id
+        assert call.attrs["model"] == "anthropic/claude-sonnet-4"
+        assert call.attrs["prompt_tokens"] == 10
+        assert call.attrs["completion_tokens"] == 5
+        assert call.attrs["cost"] > 0
+
+    @pytest.mark.asyncio
+    async def test_stream_records_time_to_first_token(self, tracer, fake_llm):
+        fake_llm.respond = lambda kwargs: "The Duke bows low."
+        chunks = [c async for c in llm.astream([{"role": "user", "content": "Hail."}], model="m")]
+
+        assert "".join(chunks) == "The Duke bows low."
+        assert tracer.spans[0].attrs["ttft_ms"] is not None
+
+
+    @pytest.mark.asyncio
+    async def test_coalesced_calls_are_billed_once(self, tracer, fake_llm):
+        create = fake_llm.async_.create
+
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.05)
+            return await create(**kwargs)
+
+        fake_llm.async_.create = slow_create
+        model = "anthropic/claude-sonnet-4"
+        messages = [{"role": "user", "content": "Hail."}]
+
+        await asyncio.gather(*(llm.acomplete(messages, model=model) for _ in range(3)))
+
+        calls = [span for span in tracer.spans if span.name == "llm"]
+        assert len(fake_llm.calls) == 1
+        assert sorted(span.attrs["coalesced"] for span in calls) == [False, True, True]
+        assert sum(span.attrs["prompt_tokens"] for span in calls) == 10
+        assert sum(span.attrs["cost"] for span in calls) == pytest.approx(
+            telemetry.estimate_cost(model, 10, 5)
+        )
+        row = next(line for line in tracer.report().splitlines() if line.startswith(model))
+        assert row.split()[1] == "1"
+
+
+class TestReport:
+    """Tests for the end-of-session report."""
+
+    def test_report_summarizes_phases_models_and_counters(self, tracer):
+        with telemetry.span("turn"):
+            telemetry.record_llm(
+                "anthropic/claude-sonnet-4", 1.2, prompt_tokens=1000,
+                completion_tokens=100, cached_tokens=800, ttft=0.4,
+            )
+
+        report = tracer.report({"Parse paths": Counter(llm=3, repaired=1), "Empty": Counter()})
+
+        assert "turn" in report and "llm" in report
+        assert "anthropic/claude-sonnet-4" in report
+        assert "Estimated total cost" in report
+        assert "Parse paths: llm=3, repaired=1" in report
+        assert "Empty" not in report
+
+    def test_cache_hits_cost_nothing(self, tracer):
+        telemetry.record_llm("anthropic/claude-sonnet-4", 0.01, prompt_tokens=1000, cached=True)
+        assert tracer.spans[0].attrs["cost"] == 0.0